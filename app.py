@@ -1,5 +1,10 @@
+import html
+import time
+
 import streamlit as st
 
+from utils.registry import KINDS, get_registry
+
 # Page Configuration
 st.set_page_config(
     page_title="Analytics Dashboard",
@@ -56,7 +61,7 @@ st.markdown("""
         box-shadow: 0 8px 32px rgba(0,0,0,0.3);
         text-align: center;
         transition: all 0.3s ease;
-        height: 250px;
+        height: 300px;
         display: flex;
         flex-direction: column;
         justify-content: center;
@@ -85,6 +90,34 @@ st.markdown("""
         color: #a0aec0;
     }
     
+    .menu-meta {
+        font-size: 0.8rem;
+        color: #718096;
+        margin-top: 0.3rem;
+    }
+    
+    .menu-badge {
+        display: inline-block;
+        margin: 0.8rem auto 0;
+        padding: 0.2rem 0.8rem;
+        border-radius: 999px;
+        font-size: 0.75rem;
+        color: #ffffff;
+        background: rgba(255,255,255,0.1);
+    }
+    
+    .menu-badge.ready {
+        background: rgba(16,185,129,0.3);
+    }
+    
+    .menu-badge.warming {
+        background: rgba(245,158,11,0.3);
+    }
+    
+    .menu-badge.error {
+        background: rgba(239,68,68,0.3);
+    }
+    
     .stSidebar {
         background: linear-gradient(180deg, #1a1a2e 0%, #16213e 100%);
     }
@@ -99,6 +132,26 @@ st.markdown("""
 st.markdown('<h1 class="main-header">🏠 Analytics Dashboard</h1>', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">Pilih dashboard yang ingin Anda lihat dari menu dibawah </p>', unsafe_allow_html=True)
 
+# Dataset registry: card dibangun dari index metadata workbook (tanpa parse), scan ulang di background
+registry = get_registry()
+entries = [entry for entry in registry.entries() if entry['kind'] in KINDS]
+
+STATUS_BADGES = {
+    'ready': '⚡ Data siap',
+    'warming': '⏳ Menyiapkan data',
+    'cold': '❄️ Belum di-cache',
+    'error': '⚠️ Gagal dibaca',
+}
+
+
+def period_label(entry):
+    if not entry.get('period_start'):
+        return '-'
+    if entry['period_start'] == entry['period_end']:
+        return entry['period_start']
+    return f"{entry['period_start']} – {entry['period_end']}"
+
+
 # Sidebar info
 with st.sidebar:
     st.markdown("## 📌 Navigasi")
@@ -106,48 +159,49 @@ with st.sidebar:
     st.info("Gunakan menu di halaman utama untuk berpindah antar dashboard")
     st.markdown("---")
     st.markdown("### 📊 Dashboard Tersedia")
-    st.markdown("""
-    - **Promo 2025**
-    - **Promo 2026**
-    """)
+    st.markdown("\n".join(
+        f"- **{KINDS[entry['kind']]['title']}** ({html.escape(period_label(entry))})" for entry in entries
+    ) or "Belum ada workbook")
 
 # Menu Cards
 st.markdown("### 📂 Pilih Dashboard")
 st.markdown("<br>", unsafe_allow_html=True)
 
-col1, col2, col3 = st.columns(3)
+if not entries:
+    st.warning("⚠️ Tidak ada workbook dashboard (.xlsx) di direktori data.")
 
-with col1:
-    st.markdown("""
-    <div class="menu-card">
-        <div class="menu-icon">📊</div>
-        <div class="menu-title">Promo 2025</div>
-        <div class="menu-desc">Visualisasi performa promosi 2025</div>
-    </div>
-    """, unsafe_allow_html=True)
-    if st.button("Buka Dashboard", use_container_width=True, key="btn_promo_2025"):
-        st.switch_page("pages/1_Promo_Dashboard.py")
-
-with col2:
-    st.markdown("""
-    <div class="menu-card">
-        <div class="menu-icon">📈</div>
-        <div class="menu-title">Promo 2026</div>
-        <div class="menu-desc">Visualisasi performa promosi 2026</div>
-    </div>
-    """, unsafe_allow_html=True)
-    if st.button("Buka Dashboard", use_container_width=True, key="btn_promo_2026"):
-        st.switch_page("pages/2_Ended_Promo.py")
-
-with col3:
-    st.markdown("""
-    <div class="menu-card">
-        <div class="menu-icon">⚙️</div>
-        <div class="menu-title">Coming Soon</div>
-        <div class="menu-desc">Dashboard tambahan akan hadir segera</div>
-    </div>
-    """, unsafe_allow_html=True)
-    st.button("Coming Soon", use_container_width=True, disabled=True)
+# Workbook terbaru per jenis dipanaskan di background agar klik pertama tidak menunggu parse
+# (Streamlit tidak punya event hover; card yang tampil = kandidat yang paling mungkin dibuka)
+latest = {}
+for entry in entries:
+    latest.setdefault(entry['kind'], entry)
+for entry in latest.values():
+    registry.warm(entry)
+
+for row_start in range(0, len(entries), 3):
+    cols = st.columns(3)
+    for col, entry in zip(cols, entries[row_start:row_start + 3]):
+        kind = KINDS[entry['kind']]
+        status = registry.status(entry)
+        badge = STATUS_BADGES[status]
+        if status == 'error' and entry['error']:
+            badge = f"{badge}: {entry['error'][:60]}"
+        with col:
+            st.markdown(f"""
+            <div class="menu-card">
+                <div class="menu-icon">{kind['icon']}</div>
+                <div class="menu-title">{kind['title']}</div>
+                <div class="menu-desc">{html.escape(period_label(entry))}</div>
+                <div class="menu-meta">{entry.get('categories', 0)} category · {entry.get('promos', 0)} promo</div>
+                <div class="menu-meta">{html.escape(entry['name'])} · {time.strftime('%d %b %Y %H:%M', time.localtime(entry['mtime']))}</div>
+                <div><span class="menu-badge {status}">{html.escape(badge)}</span></div>
+            </div>
+            """, unsafe_allow_html=True)
+            if st.button("Buka Dashboard", use_container_width=True, key=f"btn_{entry['path']}",
+                         disabled=status == 'error'):
+                st.session_state[kind['state_key']] = entry['path']
+                registry.warm(entry)
+                st.switch_page(kind['page'])
 
 # Footer
 st.markdown("---")
@@ -0,0 +1 @@
+# Root conftest: pytest menambahkan root repo ke sys.path sehingga test bisa import utils.*
@@ -1,10 +1,34 @@
+import os
+import re
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
 
+from utils.bitmaps import aggregate, pivot_sum
+from utils.charts import (
+    BAR_OUTLINE, DELTA_DOWN, DELTA_UP, GRID_COLOR, WHITE, axis, create_comparison_chart, create_distribution_chart,
+    format_change, make_figure
+)
+from utils.comparison import COMPARE_MODES, summarize
+from utils.diskcache import file_hash, submit_cached_figures
+from utils.downsample import extreme_labels, scatter_type
+from utils import ended_data
+from utils.ended_data import DRILLDOWN_STATE, drilldown_filters
+from utils.export import render_export
+from utils import promo_data
+from utils.promo_data import (
+    COMPARISON_MEAN_COLS, COMPARISON_MEASURES, COMPARISON_RATIOS, DATA_FILE, DATA_FILE_STATE, DATASET_OPTIONS,
+    aggregate_charts, data_version, kontribusi_column, promo_kpis, select_rows, source_periods
+)
+from utils.periods import GRAIN_TITLES, GRAIN_UNITS, axis_labels
+from utils.tables import render_table
+from utils.tiles import MAX_ANNOTATED_CELLS, MAX_HEATMAP_COLS, TilePyramid
+from utils.topk import top_k_all
+from utils.singleflight import single_flight
+
 # Page Configuration
 st.set_page_config(
     page_title="Promo Performance Dashboard",
@@ -131,33 +155,75 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load Data Function
-@st.cache_data
-def load_data(file_path):
-    xlsx = pd.ExcelFile(file_path)
-    
-    data = {
-        'all_year': pd.read_excel(xlsx, sheet_name='Summary All (Year)'),
-        'all_month': pd.read_excel(xlsx, sheet_name='Summary All (Month)'),
-        'non_cig_year': pd.read_excel(xlsx, sheet_name='Summary Non Cigarette (Year)'),
-        'non_cig_month': pd.read_excel(xlsx, sheet_name='Summary Non Cigarette (Month)')
-    }
-    
-    for key in ['all_year', 'non_cig_year']:
-        if 'Jumlah Promo' in data[key].columns:
-            data[key] = data[key].rename(columns={'Jumlah Promo': 'Qty Promo'})
-    
-    month_order = [
-        'January 2025', 'February 2025', 'March 2025', 'April 2025',
-        'May 2025', 'June 2025', 'July 2025', 'August 2025',
-        'September 2025', 'October 2025', 'November 2025', 'December 2025'
-    ]
-    
-    for key in ['all_month', 'non_cig_month']:
-        data[key]['Month'] = pd.Categorical(data[key]['Month'], categories=month_order, ordered=True)
-        data[key] = data[key].sort_values(['Category', 'Month'])
-    
-    return data
+# Lapisan cache in-process di atas disk cache (utils.promo_data); file_version = hash file
+# agar workbook yang dipublish ulang langsung terbaca tanpa restart
+@st.cache_data(max_entries=4)
+def load_data(file_path, file_version):
+    return promo_data.load_data(file_path)
+
+@st.cache_data(max_entries=32)
+def load_rollup(file_path, file_version, dataset_key, grain):
+    return promo_data.load_rollup(file_path, dataset_key, grain)
+
+# Bitmap index read-only dibagi antar session tanpa salinan per rerun
+@st.cache_resource(max_entries=32)
+def load_rollup_index(file_path, file_version, dataset_key, grain):
+    return promo_data.load_rollup_index(file_path, dataset_key, grain)
+
+# Pyramid heatmap per versi slice x dataset x grain x filter; ganti rentang zoom cukup memilih tile
+@st.cache_resource(max_entries=32)
+def load_heatmap_pyramid(version, dataset_key, grain, categories, periods, _rollup, _index, _rows):
+    grid, row_keys, period_keys = pivot_sum(_rollup, _index, _rows, 'Category', 'Period', 'Sales Amount')
+    period_starts = aggregate(_rollup, _index, _rows, ['Period'], {'Period Start': ('Period Start', 'first')})
+    period_starts = period_starts.set_index('Period')['Period Start']
+    return TilePyramid(grid, row_keys), period_starts.reindex(period_keys).reset_index(drop=True)
+
+# Tabel delta per dataset x grain x mode perbandingan (read-only, sejajar baris rollup)
+@st.cache_resource(max_entries=32)
+def load_comparison(file_path, file_version, dataset_key, grain, mode):
+    return promo_data.load_comparison(file_path, dataset_key, grain, mode)
+
+# Index drill-down category -> promo berakhir, dibagi dengan page Ended Promo
+@st.cache_resource(max_entries=4)
+def load_drilldown(file_path, file_version):
+    return ended_data.load_drilldown(file_path)
+
+# ==================== Drill-down ke Ended Promo ====================
+# Chart bersumbu category mencatat klik (titik / bar / slice); category yang diklik membuka
+# page Ended Promo dengan filter yang diisi dari index drill-down
+
+def render_chart(fig, key, events=None):
+    # events = None: chart biasa (mis. sumbu periode), tanpa selection
+    if events is None:
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        events.append(st.plotly_chart(fig, use_container_width=True, key=key, on_select="rerun", selection_mode="points"))
+
+def clicked_category(event):
+    # Category dari label titik terpilih ('Cat 14', 'Category 14', 'Cat 14 · Jan 2025')
+    for point in event['selection']['points']:
+        for field in ('label', 'x', 'y'):
+            match = re.match(r'Cat(?:egory)? (\d+)\b', str(point.get(field, '')))
+            if match:
+                return int(match.group(1))
+    return None
+
+def open_ended_promo(drilldown, category):
+    # State filter ditulis sebelum switch_page: widget page tujuan langsung memakai nilai ini
+    st.session_state.update(drilldown_filters(drilldown, int(category)))
+    st.session_state[DRILLDOWN_STATE] = int(category)
+    st.switch_page("pages/2_Ended_Promo.py")
+
+def handle_drilldown(events, drilldown):
+    # Category yang diklik -> breakdown Ended Promo (filter dari index drill-down)
+    for event in events:
+        category = clicked_category(event)
+        if category is None:
+            continue
+        if category in drilldown:
+            open_ended_promo(drilldown, category)
+            return
+        st.toast(f"Category {category} tidak memiliki promo berakhir di workbook Ended Promo")
 
 # Format functions
 def format_rupiah(value):
@@ -190,6 +256,401 @@ def format_short_rupiah(value):
 
 # Color palette
 CATEGORY_COLORS_LIST = ['#00d4ff', '#9b5de5', '#f15bb5', '#00f5d4', '#fee440', '#ff6b6b', '#00bbf9']
+MEDAL_COLORS = ['#ffd700', '#c0c0c0', '#cd7f32']
+
+# Bar chart panel Top K (3 teratas warna medali)
+def create_top_chart(labels, values, text_labels, title, y_title):
+    colors = MEDAL_COLORS[:len(values)] + ['#00d4ff'] * max(0, len(values) - len(MEDAL_COLORS))
+    
+    return make_figure([{
+        'type': 'bar',
+        'x': labels,
+        'y': values,
+        'marker': {'color': colors},
+        'text': text_labels,
+        'textposition': 'outside',
+        'textfont': {'color': WHITE, 'size': 12}
+    }], {
+        'title': {'text': title, 'font': {'size': 14, 'color': WHITE}},
+        'height': 350,
+        'margin': {'l': 40, 'r': 40, 't': 60, 'b': 40},
+        'xaxis': axis(),
+        'yaxis': axis(y_title, gridcolor=GRID_COLOR)
+    })
+
+# Figure builder: pure (tanpa st.*) agar bisa dijalankan di worker pool
+def create_sales_chart(plot1_data, x_title):
+    scatter1_type = scatter_type(len(plot1_data))
+    sales_labels = extreme_labels(plot1_data['Sales Amount'], plot1_data['Sales Amount'].apply(format_short_rupiah))
+    kontribusi_labels = extreme_labels(plot1_data['Kontribusi_Pct'], plot1_data['Kontribusi_Pct'].apply(lambda x: f'{x:.2f}%'))
+    
+    # Sumbu sekunder (Kontribusi) = yaxis2 overlay di sisi kanan
+    return make_figure([{
+        'type': 'bar',
+        'x': plot1_data['X_Label'],
+        'y': plot1_data['Sales Amount'],
+        'name': 'Sales Amount',
+        'marker': {
+            'color': plot1_data['Sales Amount'],
+            'colorscale': [[0, '#00d4ff'], [0.5, '#7b2cbf'], [1, '#ff6b6b']],
+            'line': BAR_OUTLINE
+        },
+        'text': sales_labels,
+        'textposition': 'outside',
+        'textfont': {'color': WHITE, 'size': 12},
+        'hovertemplate': '<b>%{x}</b><br>Sales: Rp %{y:,.0f}<extra></extra>',
+        'xaxis': 'x', 'yaxis': 'y'
+    }, {
+        'type': scatter1_type,
+        'x': plot1_data['X_Label'],
+        'y': plot1_data['Kontribusi_Pct'],
+        'name': 'Kontribusi (%)',
+        'mode': 'lines+markers+text',
+        'line': {'color': '#fee440', 'width': 4},
+        'marker': {'size': 14, 'symbol': 'diamond', 'color': '#fee440', 'line': {'color': WHITE, 'width': 2}},
+        'text': kontribusi_labels,
+        'textposition': 'top center',
+        'textfont': {'color': '#fee440', 'size': 12},
+        'hovertemplate': '<b>%{x}</b><br>Kontribusi: %{y:.2f}%<extra></extra>',
+        'xaxis': 'x', 'yaxis': 'y2'
+    }], {
+        'xaxis': axis(x_title, tick_size=12, gridcolor=GRID_COLOR, title_size=14, anchor='y', domain=[0.0, 0.94]),
+        'yaxis': axis('Sales Amount (Rp)', tick_size=11, tick_color='#00d4ff', gridcolor=GRID_COLOR,
+                      title_size=13, anchor='x', domain=[0.0, 1.0]),
+        'yaxis2': axis('Kontribusi (%)', tick_size=11, tick_color='#fee440', gridcolor='rgba(255,255,255,0.05)',
+                       title_size=13, anchor='x', overlaying='y', side='right'),
+        'legend': {
+            'orientation': 'h', 'yanchor': 'bottom', 'y': 1.02, 'xanchor': 'center', 'x': 0.5,
+            'font': {'color': WHITE, 'size': 12}, 'bgcolor': 'rgba(0,0,0,0.3)'
+        },
+        'hovermode': 'x unified',
+        'height': 500,
+        'margin': {'l': 80, 'r': 80, 't': 80, 'b': 80},
+        'bargap': 0.3
+    })
+
+def create_customer_chart(plot2_data, x_title):
+    scatter2_type = scatter_type(len(plot2_data))
+    noc_labels = extreme_labels(plot2_data['NOC'], plot2_data['NOC'].apply(format_number))
+    visit_labels = extreme_labels(plot2_data['Visit Customer'], plot2_data['Visit Customer'].apply(format_number))
+    
+    # Single Line Chart dengan satu skala
+    return make_figure([{
+        'type': scatter2_type,
+        'x': plot2_data['X_Label'],
+        'y': plot2_data['NOC'],
+        'name': 'NOC',
+        'mode': 'lines+markers+text',
+        'line': {'color': '#00f5d4', 'width': 4},
+        'marker': {'size': 12, 'color': '#00f5d4', 'symbol': 'circle', 'line': {'color': WHITE, 'width': 2}},
+        'text': noc_labels,
+        'textposition': 'top center',
+        'textfont': {'color': '#00f5d4', 'size': 11},
+        'hovertemplate': '<b>%{x}</b><br>NOC: %{y:,.0f}<extra></extra>'
+    }, {
+        'type': scatter2_type,
+        'x': plot2_data['X_Label'],
+        'y': plot2_data['Visit Customer'],
+        'name': 'Visit Customer',
+        'mode': 'lines+markers+text',
+        'line': {'color': '#f15bb5', 'width': 4},
+        'marker': {'size': 12, 'color': '#f15bb5', 'symbol': 'diamond', 'line': {'color': WHITE, 'width': 2}},
+        'text': visit_labels,
+        'textposition': 'top center',
+        'textfont': {'color': '#f15bb5', 'size': 11},
+        'hovertemplate': '<b>%{x}</b><br>Visit: %{y:,.0f}<extra></extra>'
+    }], {
+        'xaxis': axis(x_title, tick_size=11, gridcolor=GRID_COLOR, title_size=13),
+        'yaxis': axis('Jumlah', tick_size=11, gridcolor=GRID_COLOR, title_size=13),
+        'legend': {
+            'orientation': 'h', 'yanchor': 'bottom', 'y': 1.02, 'xanchor': 'center', 'x': 0.5,
+            'font': {'color': WHITE, 'size': 12}, 'bgcolor': 'rgba(0,0,0,0.3)'
+        },
+        'hovermode': 'x unified',
+        'height': 450,
+        'margin': {'l': 80, 'r': 40, 't': 80, 'b': 80}
+    })
+
+# Area chart conversion rate + garis rata-rata
+def create_conversion_chart(plot2_data, avg_conversion, x_title):
+    scatter2_type = scatter_type(len(plot2_data))
+    conversion_labels = extreme_labels(plot2_data['Conversion_Rate'], plot2_data['Conversion_Rate'].apply(lambda x: f'{x:.2f}%'))
+    
+    return make_figure([{
+        'type': scatter2_type,
+        'x': plot2_data['X_Label'],
+        'y': plot2_data['Conversion_Rate'],
+        'name': 'Conversion Rate',
+        'mode': 'lines+markers+text',
+        'fill': 'tozeroy',
+        'fillcolor': 'rgba(254, 228, 64, 0.2)',
+        'line': {'color': '#fee440', 'width': 4},
+        'marker': {'size': 14, 'color': '#fee440', 'line': {'color': WHITE, 'width': 2}},
+        'text': conversion_labels,
+        'textposition': 'top center',
+        'textfont': {'color': '#fee440', 'size': 12, 'family': 'Poppins'},
+        'hovertemplate': '<b>%{x}</b><br>Conversion Rate: %{y:.2f}%<extra></extra>'
+    }], {
+        'shapes': [{
+            'type': 'line', 'xref': 'x domain', 'x0': 0, 'x1': 1, 'yref': 'y', 'y0': avg_conversion, 'y1': avg_conversion,
+            'line': {'color': '#ff6b6b', 'dash': 'dash'}
+        }],
+        'annotations': [{
+            'text': f"Avg: {avg_conversion:.2f}%", 'showarrow': False,
+            'xref': 'x domain', 'x': 1, 'xanchor': 'left', 'yref': 'y', 'y': avg_conversion, 'yanchor': 'middle',
+            'font': {'color': '#ff6b6b', 'size': 12}
+        }],
+        'xaxis': axis(x_title, tick_size=12, gridcolor=GRID_COLOR, title_size=14),
+        'yaxis': axis('Conversion Rate (%)', tick_size=11, tick_color='#fee440', gridcolor=GRID_COLOR, title_size=13),
+        'height': 400,
+        'margin': {'l': 80, 'r': 80, 't': 40, 'b': 80},
+        'showlegend': False
+    })
+
+def create_sales_pie_chart(pie_data):
+    return make_figure([{
+        'type': 'pie',
+        'labels': pie_data['Category_Label'],
+        'values': pie_data['Sales Amount'],
+        'hole': 0.5,
+        'marker': {'colors': CATEGORY_COLORS_LIST[:len(pie_data)], 'line': {'color': '#1a1a2e', 'width': 3}},
+        'textinfo': 'label+percent',
+        'textfont': {'color': WHITE, 'size': 11},
+        'hovertemplate': '<b>%{label}</b><br>Sales: Rp %{value:,.0f}<br>Persentase: %{percent}<extra></extra>',
+        'pull': [0.02] * len(pie_data)
+    }], {
+        'showlegend': True,
+        'legend': {
+            'orientation': 'h', 'yanchor': 'bottom', 'y': -0.15, 'xanchor': 'center', 'x': 0.5,
+            'font': {'color': WHITE, 'size': 10}
+        },
+        'height': 450,
+        'margin': {'l': 20, 'r': 20, 't': 20, 'b': 80},
+        'annotations': [{
+            'text': f'<b>Total</b><br>{format_short_rupiah(pie_data["Sales Amount"].sum())}',
+            'x': 0.5, 'y': 0.5,
+            'font': {'size': 14, 'color': WHITE, 'family': 'Poppins'},
+            'showarrow': False
+        }]
+    })
+
+def create_promo_count_chart(promo_data):
+    return make_figure([{
+        'type': 'bar',
+        'x': promo_data['Qty Promo'],
+        'y': promo_data['Category_Label'],
+        'orientation': 'h',
+        'marker': {
+            'color': promo_data['Qty Promo'],
+            'colorscale': [[0, '#00d4ff'], [0.5, '#9b5de5'], [1, '#f15bb5']],
+            'line': BAR_OUTLINE
+        },
+        'text': promo_data['Qty Promo'],
+        'textposition': 'outside',
+        'textfont': {'color': WHITE, 'size': 12},
+        'hovertemplate': '<b>%{y}</b><br>Qty Promo: %{x}<extra></extra>'
+    }], {
+        'xaxis': axis('Jumlah Promo', gridcolor=GRID_COLOR),
+        'yaxis': axis('', tick_size=12),
+        'height': 450,
+        'margin': {'l': 100, 'r': 60, 't': 20, 'b': 60}
+    })
+
+# ==================== Perbandingan Periode ====================
+# Semua angka dibaca dari tabel delta (sejajar rollup) pada posisi bitmap filter aktif:
+# nilai periode pembanding sudah tersedia per baris, tanpa filter + agregasi kedua
+
+NO_COMPARISON = 'Tanpa Perbandingan'
+
+COMPARISON_TABLE_COLS = [
+    'Category', 'Period', 'Periode Pembanding',
+    'Sales Amount', 'Sales Amount (Pembanding)', 'Sales Amount Δ%',
+    'NOC', 'NOC (Pembanding)', 'NOC Δ%',
+    'Qty Promo', 'Qty Promo (Pembanding)', 'Qty Promo Δ%',
+    'Kontribusi', 'Kontribusi (Pembanding)', 'Kontribusi Δ%',
+    'Conversion Rate', 'Conversion Rate (Pembanding)', 'Conversion Rate Δ%'
+]
+
+COMPARISON_TABLE_FORMATS = {
+    'Sales Amount': 'rupiah', 'Sales Amount (Pembanding)': 'rupiah',
+    'NOC': 'number', 'NOC (Pembanding)': 'number', 'Qty Promo': 'number', 'Qty Promo (Pembanding)': 'number',
+    'Kontribusi': 'percent_detail', 'Kontribusi (Pembanding)': 'percent_detail',
+    'Conversion Rate': 'percent', 'Conversion Rate (Pembanding)': 'percent',
+    **{col: 'percent' for col in COMPARISON_TABLE_COLS if col.endswith('Δ%')}
+}
+
+def render_comparison(comparison, index, rows, categories, periods, compare_option, view_option, events):
+    st.markdown(f'<p class="section-title">🔁 Perbandingan Periode ({compare_option})</p>', unsafe_allow_html=True)
+    
+    period = st.selectbox("📆 Periode yang dibandingkan", options=periods, index=len(periods) - 1, key="compare_period")
+    period_rows = select_rows(index, categories, [period])
+    total = summarize(comparison, index, period_rows, [], COMPARISON_MEASURES, COMPARISON_RATIOS, COMPARISON_MEAN_COLS)
+    total = {col: values.iloc[0] for col, values in total.items()}
+    previous_labels = comparison['Periode Pembanding'].take(period_rows).dropna().unique()
+    if not len(previous_labels):
+        st.info(f"ℹ️ Tidak ada data pembanding untuk {period} ({compare_option.lower()}).")
+        return
+    previous_text = ', '.join(map(str, previous_labels))
+    st.caption(f"{period} vs {previous_text} · nilai pembanding hanya dari category yang juga ada di {previous_text}")
+    
+    cards = [
+        (format_rupiah(total['Sales Amount']), total['Sales Amount Δ%'], '💰 Sales Amount'),
+        (format_number(total['NOC']), total['NOC Δ%'], '👥 NOC'),
+        (f"{total['Qty Promo']:,.0f}", total['Qty Promo Δ%'], '🎯 Qty Promo'),
+        (f"{total['Kontribusi']*100:.2f}%", total['Kontribusi Δ%'], '📊 Kontribusi'),
+        (f"{total['Conversion Rate']*100:.2f}%", total['Conversion Rate Δ%'], '🔄 Conversion Rate')
+    ]
+    for col, (value, pct, label) in zip(st.columns(5), cards):
+        with col:
+            st.markdown(f"""
+            <div class="metric-container">
+                <div class="metric-value" style="font-size: 1.5rem;">{value}</div>
+                <div class="metric-label">{label}</div>
+                <div class="metric-label" style="color: {DELTA_DOWN if pct < 0 else DELTA_UP};">{format_change(pct)}</div>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    col_trend, col_category = st.columns(2) if len(periods) > 1 else (None, st.container())
+    
+    # Tren: total per periode terpilih vs pembanding masing-masing
+    if col_trend is not None:
+        trend = summarize(comparison, index, rows, ['Period'], COMPARISON_MEASURES, COMPARISON_RATIOS,
+                          COMPARISON_MEAN_COLS, extra={'Period Start': ('Period Start', 'first')})
+        with col_trend:
+            st.markdown('<p class="section-title">📈 Sales Amount per Periode</p>', unsafe_allow_html=True)
+            st.plotly_chart(create_comparison_chart(
+                axis_labels(trend['Period Start'], view_option), trend['Sales Amount'],
+                trend['Sales Amount (Pembanding)'], trend['Sales Amount Δ%'], 'Sales Amount (Rp)'
+            ), use_container_width=True)
+    
+    # Per category pada periode terpilih: baris tabel delta apa adanya
+    per_category = comparison.iloc[period_rows]
+    with col_category:
+        st.markdown(f'<p class="section-title">🏷️ Sales Amount per Category ({period})</p>', unsafe_allow_html=True)
+        render_chart(create_comparison_chart(
+            'Cat ' + per_category['Category'].astype(str), per_category['Sales Amount'],
+            per_category['Sales Amount (Pembanding)'], per_category['Sales Amount Δ%'], 'Sales Amount (Rp)'
+        ), 'chart_compare_category', events)
+    
+    with st.expander("🔍 Lihat Tabel Perbandingan", expanded=False):
+        render_table(comparison, key='table_compare', rows=period_rows, height=300, formats=COMPARISON_TABLE_FORMATS,
+                     columns=COMPARISON_TABLE_COLS)
+
+# ==================== Section di bawah fold ====================
+# Dirender sebagai fragment: konten baru dihitung saat toggle section dinyalakan, dan
+# interaksi di dalamnya (buka, zoom, ranking, klik category) hanya menjalankan ulang fragment
+
+@st.fragment
+def render_heatmap(version, dataset_key, view_option, categories, periods, current_df, index, rows, drilldown):
+    period_title = GRAIN_TITLES[view_option]
+    st.markdown(f'<p class="section-title">🗓️ Heatmap: Sales Amount per Category per {period_title}</p>', unsafe_allow_html=True)
+    if not st.toggle("Tampilkan heatmap", value=False, key="show_heatmap", help="Heatmap dihitung saat section ini dibuka"):
+        return
+    
+    events = []
+    pyramid, period_starts = load_heatmap_pyramid(
+        version, dataset_key, view_option, tuple(categories), tuple(periods), current_df, index, rows
+    )
+    
+    # Viewport = rentang periode; level pyramid dipilih agar kolom <= MAX_HEATMAP_COLS
+    col_start, col_end = 0, pyramid.n_cols
+    if pyramid.n_cols > MAX_HEATMAP_COLS:
+        base_labels = axis_labels(period_starts, view_option, compact=True)
+        range_start, range_end = st.select_slider(
+            "🔍 Rentang Periode Heatmap",
+            options=list(range(pyramid.n_cols)),
+            value=(0, pyramid.n_cols - 1),
+            format_func=lambda i: base_labels[i]
+        )
+        col_start, col_end = range_start, range_end + 1
+    
+    level, heatmap_z, edges = pyramid.window(col_start, col_end)
+    edge_labels = axis_labels(
+        pd.concat([period_starts.iloc[edges[:-1]], period_starts.iloc[edges[1:] - 1]]),
+        view_option, compact=True
+    )
+    n_heatmap_cols = len(edges) - 1
+    if level == 0:
+        short_months = edge_labels[:n_heatmap_cols]
+    else:
+        short_months = [f'{a} – {b}' for a, b in zip(edge_labels[:n_heatmap_cols], edge_labels[n_heatmap_cols:])]
+        st.caption(f"Resolusi heatmap: 1 kolom = {1 << level} {GRAIN_UNITS[view_option]}")
+    
+    # Anotasi teks per sel hanya untuk grid kecil (zoom kasar)
+    heatmap_text = {}
+    if heatmap_z.size <= MAX_ANNOTATED_CELLS:
+        heatmap_text = dict(
+            text=[[format_short_rupiah(val) if not np.isnan(val) else '' for val in row] for row in heatmap_z],
+            texttemplate='%{text}'
+        )
+    
+    fig5 = make_figure([{
+        'type': 'heatmap',
+        'z': heatmap_z,
+        'x': short_months,
+        'y': ['Cat ' + str(c) for c in pyramid.row_keys],
+        'colorscale': [[0, '#1a1a2e'], [0.25, '#00d4ff'], [0.5, '#9b5de5'], [0.75, '#f15bb5'], [1, '#ff6b6b']],
+        'textfont': {'color': WHITE, 'size': 10},
+        'hovertemplate': 'Category: %{y}<br>' + period_title + ': %{x}<br>Sales: Rp %{z:,.0f}<extra></extra>',
+        'colorbar': {'title': {'text': 'Sales', 'font': {'color': WHITE}}, 'tickfont': {'color': WHITE}},
+        **heatmap_text
+    }], {
+        'xaxis': axis(period_title, tick_size=11, side='bottom'),
+        'yaxis': axis('Category', tick_size=12),
+        'height': 400,
+        'margin': {'l': 80, 'r': 20, 't': 20, 'b': 80}
+    })
+    
+    render_chart(fig5, 'chart_heatmap', events)
+    handle_drilldown(events, drilldown)
+
+@st.fragment
+def render_top_performers(data_file, figure_state, version, current_df, index, rows, view_option, kontribusi_col, drilldown):
+    st.markdown('<p class="section-title">🏆 Top Category Performance</p>', unsafe_allow_html=True)
+    if not st.toggle("Tampilkan top performers", value=False, key="show_top", help="Ranking dihitung saat section ini dibuka"):
+        return
+    
+    is_time_view = view_option != 'Yearly'
+    events = []
+    rank_options = ['Category', 'Category x Periode'] if is_time_view else ['Category']
+    col_rank, col_k = st.columns([2, 1])
+    with col_rank:
+        rank_by = st.selectbox("📊 Ranking berdasarkan", options=rank_options, index=0)
+    with col_k:
+        top_n = st.number_input("🔢 Jumlah Top (K)", min_value=1, max_value=50, value=3, step=1)
+    
+    # Satu aggregation pass untuk semua metrik ranking
+    rank_dims = ['Category', 'Period'] if rank_by == 'Category x Periode' else ['Category']
+    rank_table = aggregate(current_df, index, rows, rank_dims, {
+        'Sales Amount': ('Sales Amount', 'sum'),
+        'NOC': ('NOC', 'sum'),
+        'Kontribusi': (kontribusi_col, 'mean')
+    })
+    rank_table['Rank_Label'] = 'Cat ' + rank_table['Category'].astype(str)
+    if rank_by == 'Category x Periode':
+        rank_table['Rank_Label'] += ' · ' + rank_table['Period'].astype(str)
+    rank_table['Kontribusi'] = rank_table['Kontribusi'] * 100
+    top_tables = top_k_all(rank_table, ['Sales Amount', 'NOC', 'Kontribusi'], top_n)
+    
+    top_panels = [
+        ('Sales Amount', f'🥇 Top {top_n} Sales Amount', 'Sales Amount', format_short_rupiah),
+        ('NOC', f'🥇 Top {top_n} NOC', 'NOC', format_number),
+        ('Kontribusi', f'🥇 Top {top_n} Kontribusi', 'Kontribusi (%)', lambda v: f'{v:.2f}%')
+    ]
+    
+    top_figures = submit_cached_figures('promo_top_figures', data_file, __file__, figure_state + (rank_by, top_n), version=version, builders=[
+        partial(
+            create_top_chart, top_tables[metric]['Rank_Label'], top_tables[metric][metric],
+            [label_func(v) for v in top_tables[metric][metric]], title, y_title
+        )
+        for metric, title, y_title, label_func in top_panels
+    ])
+    for i, (col, fig_top) in enumerate(zip(st.columns(3), top_figures)):
+        with col:
+            render_chart(fig_top.result(), f'chart_top_{i}', events)
+    handle_drilldown(events, drilldown)
 
 # Main App
 def main():
@@ -197,11 +658,12 @@ def main():
     st.markdown('<h1 class="main-header">📊 Promo Performance Dashboard</h1>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Analisis Performa Promosi dan Kontribusi terhadap Net Sales</p>', unsafe_allow_html=True)
     
-    # Load data
+    # Load data (workbook yang dipilih di home page, default all_summary.xlsx)
+    data_file = st.session_state.get(DATA_FILE_STATE, DATA_FILE)
     try:
-        data = load_data('all_summary.xlsx')
+        data = load_data(data_file, file_hash(data_file))
     except FileNotFoundError:
-        st.error("⚠️ File 'all_summary.xlsx' tidak ditemukan. Pastikan file berada di direktori yang sama dengan app.py")
+        st.error(f"⚠️ File '{data_file}' tidak ditemukan. Pastikan file berada di direktori yang sama dengan app.py")
         st.stop()
     
     # Sidebar Filters
@@ -216,30 +678,29 @@ def main():
         
         dataset_option = st.radio(
             "📁 Pilih Dataset",
-            options=['Summary All', 'Summary Non Cigarette'],
+            options=list(DATASET_OPTIONS.keys()),
             index=0,
             help="Pilih antara data keseluruhan atau data tanpa rokok"
         )
         
         st.markdown("---")
         
+        dataset_key = DATASET_OPTIONS[dataset_option]
+        
+        # Grain dari kasar ke halus: Yearly, Quarterly, Monthly (+ Weekly, Daily jika data harian)
+        grain_options = list(data['rollups']['non_cig'].keys())[::-1]
         view_option = st.radio(
-            "📅 Pilih Tampilan",
-            options=['Yearly', 'Monthly'],
-            index=1,
-            help="Pilih tampilan data tahunan atau bulanan"
+            "📅 Pilih Granularity",
+            options=grain_options,
+            index=grain_options.index('Monthly') if 'Monthly' in grain_options else 0,
+            help="Yearly menampilkan total per kategori, grain lain menampilkan tren per periode"
         )
+        is_time_view = view_option != 'Yearly'
         
         st.markdown("---")
         
-        if dataset_option == 'Summary All':
-            df_year = data['all_year']
-            df_month = data['all_month']
-        else:
-            df_year = data['non_cig_year']
-            df_month = data['non_cig_month']
-        
-        current_df = df_month if view_option == 'Monthly' else df_year
+        current_df = load_rollup(data_file, file_hash(data_file), dataset_key, view_option)
+        rollup_index = load_rollup_index(data_file, file_hash(data_file), dataset_key, view_option)
         
         all_categories = sorted(current_df['Category'].unique())
         selected_categories = st.multiselect(
@@ -249,41 +710,54 @@ def main():
             help="Pilih kategori yang ingin ditampilkan"
         )
         
-        if view_option == 'Monthly':
+        all_periods = current_df['Period'].cat.categories.tolist()
+        selected_periods = all_periods
+        if len(all_periods) > 1:
             st.markdown("---")
-            all_months = current_df['Month'].cat.categories.tolist()
-            selected_months = st.multiselect(
-                "📆 Filter Bulan",
-                options=all_months,
-                default=all_months,
-                help="Pilih bulan yang ingin ditampilkan"
+            selected_periods = st.multiselect(
+                "📆 Filter Periode",
+                options=all_periods,
+                default=all_periods,
+                help="Pilih periode yang ingin ditampilkan"
             )
         
+        st.markdown("---")
+        compare_option = st.radio(
+            "🔁 Mode Perbandingan",
+            options=[NO_COMPARISON] + list(COMPARE_MODES.keys()),
+            index=0,
+            help="Bandingkan periode terpilih dengan periode sebelumnya atau periode yang sama tahun lalu",
+            key="compare_mode"
+        )
+        
         st.markdown("---")
         st.markdown("### 📌 Info")
         st.info(f"**Dataset:** {dataset_option}\n\n**View:** {view_option}\n\n**Categories:** {len(selected_categories)}")
+        
+        # Slot drill-down, diisi setelah KPI tampil (index Ended Promo tidak menahan first paint)
+        drill_slot = st.container()
     
-    # Filter data
-    if view_option == 'Monthly':
-        filtered_df = current_df[
-            (current_df['Category'].isin(selected_categories)) & 
-            (current_df['Month'].isin(selected_months))
-        ].copy()
-    else:
-        filtered_df = current_df[current_df['Category'].isin(selected_categories)].copy()
+    # Filter data: posisi baris dari bitmap index, agregasi berjalan pada posisi tersebut
+    # tanpa salinan rollup terfilter
+    rows = select_rows(rollup_index, selected_categories, selected_periods)
+    sources = source_periods(data, view_option, selected_periods)
     
-    if filtered_df.empty:
+    if not len(rows):
         st.warning("⚠️ Tidak ada data yang sesuai dengan filter. Silakan ubah filter Anda.")
         st.stop()
     
-    kontribusi_col = 'Kontribusi Promo pada Net Sales' if 'Kontribusi Promo pada Net Sales' in filtered_df.columns else 'Kontribusi Sales'
+    kontribusi_col = kontribusi_column(current_df)
     
     # Calculate KPIs
-    total_sales = filtered_df['Sales Amount'].sum()
-    total_noc = filtered_df['NOC'].sum()
-    total_qty_promo = filtered_df['Qty Promo'].sum()
-    avg_kontribusi = filtered_df[kontribusi_col].mean() * 100
-    total_net_sales = filtered_df['Net Sales (by Group Category)'].sum()
+    kpis = promo_kpis(data, current_df, rollup_index, rows, dataset_key, selected_categories, sources)
+    total_sales = kpis['total_sales']
+    total_noc = kpis['total_noc']
+    noc_label = '👥 Total NOC'
+    if kpis['noc_relative_error'] is not None:
+        noc_label = f'👥 Unique NOC (±{kpis["noc_relative_error"]*100:.1f}%)'
+    total_qty_promo = kpis['total_qty_promo']
+    avg_kontribusi = kpis['avg_kontribusi']
+    total_net_sales = kpis['total_net_sales']
     
     # KPI Cards
     st.markdown("### 📈 Key Performance Indicators")
@@ -302,7 +776,7 @@ def main():
         st.markdown(f"""
         <div class="metric-container">
             <div class="metric-value">{format_number(total_noc)}</div>
-            <div class="metric-label">👥 Total NOC</div>
+            <div class="metric-label">{noc_label}</div>
         </div>
         """, unsafe_allow_html=True)
     
@@ -332,255 +806,80 @@ def main():
     
     st.markdown("<br>", unsafe_allow_html=True)
     
-    # ==================== CHART 1: Sales Amount + Kontribusi ====================
-    st.markdown('<p class="section-title">📊 Sales Amount & Kontribusi Promo terhadap Net Sales</p>', unsafe_allow_html=True)
-    
-    if view_option == 'Monthly':
-        chart1_data = filtered_df.groupby('Month', observed=True).agg({
-            'Sales Amount': 'sum',
-            kontribusi_col: 'mean'
-        }).reset_index()
-        chart1_data['X_Label'] = chart1_data['Month'].astype(str).str.replace(' 2025', '')
-        x_title = 'Bulan'
-    else:
-        chart1_data = filtered_df.groupby('Category').agg({
-            'Sales Amount': 'sum',
-            kontribusi_col: 'mean'
-        }).reset_index()
-        chart1_data['X_Label'] = 'Cat ' + chart1_data['Category'].astype(str)
-        x_title = 'Category'
-    
-    chart1_data['Sales_Label'] = chart1_data['Sales Amount'].apply(format_short_rupiah)
-    chart1_data['Kontribusi_Pct'] = chart1_data[kontribusi_col] * 100
-    chart1_data['Kontribusi_Label'] = chart1_data['Kontribusi_Pct'].apply(lambda x: f'{x:.2f}%')
-    
-    fig1 = make_subplots(specs=[[{"secondary_y": True}]])
-    
-    fig1.add_trace(
-        go.Bar(
-            x=chart1_data['X_Label'],
-            y=chart1_data['Sales Amount'],
-            name='Sales Amount',
-            marker=dict(
-                color=chart1_data['Sales Amount'],
-                colorscale=[[0, '#00d4ff'], [0.5, '#7b2cbf'], [1, '#ff6b6b']],
-                line=dict(color='rgba(255,255,255,0.3)', width=1)
-            ),
-            text=chart1_data['Sales_Label'],
-            textposition='outside',
-            textfont=dict(color='#ffffff', size=12),
-            hovertemplate='<b>%{x}</b><br>Sales: Rp %{y:,.0f}<extra></extra>'
-        ),
-        secondary_y=False
-    )
-    
-    fig1.add_trace(
-        go.Scatter(
-            x=chart1_data['X_Label'],
-            y=chart1_data['Kontribusi_Pct'],
-            name='Kontribusi (%)',
-            mode='lines+markers+text',
-            line=dict(color='#fee440', width=4),
-            marker=dict(size=14, symbol='diamond', color='#fee440', 
-                       line=dict(color='#ffffff', width=2)),
-            text=chart1_data['Kontribusi_Label'],
-            textposition='top center',
-            textfont=dict(color='#fee440', size=12),
-            hovertemplate='<b>%{x}</b><br>Kontribusi: %{y:.2f}%<extra></extra>'
-        ),
-        secondary_y=True
-    )
+    # Index drill-down dari workbook Ended Promo yang dipilih di home page (opsional)
+    ended_file = st.session_state.get(ended_data.DATA_FILE_STATE, ended_data.DATA_FILE)
+    try:
+        drilldown = load_drilldown(ended_file, file_hash(ended_file))
+    except FileNotFoundError:
+        drilldown = {}
     
-    fig1.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#ffffff', family='Poppins'),
-        xaxis_title=x_title,
-        legend=dict(
-            orientation="h", 
-            yanchor="bottom", 
-            y=1.02, 
-            xanchor="center", 
-            x=0.5,
-            font=dict(color='#ffffff', size=12),
-            bgcolor='rgba(0,0,0,0.3)'
-        ),
-        hovermode='x unified',
-        height=500,
-        margin=dict(l=80, r=80, t=80, b=80),
-        bargap=0.3
+    # Drill-down tanpa klik chart (mis. dari heatmap)
+    drill_options = [c for c in selected_categories if c in drilldown]
+    if drill_options:
+        with drill_slot:
+            st.markdown("---")
+            st.markdown("### 🔎 Drill-down Ended Promo")
+            drill_category = st.selectbox(
+                "🏷️ Category",
+                options=drill_options,
+                format_func=lambda c: f"Category {c} ({len(drilldown[c]['sales']) + len(drilldown[c]['qty'])} promo berakhir)",
+                key="drill_category"
+            )
+            if st.button("📈 Lihat Promo Berakhir", use_container_width=True):
+                open_ended_promo(drilldown, drill_category)
+    
+    # Klik category di chart dikumpulkan, diproses setelah semua chart dirender
+    drill_events = []
+    
+    # ==================== Perbandingan Periode ====================
+    if compare_option != NO_COMPARISON:
+        comparison = load_comparison(data_file, file_hash(data_file), dataset_key, view_option, COMPARE_MODES[compare_option])
+        render_comparison(comparison, rollup_index, rows, selected_categories, selected_periods,
+                          compare_option, view_option, drill_events)
+        st.markdown("<br>", unsafe_allow_html=True)
+    
+    # ==================== Aggregasi untuk chart ====================
+    # Session dengan filter state yang sama berbagi satu komputasi agregasi (cold-start burst)
+    # Key cache = versi slice Category x periode yang dicakup filter: setelah workbook dipublish
+    # ulang, filter yang tidak menyentuh baris yang berubah tetap memakai agregat / figure lama
+    figure_state = (dataset_key, view_option, tuple(selected_categories), tuple(selected_periods))
+    state_version = data_version(data, view_option, selected_categories, sources)
+    (chart1_data, plot1_data, x_title, chart2_data, plot2_data, avg_conversion, pie_data, promo_data) = single_flight(
+        ('promo_charts', state_version, figure_state),
+        partial(aggregate_charts, current_df, rollup_index, rows, view_option, kontribusi_col)
     )
     
-    fig1.update_xaxes(
-        gridcolor='rgba(255,255,255,0.1)',
-        tickfont=dict(color='#ffffff', size=12),
-        title_font=dict(color='#ffffff', size=14)
-    )
-    fig1.update_yaxes(
-        title_text="Sales Amount (Rp)", 
-        secondary_y=False, 
-        gridcolor='rgba(255,255,255,0.1)',
-        tickfont=dict(color='#00d4ff', size=11),
-        title_font=dict(color='#00d4ff', size=13)
-    )
-    fig1.update_yaxes(
-        title_text="Kontribusi (%)", 
-        secondary_y=True, 
-        gridcolor='rgba(255,255,255,0.05)',
-        tickfont=dict(color='#fee440', size=11),
-        title_font=dict(color='#fee440', size=13)
-    )
+    digests = data['digests'][dataset_key]
+    digest_groups = [('Cat ' + str(c), [(c, m) for m in sources]) for c in selected_categories]
+    
+    # Figure independen dibangun paralel (atau diambil dari disk cache per filter state),
+    # ditampilkan sesuai urutan halaman
+    (fig1, fig2, fig_conversion, fig_basket, fig_kontribusi, fig3, fig4) = submit_cached_figures(
+        'promo_figures', data_file, __file__, figure_state, version=state_version, builders=[
+        partial(create_sales_chart, plot1_data, x_title),
+        partial(create_customer_chart, plot2_data, x_title),
+        partial(create_conversion_chart, plot2_data, avg_conversion, x_title),
+        partial(create_distribution_chart, digests['Basket Size'], digest_groups, 'Basket Size (Rp)', '#00d4ff'),
+        partial(create_distribution_chart, digests['Kontribusi Sales'], digest_groups, 'Kontribusi (%)', '#fee440', value_scale=100),
+        partial(create_sales_pie_chart, pie_data),
+        partial(create_promo_count_chart, promo_data),
+    ])
+    
+    category_events = None if is_time_view else drill_events
+    if drilldown:
+        st.caption("🔎 Klik category pada chart untuk membuka promo berakhirnya di Ended Promo")
     
-    st.plotly_chart(fig1, use_container_width=True)
+    # ==================== CHART 1: Sales Amount + Kontribusi ====================
+    st.markdown('<p class="section-title">📊 Sales Amount & Kontribusi Promo terhadap Net Sales</p>', unsafe_allow_html=True)
+    render_chart(fig1.result(), 'chart_sales', category_events)
     
     # ==================== CHART 2: NOC dan Visit Customer (SINGLE SCALE LINE CHART) ====================
     st.markdown('<p class="section-title">👥 Perbandingan NOC dan Visit Customer</p>', unsafe_allow_html=True)
-    
-    if view_option == 'Monthly':
-        chart2_data = filtered_df.groupby('Month', observed=True).agg({
-            'NOC': 'sum',
-            'Visit Customer': 'mean'
-        }).reset_index()
-        chart2_data['X_Label'] = chart2_data['Month'].astype(str).str.replace(' 2025', '')
-    else:
-        chart2_data = filtered_df.groupby('Category').agg({
-            'NOC': 'sum',
-            'Visit Customer': 'mean'
-        }).reset_index()
-        chart2_data['X_Label'] = 'Cat ' + chart2_data['Category'].astype(str)
-    
-    chart2_data['NOC_Label'] = chart2_data['NOC'].apply(format_number)
-    chart2_data['Visit_Label'] = chart2_data['Visit Customer'].apply(format_number)
-    chart2_data['Conversion_Rate'] = (chart2_data['NOC'] / chart2_data['Visit Customer'] * 100)
-    chart2_data['Conversion_Label'] = chart2_data['Conversion_Rate'].apply(lambda x: f'{x:.2f}%')
-    
-    # Single Line Chart dengan satu skala
-    fig2 = go.Figure()
-    
-    # Line NOC
-    fig2.add_trace(
-        go.Scatter(
-            x=chart2_data['X_Label'],
-            y=chart2_data['NOC'],
-            name='NOC',
-            mode='lines+markers+text',
-            line=dict(color='#00f5d4', width=4),
-            marker=dict(size=12, color='#00f5d4', symbol='circle',
-                       line=dict(color='#ffffff', width=2)),
-            text=chart2_data['NOC_Label'],
-            textposition='top center',
-            textfont=dict(color='#00f5d4', size=11),
-            hovertemplate='<b>%{x}</b><br>NOC: %{y:,.0f}<extra></extra>'
-        )
-    )
-    
-    # Line Visit Customer
-    fig2.add_trace(
-        go.Scatter(
-            x=chart2_data['X_Label'],
-            y=chart2_data['Visit Customer'],
-            name='Visit Customer',
-            mode='lines+markers+text',
-            line=dict(color='#f15bb5', width=4),
-            marker=dict(size=12, color='#f15bb5', symbol='diamond',
-                       line=dict(color='#ffffff', width=2)),
-            text=chart2_data['Visit_Label'],
-            textposition='top center',
-            textfont=dict(color='#f15bb5', size=11),
-            hovertemplate='<b>%{x}</b><br>Visit: %{y:,.0f}<extra></extra>'
-        )
-    )
-    
-    fig2.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#ffffff', family='Poppins'),
-        xaxis_title=x_title,
-        yaxis_title='Jumlah',
-        legend=dict(
-            orientation="h", 
-            yanchor="bottom", 
-            y=1.02, 
-            xanchor="center", 
-            x=0.5,
-            font=dict(color='#ffffff', size=12),
-            bgcolor='rgba(0,0,0,0.3)'
-        ),
-        hovermode='x unified',
-        height=450,
-        margin=dict(l=80, r=40, t=80, b=80)
-    )
-    
-    fig2.update_xaxes(
-        gridcolor='rgba(255,255,255,0.1)',
-        tickfont=dict(color='#ffffff', size=11),
-        title_font=dict(color='#ffffff', size=13)
-    )
-    fig2.update_yaxes(
-        gridcolor='rgba(255,255,255,0.1)',
-        tickfont=dict(color='#ffffff', size=11),
-        title_font=dict(color='#ffffff', size=13)
-    )
-    
-    st.plotly_chart(fig2, use_container_width=True)
+    render_chart(fig2.result(), 'chart_customer', category_events)
     
     # ==================== CHART 3: CONVERSION RATE (NOC / Visit Customer) ====================
     st.markdown('<p class="section-title">🎯 Conversion Rate (NOC / Visit Customer)</p>', unsafe_allow_html=True)
-    
-    fig_conversion = go.Figure()
-    
-    # Area chart untuk conversion rate
-    fig_conversion.add_trace(
-        go.Scatter(
-            x=chart2_data['X_Label'],
-            y=chart2_data['Conversion_Rate'],
-            name='Conversion Rate',
-            mode='lines+markers+text',
-            fill='tozeroy',
-            fillcolor='rgba(254, 228, 64, 0.2)',
-            line=dict(color='#fee440', width=4),
-            marker=dict(size=14, color='#fee440', line=dict(color='#ffffff', width=2)),
-            text=chart2_data['Conversion_Label'],
-            textposition='top center',
-            textfont=dict(color='#fee440', size=12, family='Poppins'),
-            hovertemplate='<b>%{x}</b><br>Conversion Rate: %{y:.2f}%<extra></extra>'
-        )
-    )
-    
-    # Add average line
-    avg_conversion = chart2_data['Conversion_Rate'].mean()
-    fig_conversion.add_hline(
-        y=avg_conversion, 
-        line_dash="dash", 
-        line_color="#ff6b6b",
-        annotation_text=f"Avg: {avg_conversion:.2f}%",
-        annotation_position="right",
-        annotation_font=dict(color='#ff6b6b', size=12)
-    )
-    
-    fig_conversion.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#ffffff', family='Poppins'),
-        xaxis_title=x_title,
-        yaxis_title='Conversion Rate (%)',
-        height=400,
-        margin=dict(l=80, r=80, t=40, b=80),
-        showlegend=False
-    )
-    
-    fig_conversion.update_xaxes(
-        gridcolor='rgba(255,255,255,0.1)',
-        tickfont=dict(color='#ffffff', size=12),
-        title_font=dict(color='#ffffff', size=14)
-    )
-    fig_conversion.update_yaxes(
-        gridcolor='rgba(255,255,255,0.1)',
-        tickfont=dict(color='#fee440', size=11),
-        title_font=dict(color='#fee440', size=13)
-    )
-    
-    st.plotly_chart(fig_conversion, use_container_width=True)
+    render_chart(fig_conversion.result(), 'chart_conversion', category_events)
     
     # Info box untuk Conversion Rate
     avg_conv = chart2_data['Conversion_Rate'].mean()
@@ -617,253 +916,58 @@ def main():
     
     st.markdown("<br>", unsafe_allow_html=True)
     
+    # ==================== Distribusi: Box Plot (P5 / P25 / P50 / P75 / P95) ====================
+    col_dist1, col_dist2 = st.columns(2)
+    
+    with col_dist1:
+        st.markdown('<p class="section-title">🛒 Distribusi Basket Size (Sales / NOC)</p>', unsafe_allow_html=True)
+        render_chart(fig_basket.result(), 'chart_basket', drill_events)
+    
+    with col_dist2:
+        st.markdown('<p class="section-title">📐 Distribusi Kontribusi Promo</p>', unsafe_allow_html=True)
+        render_chart(fig_kontribusi.result(), 'chart_kontribusi', drill_events)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
     # ==================== ROW: Pie + Bar Charts ====================
     col_left, col_right = st.columns(2)
     
     with col_left:
         st.markdown('<p class="section-title">🥧 Distribusi Sales Amount per Category</p>', unsafe_allow_html=True)
-        
-        pie_data = filtered_df.groupby('Category')['Sales Amount'].sum().reset_index()
-        pie_data['Category_Label'] = 'Category ' + pie_data['Category'].astype(str)
-        pie_data['Percentage'] = (pie_data['Sales Amount'] / pie_data['Sales Amount'].sum() * 100).round(2)
-        
-        fig3 = go.Figure(data=[go.Pie(
-            labels=pie_data['Category_Label'],
-            values=pie_data['Sales Amount'],
-            hole=0.5,
-            marker=dict(
-                colors=CATEGORY_COLORS_LIST[:len(pie_data)],
-                line=dict(color='#1a1a2e', width=3)
-            ),
-            textinfo='label+percent',
-            textfont=dict(color='#ffffff', size=11),
-            hovertemplate='<b>%{label}</b><br>Sales: Rp %{value:,.0f}<br>Persentase: %{percent}<extra></extra>',
-            pull=[0.02] * len(pie_data)
-        )])
-        
-        fig3.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#ffffff', family='Poppins'),
-            showlegend=True,
-            legend=dict(
-                orientation="h", 
-                yanchor="bottom", 
-                y=-0.15, 
-                xanchor="center", 
-                x=0.5,
-                font=dict(color='#ffffff', size=10)
-            ),
-            height=450,
-            margin=dict(l=20, r=20, t=20, b=80),
-            annotations=[dict(
-                text=f'<b>Total</b><br>{format_short_rupiah(pie_data["Sales Amount"].sum())}',
-                x=0.5, y=0.5,
-                font=dict(size=14, color='#ffffff', family='Poppins'),
-                showarrow=False
-            )]
-        )
-        
-        st.plotly_chart(fig3, use_container_width=True)
+        render_chart(fig3.result(), 'chart_pie', drill_events)
     
     with col_right:
         st.markdown('<p class="section-title">📦 Jumlah Promo per Category</p>', unsafe_allow_html=True)
-        
-        promo_data = filtered_df.groupby('Category')['Qty Promo'].sum().reset_index()
-        promo_data = promo_data.sort_values('Qty Promo', ascending=True)
-        promo_data['Category_Label'] = 'Category ' + promo_data['Category'].astype(str)
-        
-        fig4 = go.Figure(data=[go.Bar(
-            x=promo_data['Qty Promo'],
-            y=promo_data['Category_Label'],
-            orientation='h',
-            marker=dict(
-                color=promo_data['Qty Promo'],
-                colorscale=[[0, '#00d4ff'], [0.5, '#9b5de5'], [1, '#f15bb5']],
-                line=dict(color='rgba(255,255,255,0.3)', width=1)
-            ),
-            text=promo_data['Qty Promo'],
-            textposition='outside',
-            textfont=dict(color='#ffffff', size=12),
-            hovertemplate='<b>%{y}</b><br>Qty Promo: %{x}<extra></extra>'
-        )])
-        
-        fig4.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#ffffff', family='Poppins'),
-            xaxis_title='Jumlah Promo',
-            yaxis_title='',
-            height=450,
-            margin=dict(l=100, r=60, t=20, b=60)
-        )
-        
-        fig4.update_xaxes(gridcolor='rgba(255,255,255,0.1)', tickfont=dict(color='#ffffff'))
-        fig4.update_yaxes(tickfont=dict(color='#ffffff', size=12))
-        
-        st.plotly_chart(fig4, use_container_width=True)
-    
-    # ==================== CHART 5: Heatmap (Monthly only) ====================
-    if view_option == 'Monthly':
-        st.markdown('<p class="section-title">🗓️ Heatmap: Sales Amount per Category per Bulan</p>', unsafe_allow_html=True)
-        
-        heatmap_data = filtered_df.pivot_table(
-            values='Sales Amount',
-            index='Category',
-            columns='Month',
-            aggfunc='sum'
-        )
-        
-        month_order = [m for m in [
-            'January 2025', 'February 2025', 'March 2025', 'April 2025',
-            'May 2025', 'June 2025', 'July 2025', 'August 2025',
-            'September 2025', 'October 2025', 'November 2025', 'December 2025'
-        ] if m in heatmap_data.columns]
-        
-        heatmap_data = heatmap_data[month_order]
-        
-        short_months = [m.replace(' 2025', '').replace('January', 'Jan').replace('February', 'Feb')
-                       .replace('March', 'Mar').replace('April', 'Apr')
-                       .replace('June', 'Jun').replace('July', 'Jul').replace('August', 'Aug')
-                       .replace('September', 'Sep').replace('October', 'Oct').replace('November', 'Nov')
-                       .replace('December', 'Dec') for m in month_order]
-        
-        text_annotations = [[format_short_rupiah(val) if not pd.isna(val) else '' for val in row] for row in heatmap_data.values]
-        
-        fig5 = go.Figure(data=go.Heatmap(
-            z=heatmap_data.values,
-            x=short_months,
-            y=['Cat ' + str(c) for c in heatmap_data.index],
-            colorscale=[[0, '#1a1a2e'], [0.25, '#00d4ff'], [0.5, '#9b5de5'], [0.75, '#f15bb5'], [1, '#ff6b6b']],
-            text=text_annotations,
-            texttemplate='%{text}',
-            textfont=dict(color='#ffffff', size=10),
-            hovertemplate='Category: %{y}<br>Bulan: %{x}<br>Sales: Rp %{z:,.0f}<extra></extra>',
-            colorbar=dict(
-                title=dict(text='Sales', font=dict(color='#ffffff')),
-                tickfont=dict(color='#ffffff')
-            )
-        ))
-        
-        fig5.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#ffffff', family='Poppins'),
-            xaxis_title='Bulan',
-            yaxis_title='Category',
-            height=400,
-            margin=dict(l=80, r=20, t=20, b=80)
-        )
-        
-        fig5.update_xaxes(tickfont=dict(color='#ffffff', size=11), side='bottom')
-        fig5.update_yaxes(tickfont=dict(color='#ffffff', size=12))
-        
-        st.plotly_chart(fig5, use_container_width=True)
-    
-    # ==================== CHART 6: Top Performers ====================
-    st.markdown('<p class="section-title">🏆 Top Category Performance</p>', unsafe_allow_html=True)
+        render_chart(fig4.result(), 'chart_promo_count', drill_events)
     
-    col_a, col_b, col_c = st.columns(3)
+    # ==================== Section di bawah fold ====================
+    # Heatmap dan Top Performers baru dihitung saat dibuka; buka / zoom / ganti ranking hanya
+    # menjalankan ulang fragment section tersebut, bukan seluruh page
+    if is_time_view:
+        render_heatmap(state_version, dataset_key, view_option, selected_categories, selected_periods,
+                       current_df, rollup_index, rows, drilldown)
+    render_top_performers(data_file, figure_state, state_version, current_df, rollup_index, rows,
+                          view_option, kontribusi_col, drilldown)
     
-    with col_a:
-        top_sales = filtered_df.groupby('Category')['Sales Amount'].sum().sort_values(ascending=False).head(3).reset_index()
-        top_sales['Category_Label'] = 'Cat ' + top_sales['Category'].astype(str)
-        
-        fig6a = go.Figure(data=[go.Bar(
-            x=top_sales['Category_Label'],
-            y=top_sales['Sales Amount'],
-            marker=dict(color=['#ffd700', '#c0c0c0', '#cd7f32']),
-            text=[format_short_rupiah(v) for v in top_sales['Sales Amount']],
-            textposition='outside',
-            textfont=dict(color='#ffffff', size=12)
-        )])
-        
-        fig6a.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#ffffff', family='Poppins'),
-            title=dict(text='🥇 Top 3 Sales Amount', font=dict(size=14, color='#ffffff')),
-            height=350,
-            margin=dict(l=40, r=40, t=60, b=40),
-            yaxis_title='Sales Amount'
-        )
-        fig6a.update_xaxes(tickfont=dict(color='#ffffff'))
-        fig6a.update_yaxes(gridcolor='rgba(255,255,255,0.1)', tickfont=dict(color='#ffffff'))
-        
-        st.plotly_chart(fig6a, use_container_width=True)
-    
-    with col_b:
-        top_noc = filtered_df.groupby('Category')['NOC'].sum().sort_values(ascending=False).head(3).reset_index()
-        top_noc['Category_Label'] = 'Cat ' + top_noc['Category'].astype(str)
-        
-        fig6b = go.Figure(data=[go.Bar(
-            x=top_noc['Category_Label'],
-            y=top_noc['NOC'],
-            marker=dict(color=['#ffd700', '#c0c0c0', '#cd7f32']),
-            text=[format_number(v) for v in top_noc['NOC']],
-            textposition='outside',
-            textfont=dict(color='#ffffff', size=12)
-        )])
-        
-        fig6b.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#ffffff', family='Poppins'),
-            title=dict(text='🥇 Top 3 NOC', font=dict(size=14, color='#ffffff')),
-            height=350,
-            margin=dict(l=40, r=40, t=60, b=40),
-            yaxis_title='NOC'
-        )
-        fig6b.update_xaxes(tickfont=dict(color='#ffffff'))
-        fig6b.update_yaxes(gridcolor='rgba(255,255,255,0.1)', tickfont=dict(color='#ffffff'))
-        
-        st.plotly_chart(fig6b, use_container_width=True)
-    
-    with col_c:
-        top_kontribusi = filtered_df.groupby('Category')[kontribusi_col].mean().sort_values(ascending=False).head(3).reset_index()
-        top_kontribusi['Category_Label'] = 'Cat ' + top_kontribusi['Category'].astype(str)
-        top_kontribusi['Kontribusi_Pct'] = top_kontribusi[kontribusi_col] * 100
-        
-        fig6c = go.Figure(data=[go.Bar(
-            x=top_kontribusi['Category_Label'],
-            y=top_kontribusi['Kontribusi_Pct'],
-            marker=dict(color=['#ffd700', '#c0c0c0', '#cd7f32']),
-            text=[f'{v:.2f}%' for v in top_kontribusi['Kontribusi_Pct']],
-            textposition='outside',
-            textfont=dict(color='#ffffff', size=12)
-        )])
-        
-        fig6c.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#ffffff', family='Poppins'),
-            title=dict(text='🥇 Top 3 Kontribusi', font=dict(size=14, color='#ffffff')),
-            height=350,
-            margin=dict(l=40, r=40, t=60, b=40),
-            yaxis_title='Kontribusi (%)'
-        )
-        fig6c.update_xaxes(tickfont=dict(color='#ffffff'))
-        fig6c.update_yaxes(gridcolor='rgba(255,255,255,0.1)', tickfont=dict(color='#ffffff'))
-        
-        st.plotly_chart(fig6c, use_container_width=True)
+    handle_drilldown(drill_events, drilldown)
     
     # ==================== Data Table ====================
     st.markdown('<p class="section-title">📋 Data Table</p>', unsafe_allow_html=True)
     
     with st.expander("🔍 Lihat Detail Data", expanded=False):
-        display_df = filtered_df.copy()
-        display_df['Sales Amount (Formatted)'] = display_df['Sales Amount'].apply(format_rupiah)
-        display_df['NOC (Formatted)'] = display_df['NOC'].apply(format_number)
-        display_df['Kontribusi (%)'] = (display_df[kontribusi_col] * 100).round(2).astype(str) + '%'
-        
-        st.dataframe(display_df, use_container_width=True, height=400)
-        
-        csv = filtered_df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="📥 Download Data (CSV)",
-            data=csv,
-            file_name=f"promo_data_{dataset_option.lower().replace(' ', '_')}_{view_option.lower()}.csv",
-            mime="text/csv"
+        render_table(current_df, key='table_promo', rows=rows, formats={
+            'Qty Promo': 'number', 'NOC': 'number', 'Visit Customer': 'number',
+            'Sales Amount': 'rupiah', 'Net Sales (by Group Category)': 'rupiah',
+            kontribusi_col: 'percent'
+        })
+        
+        # File export dibuat hanya saat diminta, di-cache per filter state
+        export_state = (os.path.getmtime(data_file), dataset_key, view_option,
+                        tuple(selected_categories), tuple(selected_periods))
+        render_export(
+            partial(current_df.take, rows),
+            f"promo_data_{dataset_option.lower().replace(' ', '_')}_{view_option.lower()}",
+            export_state, key='export_promo'
         )
     
     # Footer
@@ -1,8 +1,26 @@
+import os
+from functools import partial
+
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
 import numpy as np
 
+from utils.charts import (
+    BAR_OUTLINE, DELTA_DOWN, DELTA_UP, GRID_COLOR, WHITE, axis, bar_colors, create_comparison_chart,
+    create_distribution_chart, format_change, make_figure
+)
+from utils.comparison import COMPARE_MODES, summarize
+from utils.diskcache import file_hash, submit_cached_figures
+from utils.downsample import scatter_type
+from utils import ended_data
+from utils.ended_data import (
+    COMPARISON_MEASURES, COMPARISON_RATIOS, COMPARISON_SHARED, DATA_FILE, DATA_FILE_STATE, DRILLDOWN_STATE, VIEW_DIMS,
+    active_promos, aggregate_view, category_overlap, promo_options, select_view, timeline_summary, view_rows
+)
+from utils.export import render_export
+from utils.registry import get_registry
+from utils.singleflight import single_flight
+from utils.tables import render_table
+
 # Page Configuration
 st.set_page_config(
     page_title="Ended Promo Dashboard",
@@ -123,69 +141,43 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load Data Function
-@st.cache_data
-def load_data(file_path):
-    xlsx = pd.ExcelFile(file_path)
-    
-    # Load raw data
-    df_sales_raw = pd.read_excel(xlsx, sheet_name='Sales', header=None)
-    df_qty_raw = pd.read_excel(xlsx, sheet_name='Qty', header=None)
-    
-    # Extract Summary by Promo (Sales) - rows 6-22
-    df_sales_promo = df_sales_raw.iloc[6:22, :11].copy()
-    df_sales_promo.columns = ['Category', 'Promo Name', 'End of Period Promotion', 'Total Count',
-                              'Total Claim', 'NOC', 'Conversion Rate (Count/NOC)',
-                              'Conversion Rate (Claim/Count)', 'Sales Amount',
-                              'Net Sales (by Category)', 'Contribution Sales']
-    df_sales_promo = df_sales_promo.iloc[1:].reset_index(drop=True)
-    
-    # Extract Summary by Category (Sales) - rows 26-33
-    df_sales_cat = df_sales_raw.iloc[26:33, :10].copy()
-    df_sales_cat.columns = ['Category', 'End of Period Promotion', 'Total Count', 'Total Claim',
-                            'NOC', 'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)',
-                            'Sales Amount', 'Net Sales (by Category)', 'Contribution Sales']
-    df_sales_cat = df_sales_cat.iloc[1:].reset_index(drop=True)
-    
-    # Convert numeric columns - Sales Promo
-    numeric_cols_promo = ['Category', 'Total Count', 'Total Claim', 'NOC',
-                          'Conversion Rate (Count/NOC)', 'Conversion Rate (Claim/Count)',
-                          'Sales Amount', 'Net Sales (by Category)', 'Contribution Sales']
-    for col in numeric_cols_promo:
-        df_sales_promo[col] = pd.to_numeric(df_sales_promo[col], errors='coerce')
-    
-    # Convert numeric columns - Sales Category
-    numeric_cols_cat = ['Category', 'Total Count', 'Total Claim', 'NOC',
-                        'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)',
-                        'Sales Amount', 'Net Sales (by Category)', 'Contribution Sales']
-    for col in numeric_cols_cat:
-        df_sales_cat[col] = pd.to_numeric(df_sales_cat[col], errors='coerce')
-    
-    # Extract Summary by Promo (Qty) - rows 6-16
-    df_qty_promo = df_qty_raw.iloc[6:16, :8].copy()
-    df_qty_promo.columns = ['Category', 'Promo Name', 'End of Period Promotion', 'Total Count',
-                            'Total Claim', 'NOC', 'Conversion Rate (Claim/Count)',
-                            'Conversion Rate (Count/NOC)']
-    df_qty_promo = df_qty_promo.iloc[1:].reset_index(drop=True)
-    
-    # Extract Summary by Category (Qty) - rows 20-25
-    df_qty_cat = df_qty_raw.iloc[20:25, :7].copy()
-    df_qty_cat.columns = ['Category', 'End of Period Promotion', 'Total Count', 'Total Claim',
-                          'NOC', 'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)']
-    df_qty_cat = df_qty_cat.iloc[1:].reset_index(drop=True)
-    
-    # Convert numeric columns - Qty
-    numeric_cols_qty_promo = ['Category', 'Total Count', 'Total Claim', 'NOC',
-                              'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)']
-    for col in numeric_cols_qty_promo:
-        df_qty_promo[col] = pd.to_numeric(df_qty_promo[col], errors='coerce')
-        
-    numeric_cols_qty_cat = ['Category', 'Total Count', 'Total Claim', 'NOC',
-                            'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)']
-    for col in numeric_cols_qty_cat:
-        df_qty_cat[col] = pd.to_numeric(df_qty_cat[col], errors='coerce')
-    
-    return df_sales_promo, df_sales_cat, df_qty_promo, df_qty_cat
+# Format tampilan Data Table (kolom yang tidak ada di tab aktif diabaikan)
+TABLE_FORMATS = {
+    'Total Count': 'number', 'Total Claim': 'number', 'NOC': 'number',
+    'Conversion Rate (Count/NOC)': 'percent_detail', 'Conversion Rate (Claim/Count)': 'percent',
+    'Sales Amount': 'rupiah', 'Net Sales (by Category)': 'rupiah', 'Contribution Sales': 'percent_detail'
+}
+
+# Lapisan cache in-process di atas disk cache (utils.ended_data); file_version = hash file
+# agar workbook yang dipublish ulang langsung terbaca tanpa restart
+@st.cache_data(max_entries=4)
+def load_data(file_path, file_version):
+    return ended_data.load_data(file_path)
+
+# Bitmap index read-only dibagi antar session tanpa salinan per rerun
+@st.cache_resource(max_entries=4)
+def load_indexes(file_path, file_version):
+    return ended_data.load_indexes(file_path)
+
+# Index drill-down category -> promo (dibagi dengan Promo Dashboard)
+@st.cache_resource(max_entries=4)
+def load_drilldown(file_path, file_version):
+    return ended_data.load_drilldown(file_path)
+
+# Timeline + interval index lintas workbook arsip; versions = hash tiap file
+@st.cache_resource(max_entries=4)
+def load_timeline(paths, versions):
+    return ended_data.build_timeline(list(paths))
+
+# Tabel delta antar bulan lintas workbook arsip per mode perbandingan; versions = hash tiap file
+@st.cache_resource(max_entries=8)
+def load_comparison(paths, versions, mode):
+    return ended_data.build_comparison(list(paths), mode)
+
+def archived_workbooks(data_file):
+    # Workbook Ended Promo yang ter-index di registry (arsip per bulan) + workbook yang dibuka
+    paths = {entry['path'] for entry in get_registry().entries() if entry['kind'] == 'ended_promo' and not entry['error']}
+    return sorted(paths | {data_file})
 
 # Format functions
 def format_rupiah(value):
@@ -205,22 +197,11 @@ def format_number(value):
     return f"{value:,.0f}"
 
 # Create horizontal bar chart
+# df = output conversion_metrics: x_col (termasuk ratio) sudah final, tidak diagregasi lagi
 def create_bar_chart(df, x_col, y_col, title, x_label, color_scale, label_format='value', show_detail=False, detail_cols=None):
     df_sorted = df.sort_values(x_col, ascending=True).reset_index(drop=True)
-    
-    # Prepare colors
-    values = df_sorted[x_col].values
-    if color_scale == 'Blues':
-        colors = [f'rgba({int(65 + 150*(1-i/len(values)))}, {int(105 + 100*(1-i/len(values)))}, {int(225)}, 0.9)' for i in range(len(values))]
-    elif color_scale == 'Greens':
-        colors = [f'rgba({int(50)}, {int(150 + 80*(1-i/len(values)))}, {int(80 + 80*(1-i/len(values)))}, 0.9)' for i in range(len(values))]
-    elif color_scale == 'Reds':
-        normalized = values / max(values) if max(values) > 0 else values
-        colors = [f'rgba({int(255)}, {int(100 + 100*(1-n))}, {int(100*(1-n))}, 0.9)' for n in normalized]
-    elif color_scale == 'Oranges':
-        colors = [f'rgba({int(255)}, {int(180 - 80*i/len(values))}, {int(50)}, 0.9)' for i in range(len(values))]
-    else:
-        colors = [f'rgba(0, 212, 255, 0.8)'] * len(values)
+    values = df_sorted[x_col].to_numpy()
+    colors = bar_colors(values, color_scale)
     
     # Format labels
     if label_format == 'billion':
@@ -234,35 +215,163 @@ def create_bar_chart(df, x_col, y_col, title, x_label, color_scale, label_format
     else:
         text_labels = [f'{v:,.0f}' for v in values]
     
-    fig = go.Figure(data=[go.Bar(
-        x=values,
-        y=df_sorted[y_col],
-        orientation='h',
-        marker=dict(
-            color=colors[::-1],
-            line=dict(color='rgba(255,255,255,0.3)', width=1)
-        ),
-        text=text_labels,
-        textposition='outside',
-        textfont=dict(color='#ffffff', size=11, family='Poppins'),
-        hovertemplate='<b>%{y}</b><br>' + x_label + ': %{x:,.2f}<extra></extra>'
-    )])
-    
-    fig.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#ffffff', family='Poppins'),
-        title=dict(text=title, font=dict(size=16, color='#ffffff'), x=0.5),
-        xaxis_title=x_label,
-        yaxis_title='',
-        height=max(350, len(df_sorted) * 45),
-        margin=dict(l=250, r=120, t=60, b=60)
-    )
-    
-    fig.update_xaxes(gridcolor='rgba(255,255,255,0.1)', tickfont=dict(color='#ffffff', size=10))
-    fig.update_yaxes(tickfont=dict(color='#ffffff', size=10))
-    
-    return fig
+    return make_figure([{
+        'type': 'bar',
+        'x': values,
+        'y': df_sorted[y_col],
+        'orientation': 'h',
+        'marker': {'color': colors[::-1], 'line': BAR_OUTLINE},
+        'text': text_labels,
+        'textposition': 'outside',
+        'textfont': {'color': WHITE, 'size': 11, 'family': 'Poppins'},
+        'hovertemplate': '<b>%{y}</b><br>' + x_label + ': %{x:,.2f}<extra></extra>'
+    }], {
+        'title': {'text': title, 'font': {'size': 16, 'color': WHITE}, 'x': 0.5},
+        'xaxis': axis(x_label, tick_size=10, gridcolor=GRID_COLOR),
+        'yaxis': axis('', tick_size=10),
+        'height': max(350, len(df_sorted) * 45),
+        'margin': {'l': 250, 'r': 120, 't': 60, 'b': 60}
+    })
+
+GANTT_COLORS = ['#00d4ff', '#9b5de5', '#f15bb5', '#00f5d4', '#fee440', '#ff6b6b', '#00bbf9']
+MAX_GANTT_LABELS = 60    # di atas ini nama promo hanya tampil di hover
+
+# Gantt promo aktif: satu trace garis per category, segmen promo dipisah None (WebGL untuk ribuan promo)
+def create_gantt_chart(active):
+    active = active.sort_values(['Category', 'Active Start', 'Promo Name'], kind='stable')
+    lanes = active['Promo Name'].str.slice(0, 35) + ' · ' + active['Table']
+    lane_order = list(dict.fromkeys(lanes))
+    show_labels = len(lane_order) <= MAX_GANTT_LABELS
+    
+    traces = []
+    for i, (category, group) in enumerate(active.groupby('Category', sort=True)):
+        n = len(group)
+        x = np.empty(n * 3, dtype=object)
+        x[0::3] = group['Active Start'].to_numpy()
+        x[1::3] = (group['Active End'] + np.timedelta64(1, 'D')).to_numpy()
+        y = np.empty(n * 3, dtype=object)
+        y[0::3] = y[1::3] = lanes.loc[group.index].to_numpy()
+        text = np.empty(n * 3, dtype=object)
+        text[0::3] = text[1::3] = (
+            group['Promo Name'] + ' (' + group['Table'] + ')<br>' + group['Start'].dt.strftime('%d %b %Y')
+            + ' – ' + group['End'].dt.strftime('%d %b %Y')
+        ).to_numpy()
+        color = GANTT_COLORS[i % len(GANTT_COLORS)]
+        traces.append({
+            'type': scatter_type(n * 2),
+            'mode': 'lines',
+            'x': x,
+            'y': y,
+            'text': text,
+            'name': f'Category {int(category)}',
+            'line': {'color': color, 'width': 12 if show_labels else 3},
+            'hovertemplate': '%{text}<extra>Category ' + str(int(category)) + '</extra>'
+        })
+    
+    return make_figure(traces, {
+        'xaxis': axis('Tanggal', tick_size=10, gridcolor=GRID_COLOR, type='date'),
+        'yaxis': axis('', tick_size=10, categoryorder='array', categoryarray=lane_order[::-1],
+                      showticklabels=show_labels),
+        'legend': {'orientation': 'h', 'y': 1.02, 'x': 0, 'font': {'color': WHITE}},
+        'height': max(350, min(len(lane_order), MAX_GANTT_LABELS) * 26 + 120),
+        'margin': {'l': 250 if show_labels else 40, 'r': 40, 't': 40, 'b': 60}
+    })
+
+# Box plot conversion rate per category dari digest per promo
+def conversion_distribution_builders(promo_digests, df_promo, indexes, table, categories, promo_names):
+    df_selected = df_promo.iloc[select_view(indexes, table, 'Per Promo', categories, promo_names)]
+    groups = [
+        (f'Category {int(cat)}', list(zip(group['Category'], group['Promo Name'])))
+        for cat, group in df_selected.groupby('Category')
+    ]
+    return [
+        partial(create_distribution_chart, promo_digests['Conversion Rate (Claim/Count)'], groups,
+                'Claim/Count (%)', '#ff6b6b', value_scale=100),
+        partial(create_distribution_chart, promo_digests['Conversion Rate (Count/NOC)'], groups,
+                'Count/NOC (%)', '#f59e0b', value_scale=100)
+    ]
+
+# ==================== Perbandingan antar bulan ====================
+# Baris tabel delta (key x bulan) dipilih lewat bitmap index; nilai bulan pembanding sudah
+# tersedia per baris, total dihitung dari kolom current + pembanding dalam satu agregasi
+
+COMPARISON_TABLE_FORMATS = {
+    **{col + suffix: 'number' for col in ['Total Count', 'Total Claim', 'NOC'] for suffix in ['', ' (Pembanding)']},
+    'Sales Amount': 'rupiah', 'Sales Amount (Pembanding)': 'rupiah',
+    **{col + suffix: 'percent' for col in COMPARISON_RATIOS for suffix in ['', ' (Pembanding)']},
+    **{col + ' Δ%': 'percent' for col in COMPARISON_MEASURES['sales'] + list(COMPARISON_RATIOS)}
+}
+
+def render_comparison(comparisons, table, view_option, categories, promos):
+    comparison, index = comparisons[(table, view_option)]
+    months = index.values['Period'].tolist()
+    if not months:
+        st.warning("⚠️ Tidak ada promo dengan periode yang valid.")
+        return
+    month = st.selectbox("📆 Bulan Berakhir", options=months, index=len(months) - 1, key=f"compare_month_{table}")
+    
+    filters = {'Category': categories, 'Period': [month]}
+    if view_option == 'Per Promo':
+        filters['Promo Name'] = promos
+    rows = index.select(filters)
+    measures = COMPARISON_MEASURES[table]
+    total = summarize(comparison, index, rows, [], measures, COMPARISON_RATIOS, shared_cols=COMPARISON_SHARED)
+    total = {col: values.iloc[0] for col, values in total.items()}
+    previous_labels = comparison['Periode Pembanding'].take(rows).dropna().unique()
+    if not len(previous_labels):
+        st.info(f"ℹ️ Tidak ada data pembanding untuk {month}. Periode pembanding diambil dari workbook "
+                "Ended Promo bulan lain yang ter-index di registry.")
+        return
+    previous_text = ', '.join(map(str, previous_labels))
+    st.caption(f"{month} vs {previous_text} · nilai pembanding hanya dari "
+               f"{'promo' if view_option == 'Per Promo' else 'category'} yang juga ada di {previous_text}")
+    
+    cards = [
+        (f"{total['Total Count']:,.0f}", total['Total Count Δ%'], '🎯 Total Count'),
+        (f"{total['Total Claim']:,.0f}", total['Total Claim Δ%'], '🧾 Total Claim'),
+        (f"{total['Conversion Rate (Claim/Count)']*100:.2f}%", total['Conversion Rate (Claim/Count) Δ%'], '📊 Claim/Count'),
+        (f"{total['Conversion Rate (Count/NOC)']*100:.4f}%", total['Conversion Rate (Count/NOC) Δ%'], '👥 Count/NOC')
+    ]
+    if 'Sales Amount' in measures:
+        cards.insert(0, (format_rupiah(total['Sales Amount']), total['Sales Amount Δ%'], '💰 Total Sales'))
+    for col, (value, pct, label) in zip(st.columns(len(cards)), cards):
+        with col:
+            st.markdown(f"""
+            <div class="metric-container">
+                <div class="metric-value" style="font-size: 1.5rem;">{value}</div>
+                <div class="metric-label">{label}</div>
+                <div class="metric-label" style="color: {DELTA_DOWN if pct < 0 else DELTA_UP};">{format_change(pct)}</div>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    measure, value_title = ('Sales Amount', 'Sales Amount (Rp)') if 'Sales Amount' in measures else ('Total Claim', 'Total Claim')
+    selected = comparison.iloc[rows]
+    if view_option == 'Per Promo':
+        labels = selected['Promo Name'].astype(str).str.slice(0, 35)
+    else:
+        labels = 'Category ' + selected['Category'].astype(int).astype(str)
+    st.markdown(f'<p class="section-title">🔁 {measure} (by {view_option.replace("Per ", "")})</p>', unsafe_allow_html=True)
+    st.plotly_chart(create_comparison_chart(
+        labels, selected[measure], selected[measure + ' (Pembanding)'], selected[measure + ' Δ%'], value_title,
+        orientation='h'
+    ), use_container_width=True)
+    
+    with st.expander("🔍 Lihat Tabel Perbandingan", expanded=False):
+        columns = VIEW_DIMS[view_option][:-1] + ['Period', 'Periode Pembanding'] + [
+            col + suffix for col in measures + list(COMPARISON_RATIOS) for suffix in ['', ' (Pembanding)', ' Δ%']
+        ]
+        render_table(comparison, key=f'table_compare_{table}', rows=rows, height=300,
+                     formats=COMPARISON_TABLE_FORMATS, columns=columns)
+
+def render_conversion_distribution(fig_claim, fig_noc):
+    st.markdown('<p class="section-title">📦 Distribusi Conversion Rate per Category</p>', unsafe_allow_html=True)
+    col_left, col_right = st.columns(2)
+    with col_left:
+        st.plotly_chart(fig_claim.result(), use_container_width=True)
+    with col_right:
+        st.plotly_chart(fig_noc.result(), use_container_width=True)
 
 # Main App
 def main():
@@ -270,13 +379,26 @@ def main():
     st.markdown('<h1 class="main-header">📈 Ended Promo Dashboard</h1>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Summary Promo yang Berakhir - January 2026</p>', unsafe_allow_html=True)
     
-    # Load data
+    # Load data (workbook yang dipilih di home page)
+    data_file = st.session_state.get(DATA_FILE_STATE, DATA_FILE)
     try:
-        df_sales_promo, df_sales_cat, df_qty_promo, df_qty_cat = load_data('Final_Summary_Ended_Promo_Jan_2026_Last.xlsx')
+        frames = load_data(data_file, file_hash(data_file))
+        indexes = load_indexes(data_file, file_hash(data_file))
+        df_sales_promo, df_sales_cat, df_qty_promo, df_qty_cat, digests = frames
     except FileNotFoundError:
-        st.error("⚠️ File 'Final_Summary_Ended_Promo_Jan_2026_Last.xlsx' tidak ditemukan.")
+        st.error(f"⚠️ File '{data_file}' tidak ditemukan.")
         st.stop()
     
+    # Drill-down dari Promo Dashboard: filter sidebar sudah diisi dari index (drilldown_filters)
+    drill_category = st.session_state.pop(DRILLDOWN_STATE, None)
+    if drill_category is not None:
+        drill = load_drilldown(data_file, file_hash(data_file)).get(drill_category, {'sales': {}, 'qty': {}})
+        periods = dict.fromkeys(p for promos in drill.values() for ends in promos.values() for p in ends)
+        st.info(f"🔎 Drill-down dari Promo Dashboard: **Category {drill_category}** — "
+                f"{len(drill['sales'])} promo Sales, {len(drill['qty'])} promo Qty"
+                + (f" (berakhir {', '.join(periods)})" if periods else "")
+                + ". Ubah filter di sidebar untuk melihat category lain.")
+    
     # Sidebar
     with st.sidebar:
         # Tombol kembali ke Home
@@ -290,7 +412,8 @@ def main():
             "📊 Pilih Tampilan",
             options=['Per Promo', 'Per Category'],
             index=0,
-            help="Pilih tampilan per promo atau per kategori"
+            help="Pilih tampilan per promo atau per kategori",
+            key="ended_view"
         )
         
         st.markdown("---")
@@ -307,8 +430,7 @@ def main():
             )
             
             # Filter Promo Name (Sales) - berdasarkan category yang dipilih
-            filtered_promo_sales = df_sales_promo[df_sales_promo['Category'].isin(selected_cat_sales)]
-            all_promo_sales = sorted(filtered_promo_sales['Promo Name'].dropna().unique())
+            all_promo_sales = promo_options(indexes, 'sales', selected_cat_sales)
             selected_promo_sales = st.multiselect(
                 "📝 Filter Nama Promo (Sales)",
                 options=all_promo_sales,
@@ -328,8 +450,7 @@ def main():
             )
             
             # Filter Promo Name (Qty) - berdasarkan category yang dipilih
-            filtered_promo_qty = df_qty_promo[df_qty_promo['Category'].isin(selected_cat_qty)]
-            all_promo_qty = sorted(filtered_promo_qty['Promo Name'].dropna().unique())
+            all_promo_qty = promo_options(indexes, 'qty', selected_cat_qty)
             selected_promo_qty = st.multiselect(
                 "📝 Filter Nama Promo (Qty)",
                 options=all_promo_qty,
@@ -356,35 +477,76 @@ def main():
             )
             
             # Placeholder untuk konsistensi
-            selected_promo_sales = None
-            selected_promo_qty = None
+            selected_promo_sales = all_promo_sales = None
+            selected_promo_qty = all_promo_qty = None
             
         st.markdown("---")
         st.markdown("### 📌 Info")
         st.info(f"**View:** {view_option}")
     
-    # Filter data based on selection
-    if view_option == 'Per Promo':
-        df_sales = df_sales_promo[
-            (df_sales_promo['Category'].isin(selected_cat_sales)) &
-            (df_sales_promo['Promo Name'].isin(selected_promo_sales))
-        ].copy()
-        df_sales['Label'] = df_sales['Promo Name'].apply(lambda x: x[:35] + '...' if len(str(x)) > 35 else x)
-        
-        df_qty = df_qty_promo[
-            (df_qty_promo['Category'].isin(selected_cat_qty)) &
-            (df_qty_promo['Promo Name'].isin(selected_promo_qty))
-        ].copy()
-        df_qty['Label'] = df_qty['Promo Name'].apply(lambda x: x[:35] + '...' if len(str(x)) > 35 else x)
-    else:
-        df_sales = df_sales_cat[df_sales_cat['Category'].isin(selected_cat_sales)].copy()
-        df_sales['Label'] = 'Category ' + df_sales['Category'].astype(int).astype(str)
-        
-        df_qty = df_qty_cat[df_qty_cat['Category'].isin(selected_cat_qty)].copy()
-        df_qty['Label'] = 'Category ' + df_qty['Category'].astype(int).astype(str)
+    # Filter data based on selection (posisi baris dari bitmap index)
+    sales_rows, dims = view_rows(frames, indexes, 'sales', view_option, selected_cat_sales, selected_promo_sales)
+    qty_rows, _ = view_rows(frames, indexes, 'qty', view_option, selected_cat_qty, selected_promo_qty)
+    
+    # Semua conversion rate dihitung ulang sum / sum per view (dan total untuk KPI); session
+    # dengan filter state yang sama berbagi satu komputasi (cold-start burst)
+    sales_state = (view_option, tuple(selected_cat_sales), tuple(selected_promo_sales or ()))
+    qty_state = (view_option, tuple(selected_cat_qty), tuple(selected_promo_qty or ()))
+    df_sales, df_qty, sales_total, qty_total = single_flight(
+        ('ended_view', file_hash(data_file), sales_state, qty_state),
+        partial(aggregate_view, sales_rows, qty_rows, dims, view_option)
+    )
+    
+    # Figure kedua tab dibangun paralel (tab selalu dirender) atau diambil dari disk cache,
+    # ditampilkan sesuai urutan
+    if not df_sales.empty:
+        fig1, fig2, fig3, fig4, fig_sales_claim, fig_sales_noc = submit_cached_figures('ended_sales_figures', data_file, __file__, sales_state, [
+            partial(
+                create_bar_chart, df_sales, 'Sales Amount', 'Label',
+                '', 'Sales Amount (Billion Rp)',
+                'Blues', label_format='billion'
+            ),
+            partial(
+                create_bar_chart, df_sales, 'Contribution Sales', 'Label',
+                '', 'Contribution Sales (%)',
+                'Greens', label_format='percent'
+            ),
+            partial(
+                create_bar_chart, df_sales, 'Conversion Rate (Claim/Count)', 'Label',
+                '', 'Conversion Rate (%)',
+                'Reds', label_format='percent_detail',
+                show_detail=True, detail_cols=['Total Claim', 'Total Count']
+            ),
+            partial(
+                create_bar_chart, df_sales, 'Conversion Rate (Count/NOC)', 'Label',
+                '', 'Conversion Rate (%)',
+                'Oranges', label_format='percent_detail',
+                show_detail=True, detail_cols=['Total Count', 'NOC']
+            ),
+            *conversion_distribution_builders(digests['sales'], df_sales_promo, indexes, 'sales', selected_cat_sales, selected_promo_sales)
+        ])
+    if not df_qty.empty:
+        fig5, fig6, fig_qty_claim, fig_qty_noc = submit_cached_figures('ended_qty_figures', data_file, __file__, qty_state, [
+            partial(
+                create_bar_chart, df_qty, 'Conversion Rate (Claim/Count)', 'Label',
+                '', 'Conversion Rate (%)',
+                'Reds', label_format='percent_detail',
+                show_detail=True, detail_cols=['Total Claim', 'Total Count']
+            ),
+            partial(
+                create_bar_chart, df_qty, 'Conversion Rate (Count/NOC)', 'Label',
+                '', 'Conversion Rate (%)',
+                'Oranges', label_format='percent_detail',
+                show_detail=True, detail_cols=['Total Count', 'NOC']
+            ),
+            *conversion_distribution_builders(digests['qty'], df_qty_promo, indexes, 'qty', selected_cat_qty, selected_promo_qty)
+        ])
+    
+    # Workbook arsip (registry) untuk tab Timeline dan Perbandingan
+    paths = archived_workbooks(data_file)
     
     # Tabs
-    tab_sales, tab_qty = st.tabs(["💰 SALES", "📦 QTY"])
+    tab_sales, tab_qty, tab_timeline, tab_compare = st.tabs(["💰 SALES", "📦 QTY", "🗓️ TIMELINE", "🔁 PERBANDINGAN"])
     
     # ==================== TAB SALES ====================
     with tab_sales:
@@ -396,10 +558,10 @@ def main():
             
             col1, col2, col3, col4 = st.columns(4)
             
-            total_sales = df_sales['Sales Amount'].sum()
+            total_sales = sales_total['Sales Amount']
             total_promo = len(df_sales)
-            avg_conv_claim = df_sales['Conversion Rate (Claim/Count)'].mean()
-            avg_conv_noc = df_sales['Conversion Rate (Count/NOC)'].mean()
+            conv_claim = sales_total['Conversion Rate (Claim/Count)']
+            conv_noc = sales_total['Conversion Rate (Count/NOC)']
             
             with col1:
                 st.markdown(f"""
@@ -420,16 +582,16 @@ def main():
             with col3:
                 st.markdown(f"""
                 <div class="metric-container">
-                    <div class="metric-value">{avg_conv_claim*100:.2f}%</div>
-                    <div class="metric-label">📊 Avg Claim/Count</div>
+                    <div class="metric-value">{conv_claim*100:.2f}%</div>
+                    <div class="metric-label">📊 Claim/Count</div>
                 </div>
                 """, unsafe_allow_html=True)
             
             with col4:
                 st.markdown(f"""
                 <div class="metric-container">
-                    <div class="metric-value">{avg_conv_noc*100:.4f}%</div>
-                    <div class="metric-label">👥 Avg Count/NOC</div>
+                    <div class="metric-value">{conv_noc*100:.4f}%</div>
+                    <div class="metric-label">👥 Count/NOC</div>
                 </div>
                 """, unsafe_allow_html=True)
             
@@ -438,49 +600,35 @@ def main():
             # Chart 1: Sales Amount Ranking
             st.markdown(f'<p class="section-title">💰 Ranking Sales Amount (by {view_option.replace("Per ", "")})</p>', unsafe_allow_html=True)
             
-            fig1 = create_bar_chart(
-                df_sales, 'Sales Amount', 'Label',
-                '', 'Sales Amount (Billion Rp)',
-                'Blues', label_format='billion'
-            )
-            st.plotly_chart(fig1, use_container_width=True)
+            st.plotly_chart(fig1.result(), use_container_width=True)
             
             # Chart 2: Contribution Sales Ranking
             st.markdown(f'<p class="section-title">📊 Ranking Contribution Sales (by {view_option.replace("Per ", "")})</p>', unsafe_allow_html=True)
             
-            fig2 = create_bar_chart(
-                df_sales, 'Contribution Sales', 'Label',
-                '', 'Contribution Sales (%)',
-                'Greens', label_format='percent'
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(fig2.result(), use_container_width=True)
             
             # Chart 3: Conversion Rate (Claim/Count)
             st.markdown(f'<p class="section-title">🔄 Conversion Rate - Claim/Count (by {view_option.replace("Per ", "")})</p>', unsafe_allow_html=True)
             
-            fig3 = create_bar_chart(
-                df_sales, 'Conversion Rate (Claim/Count)', 'Label',
-                '', 'Conversion Rate (%)',
-                'Reds', label_format='percent_detail',
-                show_detail=True, detail_cols=['Total Claim', 'Total Count']
-            )
-            st.plotly_chart(fig3, use_container_width=True)
+            st.plotly_chart(fig3.result(), use_container_width=True)
             
             # Chart 4: Conversion Rate (Count/NOC)
             st.markdown(f'<p class="section-title">👥 Conversion Rate - Count/NOC (by {view_option.replace("Per ", "")})</p>', unsafe_allow_html=True)
             
-            fig4 = create_bar_chart(
-                df_sales, 'Conversion Rate (Count/NOC)', 'Label',
-                '', 'Conversion Rate (%)',
-                'Oranges', label_format='percent_detail',
-                show_detail=True, detail_cols=['Total Count', 'NOC']
-            )
-            st.plotly_chart(fig4, use_container_width=True)
+            st.plotly_chart(fig4.result(), use_container_width=True)
+            
+            render_conversion_distribution(fig_sales_claim, fig_sales_noc)
             
             # Data Table
             st.markdown('<p class="section-title">📋 Data Table</p>', unsafe_allow_html=True)
             with st.expander("🔍 Lihat Detail Data", expanded=False):
-                st.dataframe(df_sales, use_container_width=True, height=300)
+                render_table(df_sales, key='table_sales', formats=TABLE_FORMATS, height=300)
+                render_export(
+                    df_sales, f"ended_promo_sales_{view_option.lower().replace(' ', '_')}",
+                    (os.path.getmtime(data_file), 'sales', view_option,
+                     tuple(selected_cat_sales), tuple(selected_promo_sales or ())),
+                    key='export_sales'
+                )
     
     # ==================== TAB QTY ====================
     with tab_qty:
@@ -493,8 +641,8 @@ def main():
             col1, col2, col3 = st.columns(3)
             
             total_promo_qty = len(df_qty)
-            avg_conv_claim_qty = df_qty['Conversion Rate (Claim/Count)'].mean()
-            avg_conv_noc_qty = df_qty['Conversion Rate (Count/NOC)'].mean()
+            conv_claim_qty = qty_total['Conversion Rate (Claim/Count)']
+            conv_noc_qty = qty_total['Conversion Rate (Count/NOC)']
             
             with col1:
                 st.markdown(f"""
@@ -507,16 +655,16 @@ def main():
             with col2:
                 st.markdown(f"""
                 <div class="metric-container">
-                    <div class="metric-value">{avg_conv_claim_qty*100:.2f}%</div>
-                    <div class="metric-label">📊 Avg Claim/Count</div>
+                    <div class="metric-value">{conv_claim_qty*100:.2f}%</div>
+                    <div class="metric-label">📊 Claim/Count</div>
                 </div>
                 """, unsafe_allow_html=True)
             
             with col3:
                 st.markdown(f"""
                 <div class="metric-container">
-                    <div class="metric-value">{avg_conv_noc_qty*100:.4f}%</div>
-                    <div class="metric-label">👥 Avg Count/NOC</div>
+                    <div class="metric-value">{conv_noc_qty*100:.4f}%</div>
+                    <div class="metric-label">👥 Count/NOC</div>
                 </div>
                 """, unsafe_allow_html=True)
             
@@ -525,29 +673,138 @@ def main():
             # Chart 1: Conversion Rate (Claim/Count)
             st.markdown(f'<p class="section-title">🔄 Conversion Rate - Claim/Count (by {view_option.replace("Per ", "")})</p>', unsafe_allow_html=True)
             
-            fig5 = create_bar_chart(
-                df_qty, 'Conversion Rate (Claim/Count)', 'Label',
-                '', 'Conversion Rate (%)',
-                'Reds', label_format='percent_detail',
-                show_detail=True, detail_cols=['Total Claim', 'Total Count']
-            )
-            st.plotly_chart(fig5, use_container_width=True)
+            st.plotly_chart(fig5.result(), use_container_width=True)
             
             # Chart 2: Conversion Rate (Count/NOC)
             st.markdown(f'<p class="section-title">👥 Conversion Rate - Count/NOC (by {view_option.replace("Per ", "")})</p>', unsafe_allow_html=True)
             
-            fig6 = create_bar_chart(
-                df_qty, 'Conversion Rate (Count/NOC)', 'Label',
-                '', 'Conversion Rate (%)',
-                'Oranges', label_format='percent_detail',
-                show_detail=True, detail_cols=['Total Count', 'NOC']
-            )
-            st.plotly_chart(fig6, use_container_width=True)
+            st.plotly_chart(fig6.result(), use_container_width=True)
+            
+            render_conversion_distribution(fig_qty_claim, fig_qty_noc)
             
             # Data Table
             st.markdown('<p class="section-title">📋 Data Table</p>', unsafe_allow_html=True)
             with st.expander("🔍 Lihat Detail Data", expanded=False):
-                st.dataframe(df_qty, use_container_width=True, height=300)
+                render_table(df_qty, key='table_qty', formats=TABLE_FORMATS, height=300)
+                render_export(
+                    df_qty, f"ended_promo_qty_{view_option.lower().replace(' ', '_')}",
+                    (os.path.getmtime(data_file), 'qty', view_option,
+                     tuple(selected_cat_qty), tuple(selected_promo_qty or ())),
+                    key='export_qty'
+                )
+    
+    # ==================== TAB TIMELINE ====================
+    # Promo aktif pada tanggal / rentang dari interval index lintas workbook arsip
+    with tab_timeline:
+        timeline, tree = load_timeline(tuple(paths), tuple(file_hash(path) for path in paths))
+        
+        st.markdown("### 🗓️ Timeline Promo")
+        st.caption(f"{len(timeline):,} promo dari {len(paths)} workbook Ended Promo. Workbook hanya memuat "
+                   "periode berakhir: promo dianggap aktif sejak awal bulan periode tersebut.")
+        
+        if timeline.empty:
+            st.warning("⚠️ Tidak ada promo dengan periode yang valid.")
+        else:
+            min_date, max_date = timeline['Start'].min().date(), timeline['End'].max().date()
+            col_date, col_cat = st.columns([1, 2])
+            with col_date:
+                date_range = st.date_input(
+                    "📅 Aktif pada tanggal / rentang",
+                    value=(min_date, max_date),
+                    min_value=min_date,
+                    max_value=max_date,
+                    key="timeline_range"
+                )
+            with col_cat:
+                all_cat_timeline = sorted(timeline['Category'].unique())
+                selected_cat_timeline = st.multiselect(
+                    "🏷️ Filter Category",
+                    options=all_cat_timeline,
+                    default=all_cat_timeline,
+                    format_func=lambda x: f"Category {int(x)}",
+                    key="cat_timeline"
+                )
+            
+            # Satu tanggal = query titik; rentang belum lengkap saat user baru memilih tanggal awal
+            dates = date_range if isinstance(date_range, (tuple, list)) else (date_range,)
+            range_start, range_end = (dates[0], dates[-1]) if dates else (min_date, max_date)
+            active = active_promos(timeline, tree, range_start, range_end)
+            active = active[active['Category'].isin(selected_cat_timeline)]
+            
+            if active.empty:
+                st.warning("⚠️ Tidak ada promo aktif pada rentang / kategori yang dipilih.")
+            else:
+                overlap = category_overlap(active)
+                overlap['Label'] = 'Category ' + overlap['Category'].astype(int).astype(str)
+                summary = timeline_summary(active)
+                
+                col1, col2, col3, col4 = st.columns(4)
+                timeline_kpis = [
+                    (f"{summary['promos']:,}", '🎯 Promo Aktif'),
+                    (f"{summary['categories']}", '🏷️ Category'),
+                    (f"{summary['peak']}", '📚 Puncak Promo Bersamaan'),
+                    (f"{summary['promo_days']:,}", '📆 Promo-Hari'),
+                ]
+                for col, (value, label) in zip([col1, col2, col3, col4], timeline_kpis):
+                    with col:
+                        st.markdown(f"""
+                        <div class="metric-container">
+                            <div class="metric-value">{value}</div>
+                            <div class="metric-label">{label}</div>
+                        </div>
+                        """, unsafe_allow_html=True)
+                
+                st.markdown("<br>", unsafe_allow_html=True)
+                
+                st.markdown('<p class="section-title">📊 Overlap Promo per Category (puncak promo berjalan bersamaan)</p>', unsafe_allow_html=True)
+                st.plotly_chart(create_bar_chart(
+                    overlap, 'Puncak Bersamaan', 'Label', '', 'Promo Bersamaan', 'Blues'
+                ), use_container_width=True)
+                
+                st.markdown('<p class="section-title">🗓️ Gantt Promo Aktif</p>', unsafe_allow_html=True)
+                st.plotly_chart(create_gantt_chart(active), use_container_width=True)
+                
+                with st.expander("🔍 Lihat Detail Data", expanded=False):
+                    render_table(overlap.drop(columns='Label'), key='table_timeline_overlap', height=250, formats={
+                        'Promo Aktif': 'number', 'Puncak Bersamaan': 'number', 'Promo-Hari': 'number'
+                    })
+                    render_table(active.drop(columns=['Active Start', 'Active End']), key='table_timeline', height=300, formats={
+                        'Total Count': 'number', 'Total Claim': 'number', 'Active Days': 'number'
+                    })
+    
+    # ==================== TAB PERBANDINGAN ====================
+    # Bulan berakhir vs bulan sebelumnya / bulan yang sama tahun lalu, lintas workbook arsip
+    with tab_compare:
+        st.markdown("### 🔁 Perbandingan Antar Bulan")
+        col_mode, col_table = st.columns(2)
+        with col_mode:
+            compare_option = st.radio(
+                "🔁 Mode Perbandingan",
+                options=list(COMPARE_MODES.keys()),
+                index=0,
+                horizontal=True,
+                key="ended_compare_mode"
+            )
+        with col_table:
+            compare_table = st.radio(
+                "📁 Tabel",
+                options=['Sales', 'Qty'],
+                index=0,
+                horizontal=True,
+                key="ended_compare_table"
+            )
+        
+        comparisons = load_comparison(tuple(paths), tuple(file_hash(path) for path in paths), COMPARE_MODES[compare_option])
+        # Filter sidebar hanya dipakai jika dipersempit: pilihannya berasal dari workbook aktif,
+        # category / promo bulan lain tidak ada di dalamnya
+        if compare_table == 'Sales':
+            categories = None if list(selected_cat_sales) == list(all_cat_sales) else selected_cat_sales
+            promos = None if selected_promo_sales == all_promo_sales else selected_promo_sales
+            render_comparison(comparisons, 'sales', view_option, categories, promos)
+        else:
+            categories = None if list(selected_cat_qty) == list(all_cat_qty) else selected_cat_qty
+            promos = None if selected_promo_qty == all_promo_qty else selected_promo_qty
+            render_comparison(comparisons, 'qty', view_option, categories, promos)
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bitmaps import MAX_BITMAP_VALUES, BitmapIndex, aggregate, pivot_sum
+
+COLUMNS = ['Category', 'Period', 'Promo Name']
+
+
+@pytest.fixture
+def table():
+    # Promo Name melebihi MAX_BITMAP_VALUES (jalur lookup kode), Category punya NaN
+    rng = np.random.default_rng(9)
+    n = 5000
+    months = ['January 2025', 'February 2025', 'March 2025', 'April 2025']
+    df = pd.DataFrame({
+        'Category': rng.choice([11.0, 14.0, 17.0, 21.0, np.nan], n),
+        'Period': pd.Categorical(rng.choice(months, n), categories=months, ordered=True),
+        'Promo Name': pd.Series(rng.integers(0, MAX_BITMAP_VALUES + 50, n)).map('Promo {:04d}'.format),
+        'NOC': rng.integers(0, 1000, n),
+        'Sales Amount': np.where(rng.random(n) < 0.1, np.nan, rng.random(n) * 1e9),
+    })
+    df['Period Start'] = pd.to_datetime(df['Period'].astype(str), format='%B %Y')
+    return df
+
+
+@pytest.fixture
+def index(table):
+    return BitmapIndex(table, COLUMNS)
+
+
+FILTERS = [
+    {},
+    {'Category': [14.0]},
+    {'Category': [11.0, 14.0, 17.0]},                      # mayoritas nilai: jalur OR dibalik
+    {'Category': [11.0, 14.0, 17.0, 21.0]},                # semua nilai: NaN tetap tidak terpilih
+    {'Category': [99.0]},
+    {'Category': []},
+    {'Period': ['March 2025'], 'Category': [11.0, 21.0]},
+    {'Promo Name': ['Promo 0001', 'Promo 0290', 'Tidak Ada']},
+    {'Category': None, 'Period': ['January 2025', 'February 2025', 'April 2025']},
+]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_select_matches_isin(table, index, filters):
+    mask = np.ones(len(table), dtype=bool)
+    for col, values in filters.items():
+        if values is not None:
+            mask &= table[col].isin(values).to_numpy()
+    np.testing.assert_array_equal(index.select(filters), np.flatnonzero(mask))
+
+
+def test_values_in(table, index):
+    rows = index.select({'Category': [14.0]})
+    expected = sorted(table.iloc[rows]['Promo Name'].unique())
+    assert index.values_in('Promo Name', rows).tolist() == expected
+
+
+@pytest.mark.parametrize('by', [[], ['Category'], ['Period'], ['Category', 'Period']])
+def test_aggregate_matches_groupby(table, index, by):
+    rows = index.select({'Period': ['January 2025', 'March 2025']})
+    metrics = {
+        'NOC': ('NOC', 'sum'),
+        'Sales Amount': ('Sales Amount', 'sum'),
+        'Avg Sales': ('Sales Amount', 'mean'),
+        'Period Start': ('Period Start', 'first'),
+    }
+    out = aggregate(table, index, rows, by, metrics)
+
+    selected = table.iloc[rows]
+    # by = [] -> satu grup konstan (total)
+    keys = by or np.zeros(len(selected), dtype=np.int8)
+    expected = selected.groupby(keys, observed=True).agg(**metrics).reset_index(drop=not by)
+    assert out.columns.tolist() == by + list(metrics)
+    for col in by:
+        assert out[col].astype(object).tolist() == expected[col].astype(object).tolist()
+    assert out['NOC'].dtype == np.int64
+    np.testing.assert_array_equal(out['NOC'], expected['NOC'])
+    np.testing.assert_allclose(out['Sales Amount'], expected['Sales Amount'])
+    np.testing.assert_allclose(out['Avg Sales'], expected['Avg Sales'])
+    np.testing.assert_array_equal(out['Period Start'], expected['Period Start'])
+
+
+def test_aggregate_empty_selection(table, index):
+    total = aggregate(table, index, index.select({'Category': []}), [], {'NOC': ('NOC', 'sum')})
+    assert total['NOC'].tolist() == [0]
+    assert aggregate(table, index, [], ['Category'], {'NOC': ('NOC', 'sum')}).empty
+    with pytest.raises(ValueError):
+        aggregate(table, index, [0], [], {'NOC': ('NOC', 'median')})
+
+
+def test_pivot_sum_matches_pivot_table(table, index):
+    rows = index.select({'Category': [11.0, 17.0, 21.0]})
+    grid, row_keys, column_keys = pivot_sum(table, index, rows, 'Category', 'Period', 'NOC')
+    expected = table.iloc[rows].pivot_table(index='Category', columns='Period', values='NOC',
+                                            aggfunc='sum', observed=True)
+    assert row_keys.tolist() == expected.index.tolist()
+    assert [str(c) for c in column_keys] == [str(c) for c in expected.columns]
+    np.testing.assert_array_equal(grid, expected.to_numpy(dtype=np.float64))
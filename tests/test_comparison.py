@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bitmaps import BitmapIndex
+from utils.comparison import PREVIOUS_SUFFIX, comparison_periods, delta_table, summarize
+from utils.conversion import conversion_metrics
+from utils.ended_data import (
+    COMPARISON_MEASURES, COMPARISON_RATIOS, COMPARISON_SHARED, comparison_table, monthly_rollup,
+)
+
+
+def _ended_month(label, noc, seed):
+    # Satu workbook ended: NOC level toko berulang di setiap baris bulan berakhir yang sama
+    rng = np.random.default_rng(seed)
+    promos = [(category, f'Promo {category}-{i}') for category in (1, 2, 3) for i in range(4)]
+    return pd.DataFrame({
+        'Category': [category for category, _ in promos],
+        'Promo Name': [name for _, name in promos],
+        'End of Period Promotion': label,
+        'Total Count': rng.integers(100, 5000, len(promos)),
+        'Total Claim': rng.integers(10, 100, len(promos)),
+        'NOC': noc,
+        'Sales Amount': rng.integers(10 ** 6, 10 ** 8, len(promos)),
+        # Kolom ratio workbook (dihitung ulang conversion_metrics)
+        'Conversion Rate (Claim/Count)': np.nan,
+        'Conversion Rate (Count/NOC)': np.nan,
+    })
+
+
+@pytest.fixture
+def months():
+    return _ended_month('December 2025', 238000, 1), _ended_month('January 2026', 242490, 2)
+
+
+@pytest.mark.parametrize('view', ['Per Promo', 'Per Category'])
+def test_comparison_conversion_matches_conversion_metrics(months, view):
+    december, january = months
+    comparison, index = comparison_table(
+        [monthly_rollup(df, 'sales', view) for df in months], 'sales', view, 'previous'
+    )
+    rows = index.select({'Period': ['January 2026']})
+    total = summarize(comparison, index, rows, [], COMPARISON_MEASURES['sales'], COMPARISON_RATIOS,
+                      shared_cols=COMPARISON_SHARED).iloc[0]
+
+    expected = conversion_metrics(january, []).iloc[0]
+    previous = conversion_metrics(december, []).iloc[0]
+    assert total['NOC'] == expected['NOC'] == 242490
+    assert total['NOC' + PREVIOUS_SUFFIX] == previous['NOC']
+    assert total['Conversion Rate (Count/NOC)'] == pytest.approx(expected['Conversion Rate (Count/NOC)'])
+    assert total['Conversion Rate (Count/NOC)' + PREVIOUS_SUFFIX] == pytest.approx(
+        previous['Conversion Rate (Count/NOC)']
+    )
+
+
+def test_shared_measure_per_group_and_across_periods(months):
+    comparison, index = comparison_table(
+        [monthly_rollup(df, 'sales', 'Per Promo') for df in months], 'sales', 'Per Promo', 'previous'
+    )
+    measures = COMPARISON_MEASURES['sales']
+    by_category = summarize(comparison, index, index.select({'Period': ['January 2026']}), ['Category'],
+                            measures, COMPARISON_RATIOS, shared_cols=COMPARISON_SHARED)
+    expected = conversion_metrics(months[1], ['Category'])
+    assert by_category['Category'].tolist() == expected['Category'].tolist()
+    assert by_category['NOC'].tolist() == expected['NOC'].tolist()
+    np.testing.assert_allclose(by_category['Conversion Rate (Count/NOC)'], expected['Conversion Rate (Count/NOC)'])
+
+    # Dua bulan: NOC dijumlah antar bulan, tetap sekali per bulan
+    both = summarize(comparison, index, index.select({}), [], measures, COMPARISON_RATIOS,
+                     shared_cols=COMPARISON_SHARED).iloc[0]
+    assert both['NOC'] == 238000 + 242490
+    assert both['Total Count'] == sum(df['Total Count'].sum() for df in months)
+
+
+def test_delta_table_matches_shifted_merge():
+    rng = np.random.default_rng(7)
+    starts = pd.date_range('2025-01-01', periods=6, freq='MS')
+    df = pd.DataFrame(
+        [(key, start) for key in 'abcd' for start in starts], columns=['Key', 'Period Start']
+    ).sample(frac=0.8, random_state=3)
+    df['Count'] = rng.integers(1, 100, len(df)).astype(float)
+    df['Base'] = rng.integers(100, 1000, len(df)).astype(float)
+    df = df.sort_values(['Key', 'Period Start']).reset_index(drop=True)
+    labels = df['Period Start'].dt.strftime('%B %Y')
+    order = sorted(labels.unique(), key=lambda label: pd.Timestamp(label))
+    df.insert(1, 'Period', pd.Categorical(labels, categories=order, ordered=True))
+
+    out = delta_table(df, ['Key'], ['Count', 'Base'], {'Rate': ('Count', 'Base')}, 'previous', 'Monthly')
+
+    previous = df.assign(**{'Period Start': df['Period Start'] + pd.DateOffset(months=1)})
+    merged = df.merge(previous[['Key', 'Period Start', 'Count', 'Base']], on=['Key', 'Period Start'],
+                      how='left', suffixes=('', '_prev'))
+    # Periode pembanding harus ada di index periode (bulan yang hilang dari seluruh data = tanpa pembanding)
+    has_period = (df['Period Start'] - pd.DateOffset(months=1)).isin(df['Period Start'])
+    expected = merged['Count_prev'].where(has_period)
+    np.testing.assert_allclose(out['Count' + PREVIOUS_SUFFIX], expected)
+    np.testing.assert_allclose(out['Count Δ'], df['Count'] - expected)
+    np.testing.assert_allclose(out['Rate' + PREVIOUS_SUFFIX], (merged['Count_prev'] / merged['Base_prev']).where(has_period))
+
+
+def test_comparison_periods_missing_period():
+    starts = pd.to_datetime(['2025-01-01', '2025-02-01', '2025-04-01'])
+    assert comparison_periods(starts, 'previous', 'Monthly').tolist() == [-1, 0, -1]
+    assert comparison_periods(starts, 'year', 'Monthly').tolist() == [-1, -1, -1]
+
+
+@pytest.fixture
+def weekly():
+    # Dua tahun mingguan per Category; sebagian key x minggu hilang (tanpa pembanding)
+    rng = np.random.default_rng(21)
+    starts = pd.date_range('2024-01-01', periods=104, freq='W-MON')
+    df = pd.DataFrame([(c, s) for c in (11, 14, 17) for s in starts], columns=['Category', 'Period Start'])
+    df = df.sample(frac=0.9, random_state=1).sort_values(['Category', 'Period Start']).reset_index(drop=True)
+    df['Sales Amount'] = rng.integers(10 ** 6, 10 ** 8, len(df)).astype(float)
+    df['Net Sales'] = df['Sales Amount'] * rng.uniform(5, 20, len(df))
+    df['Visit Customer'] = rng.integers(1000, 2000, len(df)).astype(float)
+    labels = df['Period Start'].dt.strftime('%Y-%m-%d')
+    df.insert(1, 'Period', pd.Categorical(labels, categories=sorted(labels.unique()), ordered=True))
+    return df
+
+
+def test_summarize_matches_pandas(weekly):
+    measures, ratios = ['Sales Amount', 'Net Sales', 'Visit Customer'], {'Kontribusi': ('Sales Amount', 'Net Sales')}
+    table = delta_table(weekly, ['Category'], measures, ratios, 'year', 'Weekly')
+    index = BitmapIndex(table, ['Category', 'Period'])
+    periods = weekly['Period'].cat.categories[60:70].tolist()
+    rows = index.select({'Period': periods})
+    out = summarize(table, index, rows, ['Category'], measures, ratios, mean_cols=['Visit Customer'])
+
+    # Brute force: pembanding = baris key yang sama 52 minggu sebelumnya, hanya dijumlah jika ada
+    previous = weekly.assign(**{'Period Start': weekly['Period Start'] + pd.DateOffset(weeks=52)})
+    merged = weekly.merge(previous, on=['Category', 'Period Start'], how='left', suffixes=('', ' (Pembanding)'))
+    merged = merged[merged['Period'].isin(periods)]
+    grouped = merged.groupby('Category')
+    expected = grouped[['Sales Amount', 'Net Sales', 'Sales Amount (Pembanding)', 'Net Sales (Pembanding)']].sum()
+    expected['Visit Customer'] = grouped['Visit Customer'].mean()
+    expected['Visit Customer (Pembanding)'] = grouped['Visit Customer (Pembanding)'].mean()
+
+    assert out['Category'].tolist() == expected.index.tolist()
+    for col in expected.columns:
+        np.testing.assert_allclose(out[col], expected[col], err_msg=col)
+    np.testing.assert_allclose(out['Kontribusi'], expected['Sales Amount'] / expected['Net Sales'])
+    np.testing.assert_allclose(
+        out['Kontribusi (Pembanding)'], expected['Sales Amount (Pembanding)'] / expected['Net Sales (Pembanding)']
+    )
+    np.testing.assert_allclose(
+        out['Sales Amount Δ%'],
+        (expected['Sales Amount'] - expected['Sales Amount (Pembanding)']) / expected['Sales Amount (Pembanding)'],
+    )
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.conversion import CONVERSION_RATIOS, conversion_metrics
+
+
+@pytest.fixture
+def ended():
+    # Dua bulan berakhir; NOC level toko per bulan, Net Sales per Category x bulan, keduanya
+    # berulang di setiap baris promo di bawahnya
+    rng = np.random.default_rng(11)
+    rows = []
+    for period, noc in (('December 2025', 238000), ('January 2026', 242490)):
+        for category in (11, 14, 17):
+            net_sales = int(rng.integers(10 ** 9, 10 ** 10))
+            for i in range(int(rng.integers(1, 5))):
+                rows.append({
+                    'Category': category,
+                    'Promo Name': f'Promo {category}-{i}',
+                    'End of Period Promotion': period,
+                    'Total Count': int(rng.integers(100, 5000)),
+                    'Total Claim': int(rng.integers(0, 100)),
+                    'NOC': noc,
+                    'Sales Amount': int(rng.integers(10 ** 6, 10 ** 8)),
+                    'Net Sales (by Category)': net_sales,
+                    **{ratio: np.nan for ratio in CONVERSION_RATIOS},
+                })
+    return pd.DataFrame(rows)
+
+
+def _brute_force(df, dims):
+    # Per grup: measure aditif dijumlah, NOC sekali per bulan, Net Sales sekali per category x bulan
+    groups = df.groupby(dims, sort=False) if dims else [((), df)]
+    rows = []
+    for key, group in groups:
+        row = dict(zip(dims, key if isinstance(key, tuple) else (key,)))
+        for col in ['Total Count', 'Total Claim', 'Sales Amount']:
+            row[col] = group[col].sum()
+        row['NOC'] = group.groupby('End of Period Promotion')['NOC'].first().sum()
+        row['Net Sales (by Category)'] = (
+            group.groupby(['Category', 'End of Period Promotion'])['Net Sales (by Category)'].first().sum()
+        )
+        for ratio, (num, den) in CONVERSION_RATIOS.items():
+            row[ratio] = row[num] / row[den] if row[den] else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('dims', [
+    [], ['Category'], ['End of Period Promotion'], ['Category', 'Promo Name', 'End of Period Promotion'],
+])
+def test_conversion_metrics_matches_brute_force(ended, dims):
+    out = conversion_metrics(ended, dims)
+    expected = _brute_force(ended, dims)
+    assert out.columns.tolist() == [c for c in ended.columns if c in out.columns]
+    for col in dims:
+        assert out[col].tolist() == expected[col].tolist()
+    for col in expected.columns.drop(dims):
+        np.testing.assert_allclose(out[col].to_numpy(dtype=np.float64), expected[col].to_numpy(dtype=np.float64),
+                                   err_msg=col)
+
+
+def test_ratio_of_sums_not_mean_of_ratios(ended):
+    total = conversion_metrics(ended, []).iloc[0]
+    assert total['NOC'] == 238000 + 242490
+    assert total['Conversion Rate (Claim/Count)'] == pytest.approx(
+        ended['Total Claim'].sum() / ended['Total Count'].sum()
+    )
+    per_row = ended['Total Claim'] / ended['Total Count']
+    assert total['Conversion Rate (Claim/Count)'] != pytest.approx(per_row.mean())
+
+
+def test_zero_denominator_is_nan(ended):
+    ended = ended.assign(**{'Total Count': 0, 'Total Claim': 0})
+    assert np.isnan(conversion_metrics(ended, ['Category'])['Conversion Rate (Claim/Count)']).all()
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from utils.downsample import LABEL_THRESHOLD, downsample_frame, extreme_labels, lttb_indices
+
+
+def test_extreme_labels_only_max_and_min():
+    values = np.arange(LABEL_THRESHOLD + 10, dtype=np.float64)
+    values[5] = np.nan
+    labels = [f'v{i}' for i in range(len(values))]
+    out = extreme_labels(values, labels)
+    assert [label for label in out if label] == ['v0', labels[-1]]
+
+
+def test_extreme_labels_short_series_keeps_all():
+    assert extreme_labels([1.0, np.nan, 3.0], ['a', 'b', 'c']) == ['a', 'b', 'c']
+    assert extreme_labels([], []) == []
+
+
+def test_extreme_labels_all_nan():
+    n = LABEL_THRESHOLD + 1
+    assert extreme_labels(np.full(n, np.nan), ['x'] * n) == [''] * n
+
+
+def test_lttb_keeps_endpoints_and_peak():
+    y = np.sin(np.linspace(0, 20, 5000))
+    y[1234] = 10.0
+    indices = lttb_indices(y, 200)
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert 1234 in indices
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_downsample_frame_aligned_across_series():
+    df = pd.DataFrame({'a': np.random.default_rng(0).normal(size=2000), 'b': np.arange(2000.0)})
+    out = downsample_frame(df, ['a', 'b'], threshold=300)
+    assert len(out) <= 300
+    assert out.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(out, df.loc[out.index])
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.incremental import changed_keys, combine_hashes, key_mask, rebuild_changed, row_hashes, slice_version
+from utils.periods import build_rollups, update_rollups
+
+MONTHS = [f'{month} {year}' for year in (2024, 2025) for month in
+          ['January', 'February', 'March', 'April', 'May', 'June',
+           'July', 'August', 'September', 'October', 'November', 'December']]
+SUM_COLS = ['Qty Promo', 'NOC', 'Sales Amount', 'Net Sales (by Group Category)']
+RATIO_COLS = {'Kontribusi Sales': ('Sales Amount', 'Net Sales (by Group Category)')}
+
+
+@pytest.fixture
+def summary():
+    # Sheet Summary (Month): satu baris per Category x Month
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame([(category, month) for category in (11, 14, 17, 21) for month in MONTHS[:-2]],
+                      columns=['Category', 'Month'])
+    for col in SUM_COLS:
+        df[col] = rng.integers(1, 10 ** 6, len(df))
+    df['Kontribusi Sales'] = df['Sales Amount'] / df['Net Sales (by Group Category)']
+    return df
+
+
+def _republish(df):
+    # Koreksi satu slice, hapus satu slice, tambah satu bulan baru (dua category)
+    df = df.copy()
+    df.loc[(df['Category'] == 14) & (df['Month'] == 'March 2025'), 'Sales Amount'] += 12345
+    df = df[~((df['Category'] == 21) & (df['Month'] == 'January 2024'))]
+    added = df[df['Month'] == MONTHS[-3]].head(2).assign(Month=MONTHS[-2])
+    return pd.concat([df, added], ignore_index=True)
+
+
+def _brute_force_changed(old, new):
+    # Slice berubah = isi baris (tanpa urutan) berbeda, atau slice hanya ada di satu sisi
+    def slices(df):
+        return {key: group.sort_values(list(df.columns)).reset_index(drop=True)
+                for key, group in df.groupby(['Category', 'Month'])}
+    old_slices, new_slices = slices(old), slices(new)
+    return {
+        key for key in old_slices.keys() | new_slices.keys()
+        if key not in old_slices or key not in new_slices or not old_slices[key].equals(new_slices[key])
+    }
+
+
+def test_row_hashes_detect_exactly_changed_slices(summary):
+    republished = _republish(summary)
+    old = row_hashes(summary, ['Category', 'Month'])
+    new = row_hashes(republished.sample(frac=1, random_state=0), ['Category', 'Month'])
+    assert changed_keys(old, new) == _brute_force_changed(summary, republished)
+
+
+def test_combine_and_slice_version(summary):
+    republished = _republish(summary)
+    old = combine_hashes(row_hashes(summary, ['Category', 'Month']), row_hashes(summary, ['Category']))
+    new = combine_hashes(row_hashes(republished, ['Category', 'Month']), row_hashes(republished, ['Category']))
+    untouched = [(11, month) for month in MONTHS[:6]]
+    assert slice_version(old, untouched) == slice_version(new, untouched)
+    assert slice_version(old, untouched + [(14, 'March 2025')]) != slice_version(new, untouched + [(14, 'March 2025')])
+
+
+def test_key_mask_matches_isin(summary):
+    keys = {(14, 'March 2025'), (11, 'January 2024'), (99, 'May 2025')}
+    expected = pd.MultiIndex.from_frame(summary[['Category', 'Month']]).isin(list(keys))
+    np.testing.assert_array_equal(key_mask(summary, ['Category', 'Month'], keys), expected)
+
+
+def test_update_rollups_equals_full_rebuild(summary):
+    republished = _republish(summary)
+    changed = changed_keys(row_hashes(summary, ['Category', 'Month']), row_hashes(republished, ['Category', 'Month']))
+    previous = build_rollups(summary, 'Month', ['Category'], SUM_COLS, RATIO_COLS, 'Monthly')
+
+    updated = update_rollups(previous, republished, 'Month', ['Category'], SUM_COLS, RATIO_COLS, 'Monthly',
+                             {month for _, month in changed})
+    full = build_rollups(republished, 'Month', ['Category'], SUM_COLS, RATIO_COLS, 'Monthly')
+    assert list(updated) == list(full)
+    for grain in full:
+        pd.testing.assert_frame_equal(updated[grain], full[grain], check_dtype=False, obj=grain)
+
+
+def test_rebuild_changed_drops_removed_keys():
+    previous = {('a',): 1, ('b',): 2, ('c',): 3}
+    assert rebuild_changed(previous, {('b',): 20}, {('b',), ('c',)}) == {('a',): 1, ('b',): 20}
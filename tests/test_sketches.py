@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.sketches import (
+    HyperLogLog, TDigest, box_stats, build_hll_sketches, build_tdigests, merge_hll, merge_tdigest,
+)
+
+
+@pytest.fixture
+def customers():
+    # Customer berulang lintas bulan / category, seperti transaksi promo
+    rng = np.random.default_rng(42)
+    n = 60_000
+    return pd.DataFrame({
+        'Category': rng.choice([11, 14, 17, 21], n),
+        'Month': rng.choice(['January 2025', 'February 2025', 'March 2025'], n),
+        'Customer ID': rng.integers(0, 25_000, n).astype(str),
+    })
+
+
+def _within_bound(estimate, exact, sketch):
+    # 4 standard error: gagal hanya jika estimator rusak, bukan karena noise
+    return abs(estimate - exact) <= 4 * sketch.relative_error * exact
+
+
+def test_hll_estimate_close_to_nunique(customers):
+    sketch = HyperLogLog().add_many(customers['Customer ID'])
+    assert _within_bound(sketch.estimate(), customers['Customer ID'].nunique(), sketch)
+
+
+def test_hll_small_range_exact_enough():
+    sketch = HyperLogLog().add_many([str(i) for i in range(100)] * 3)
+    assert sketch.estimate() == pytest.approx(100, rel=0.02)
+    assert HyperLogLog().estimate() == 0
+
+
+def test_merge_hll_equals_sketch_of_union(customers):
+    sketches = build_hll_sketches(customers, 'Customer ID', ['Category', 'Month'])
+    keys = [(11, 'January 2025'), (11, 'February 2025'), (17, 'March 2025')]
+    merged = merge_hll(sketches, keys)
+
+    selected = customers.set_index(['Category', 'Month']).loc[keys, 'Customer ID']
+    direct = HyperLogLog().add_many(selected)
+    # Merge (max per register) identik dengan sketch dari union baris mentah
+    np.testing.assert_array_equal(merged.registers, direct.registers)
+    assert _within_bound(merged.estimate(), selected.nunique(), merged)
+
+
+def test_merge_hll_partitions_union(customers):
+    cig = customers['Category'] == 11
+    parts = [
+        build_hll_sketches(customers[~cig], 'Customer ID', ['Category', 'Month']),
+        build_hll_sketches(customers[cig], 'Customer ID', ['Category', 'Month']),
+    ]
+    keys = sorted(customers.groupby(['Category', 'Month']).groups)
+    merged = merge_hll(parts, keys)
+    np.testing.assert_array_equal(merged.registers, HyperLogLog().add_many(customers['Customer ID']).registers)
+    assert merge_hll(parts, [(99, 'January 2025')]) is None
+
+
+def test_hll_roundtrip_and_precision_mismatch():
+    sketch = HyperLogLog().add_many(['a', 'b', 'c'])
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    np.testing.assert_array_equal(restored.registers, sketch.registers)
+    with pytest.raises(ValueError):
+        sketch.merge(HyperLogLog(precision=10))
+
+
+# ==================== t-digest ====================
+
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+
+@pytest.fixture
+def baskets():
+    # Basket size miring ke kanan (lognormal), per Category x Month
+    rng = np.random.default_rng(7)
+    n = 40_000
+    return pd.DataFrame({
+        'Category': rng.choice([11, 14, 17], n),
+        'Month': rng.choice(['January 2025', 'February 2025'], n),
+        'Basket Size': rng.lognormal(11, 1.2, n),
+    })
+
+
+def _rank_error(values, estimates):
+    # Selisih rank empiris estimasi terhadap q yang diminta
+    values = np.sort(values)
+    return np.abs(np.searchsorted(values, estimates) / len(values) - QUANTILES).max()
+
+
+def test_tdigest_quantiles_match_numpy(baskets):
+    values = baskets['Basket Size'].to_numpy()
+    digest = TDigest().add_many(values)
+    assert _rank_error(values, digest.quantile(QUANTILES)) < 0.005
+    assert digest.quantile(0.0) == values.min() and digest.quantile(1.0) == values.max()
+    assert digest.count == len(values)
+
+
+def test_merge_tdigest_matches_selection(baskets):
+    digests = build_tdigests(baskets, ['Basket Size'], ['Category', 'Month'])['Basket Size']
+    keys = [(11, 'January 2025'), (14, 'January 2025'), (17, 'February 2025')]
+    merged = merge_tdigest(digests, keys)
+
+    selected = baskets.set_index(['Category', 'Month']).loc[keys, 'Basket Size'].to_numpy()
+    assert merged.count == len(selected)
+    assert _rank_error(selected, merged.quantile(QUANTILES)) < 0.01
+    assert merge_tdigest(digests, [(99, 'January 2025')]) is None
+
+
+def test_tdigest_roundtrip_and_box_stats(baskets):
+    digest = TDigest().add_many(baskets['Basket Size'])
+    restored = TDigest.from_bytes(digest.to_bytes())
+    np.testing.assert_array_equal(restored.quantile(QUANTILES), digest.quantile(QUANTILES))
+    stats = box_stats(restored)
+    assert stats['lowerfence'] <= stats['q1'] <= stats['median'] <= stats['q3'] <= stats['upperfence']
+    assert np.isnan(TDigest().add_many([np.nan]).quantile(0.5))
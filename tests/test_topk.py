@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.topk import top_k, top_k_all
+
+
+@pytest.fixture
+def rank_table():
+    # Banyak nilai kembar (termasuk di batas K) dan NaN, seperti Kontribusi tanpa Net Sales
+    rng = np.random.default_rng(3)
+    n = 60
+    return pd.DataFrame({
+        'Category': np.arange(100, 100 + n),
+        'Sales Amount': rng.integers(0, 8, n).astype(np.float64) * 1e9,
+        'Kontribusi': np.where(rng.random(n) < 0.2, np.nan, rng.integers(0, 5, n) / 10),
+    })
+
+
+def _brute_force(table, metric, k, ascending):
+    # Sort stabil: tie mengikuti urutan baris, NaN selalu terakhir
+    return table.sort_values(metric, ascending=ascending, kind='stable', na_position='last').head(k)
+
+
+@pytest.mark.parametrize('metric', ['Sales Amount', 'Kontribusi'])
+@pytest.mark.parametrize('ascending', [False, True])
+def test_top_k_matches_stable_sort(rank_table, metric, ascending):
+    for k in range(1, len(rank_table) + 2):
+        expected = _brute_force(rank_table, metric, k, ascending).reset_index(drop=True)
+        pd.testing.assert_frame_equal(top_k(rank_table, metric, k, ascending), expected)
+
+
+def test_top_k_boundary_tie_prefers_earlier_rows():
+    table = pd.DataFrame({'Category': [1, 2, 3, 4, 5], 'NOC': [5.0, 9.0, 5.0, 5.0, 5.0]})
+    assert top_k(table, 'NOC', 3)['Category'].tolist() == [2, 1, 3]
+
+
+def test_top_k_all_per_metric(rank_table):
+    tables = top_k_all(rank_table, ['Sales Amount', 'Kontribusi'], 5)
+    assert list(tables) == ['Sales Amount', 'Kontribusi']
+    for metric, table in tables.items():
+        pd.testing.assert_frame_equal(table, _brute_force(rank_table, metric, 5, False).reset_index(drop=True))
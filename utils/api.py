@@ -0,0 +1,332 @@
+"""API HTTP lokal untuk agregat Promo Dashboard dan Ended Promo (JSON / Arrow)."""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from utils import ended_data, promo_data
+from utils.bitmaps import aggregate
+from utils.conversion import CONVERSION_RATIOS
+from utils.diskcache import code_version, file_hash
+from utils.singleflight import single_flight
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ==================== API lokal ====================
+# python -m utils.api --port 8601; endpoint GET di ROUTES, format JSON atau Arrow IPC stream
+# (?format=arrow / header Accept). Data lewat utils.promo_data / utils.ended_data dengan key
+# disk cache yang sama dengan page; response di-memo per versi data dan diberi ETag
+# (If-None-Match yang cocok dijawab 304).
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = int(os.environ.get('DASHBOARD_API_PORT', 8601))
+RESPONSE_MEMO_ITEMS = 256
+
+JSON_TYPE = 'application/json'
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+
+ENDED_VIEWS = {'promo': 'Per Promo', 'category': 'Per Category'}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ==================== Parameter ====================
+
+def _param(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _list_param(params, name, cast=str):
+    # ?categories=11,14 atau ?categories=11&categories=14; tidak ada = tanpa filter (None)
+    if name not in params:
+        return None
+    items = [item.strip() for value in params[name] for item in value.split(',') if item.strip()]
+    try:
+        return [cast(item) for item in items]
+    except ValueError:
+        raise ApiError(400, f"Parameter '{name}' tidak valid")
+
+
+def _choice(value, options, name):
+    if value not in options:
+        raise ApiError(400, f"Parameter '{name}' harus salah satu dari: {', '.join(map(str, options))}")
+    return value
+
+
+# ==================== Agregat Promo Dashboard ====================
+
+def _promo_state(params):
+    dataset_key = _choice(_param(params, 'dataset', 'all'), list(promo_data.DATASET_PARTITIONS), 'dataset')
+    data = promo_data.load_data(promo_data.DATA_FILE)
+    grains = list(data['rollups']['non_cig'].keys())
+    view = _choice(_param(params, 'view', 'Monthly' if 'Monthly' in grains else grains[0]), grains, 'view')
+    rollup = promo_data.load_rollup(promo_data.DATA_FILE, dataset_key, view)
+    index = promo_data.load_rollup_index(promo_data.DATA_FILE, dataset_key, view)
+    categories = _list_param(params, 'categories', int)
+    periods = _list_param(params, 'periods')
+    categories = index.values['Category'].tolist() if categories is None else categories
+    periods = rollup['Period'].cat.categories.tolist() if periods is None else periods
+    rows = promo_data.select_rows(index, categories, periods)
+    return data, dataset_key, view, categories, periods, (rollup, index, rows)
+
+
+def promo_kpis(params):
+    data, dataset_key, view, categories, periods, (rollup, index, rows) = _promo_state(params)
+    kpis = promo_data.promo_kpis(data, rollup, index, rows, dataset_key, categories,
+                                 promo_data.source_periods(data, view, periods))
+    return {'dataset': dataset_key, 'view': view, 'rows': len(rows), **kpis}
+
+
+def _additive_table(selection, by, extra=None):
+    rollup, index, rows = selection
+    metrics = {c: (c, 'sum') for c in promo_data.PARTITION_MEASURES if c in rollup.columns}
+    table = aggregate(rollup, index, rows, by, {**(extra or {}), **metrics})
+    net_sales = table['Net Sales (by Group Category)'].replace(0, np.nan)
+    table['Kontribusi Sales'] = table['Sales Amount'] / net_sales
+    return table
+
+
+def promo_categories(params):
+    table = _additive_table(_promo_state(params)[-1], ['Category'])
+    table['Share Sales'] = table['Sales Amount'] / table['Sales Amount'].sum()
+    return table
+
+
+def promo_periods(params):
+    state = _promo_state(params)
+    view, selection = state[2], state[-1]
+    if view == 'Yearly':
+        raise ApiError(400, "Endpoint periods membutuhkan view selain Yearly")
+    table = _additive_table(selection, ['Period'], {'Period Start': ('Period Start', 'first')})
+    # Visit Customer level toko (tidak aditif antar category): rata-rata seperti di page
+    visit = aggregate(*selection, ['Period'], {'Visit Customer': ('Visit Customer', 'mean')})
+    table['Visit Customer'] = visit['Visit Customer'].astype(np.float64)
+    table['Conversion Rate'] = table['NOC'] / table['Visit Customer']
+    table['Period'] = table['Period'].astype(str)
+    return table
+
+
+# ==================== Agregat Ended Promo ====================
+
+def _ended_view(params):
+    table = _choice(_param(params, 'table', 'sales'), ['sales', 'qty'], 'table')
+    view = ENDED_VIEWS[_choice(_param(params, 'view', 'promo'), list(ENDED_VIEWS), 'view')]
+    frames = ended_data.load_data(ended_data.DATA_FILE)
+    indexes = ended_data.load_indexes(ended_data.DATA_FILE)
+    rows, dims = ended_data.view_rows(
+        frames, indexes, table, view, _list_param(params, 'categories', float), _list_param(params, 'promos')
+    )
+    return table, view, rows, dims
+
+
+def ended_kpis(params):
+    table, view, rows, dims = _ended_view(params)
+    df, _, total, _ = ended_data.aggregate_view(rows, rows.iloc[:0], dims, view)
+    return {'table': table, 'view': view, 'count': len(df), **total.to_dict()}
+
+
+def ended_rankings(params):
+    table, view, rows, dims = _ended_view(params)
+    df = ended_data.aggregate_view(rows, rows.iloc[:0], dims, view)[0]
+    by = _param(params, 'by', 'Sales Amount' if table == 'sales' else 'Conversion Rate (Claim/Count)')
+    _choice(by, [c for c in df.columns if c not in dims and c != 'Label'], 'by')
+    try:
+        limit = int(_param(params, 'limit', 0))
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        raise ApiError(400, "Parameter 'limit' harus bilangan bulat >= 0")
+    limit = limit or None
+    return df.sort_values(by, ascending=False, kind='stable').head(limit).drop(columns='Label').reset_index(drop=True)
+
+
+def api_index(params):
+    promo = promo_data.load_data(promo_data.DATA_FILE)
+    return {
+        'data_version': data_version(),
+        'promo': {
+            'datasets': list(promo_data.DATASET_PARTITIONS),
+            'views': list(promo['rollups']['non_cig'].keys()),
+            'endpoints': ['/api/promo/kpis', '/api/promo/categories', '/api/promo/periods'],
+        },
+        'ended': {
+            'tables': ['sales', 'qty'],
+            'views': list(ENDED_VIEWS),
+            'ratios': list(CONVERSION_RATIOS),
+            'endpoints': ['/api/ended/kpis', '/api/ended/rankings'],
+        },
+    }
+
+
+ROUTES = {
+    '/api': api_index,
+    '/api/promo/kpis': promo_kpis,
+    '/api/promo/categories': promo_categories,
+    '/api/promo/periods': promo_periods,
+    '/api/ended/kpis': ended_kpis,
+    '/api/ended/rankings': ended_rankings,
+}
+
+
+# ==================== Serialisasi + ETag ====================
+
+def data_version():
+    """Versi data = hash kedua workbook + versi kode utils; berubah = semua memo response invalid."""
+    digest = hashlib.sha1(code_version().encode())
+    for path in (promo_data.DATA_FILE, ended_data.DATA_FILE):
+        digest.update(file_hash(path).encode())
+    return digest.hexdigest()[:16]
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} tidak bisa diserialisasi')
+
+
+def _clean(value):
+    # NaN -> null (JSON standar tidak mengenal NaN)
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items()}
+    if isinstance(value, (float, np.floating)) and value != value:
+        return None
+    return value
+
+
+def to_json(result):
+    if isinstance(result, pd.DataFrame):
+        # orient split: nama kolom sekali, baris sebagai array (ringkas)
+        return result.to_json(orient='split', index=False, date_format='iso', double_precision=15).encode()
+    return json.dumps(_clean(result), default=_json_default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def to_arrow(result):
+    import pyarrow as pa
+    df = result if isinstance(result, pd.DataFrame) else pd.DataFrame([_clean(result)])
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def etag_for(body):
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def respond(path, params, fmt):
+    """(body, etag, content type) untuk satu request; di-memo per versi data."""
+    handler = ROUTES.get(path)
+    if handler is None:
+        raise ApiError(404, f"Endpoint '{path}' tidak ada")
+    key = (path, tuple(sorted((k, tuple(v)) for k, v in params.items() if k != 'format')), fmt, data_version())
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+
+    def compute():
+        result = handler(params)
+        body = to_arrow(result) if fmt == 'arrow' else to_json(result)
+        return body, etag_for(body), ARROW_TYPE if fmt == 'arrow' else JSON_TYPE
+
+    # Request konkuren untuk key yang sama berbagi satu komputasi
+    response = single_flight(('api',) + key, compute)
+    with _memo_lock:
+        _memo[key] = response
+        while len(_memo) > RESPONSE_MEMO_ITEMS:
+            _memo.popitem(last=False)
+    return response
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = 'PromoDashboardAPI/1.0'
+
+    def _send(self, status, body=b'', content_type=JSON_TYPE, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if status != 304:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304 and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        accept = self.headers.get('Accept', '')
+        fmt = _param(params, 'format', 'arrow' if ARROW_TYPE in accept else 'json')
+        try:
+            if fmt not in ('json', 'arrow'):
+                raise ApiError(400, "Parameter 'format' harus json atau arrow")
+            body, etag, content_type = respond(url.path.rstrip('/') or '/api', params, fmt)
+        except ApiError as exc:
+            self._send(exc.status, to_json({'error': str(exc)}))
+            return
+        except FileNotFoundError as exc:
+            self._send(503, to_json({'error': f'File data tidak ditemukan: {exc.filename}'}))
+            return
+        except Exception:
+            # Input tidak valid sudah jadi ApiError 400; selain itu bug / data rusak
+            self.log_error('"%s" gagal', self.requestline)
+            traceback.print_exc()
+            self._send(500, to_json({'error': 'Kesalahan internal server'}))
+            return
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self._send(304, etag=etag)
+        else:
+            self._send(200, body, content_type, etag)
+
+    do_HEAD = do_GET
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Alamat bind (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"API berjalan di http://{args.host}:{args.port}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+# ==================== Bitmap index ====================
+# Index per nilai untuk kolom dimensi (Category, Period, Promo Name), dibangun sekali saat
+# data di-load: satu bitset (1 bit per baris, packed uint8) per nilai. Filter state
+# diselesaikan dengan OR bitset nilai terpilih per kolom lalu AND antar kolom; hasilnya
+# posisi baris terurut. Agregasi berjalan langsung di array kolom pada posisi tersebut
+# memakai kode grup dari index (np.bincount), tanpa membuat salinan DataFrame terfilter.
+# Kolom dengan banyak nilai unik (mis. ribuan promo) tidak diberi bitset per nilai (memori
+# n nilai x n baris bit): seleksinya lewat lookup tabel kode, hasilnya tetap bitset.
+
+MAX_BITMAP_VALUES = 256
+
+
+def _factorize(values):
+    # -> (kode per baris, -1 = NaN; pd.Index nilai dalam urutan grup groupby pandas)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        uniques = pd.Categorical.from_codes(np.arange(len(values.cat.categories)), dtype=values.dtype)
+        return values.cat.codes.to_numpy(dtype=np.int32), pd.Index(uniques)
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int32), pd.Index(uniques)
+
+
+class BitmapIndex:
+    def __init__(self, df, columns):
+        self.n_rows = len(df)
+        self.values = {}     # kolom -> pd.Index nilai terurut
+        self.codes = {}      # kolom -> kode nilai per baris (kode grup untuk agregasi)
+        self.bitmaps = {}    # kolom -> array (n nilai x n byte), baris i = bitset nilai i
+        self.present = {}    # kolom -> bitset baris dengan nilai tidak NaN
+        positions = np.arange(self.n_rows)
+        for col in columns:
+            codes, values = _factorize(df[col])
+            valid = codes >= 0
+            self.values[col], self.codes[col] = values, codes
+            self.present[col] = np.packbits(valid)
+            if len(values) <= MAX_BITMAP_VALUES:
+                bitmaps = np.zeros((len(values), (self.n_rows + 7) // 8), dtype=np.uint8)
+                np.bitwise_or.at(bitmaps, (codes[valid], positions[valid] >> 3),
+                                 (0x80 >> (positions[valid] & 7)).astype(np.uint8))
+                self.bitmaps[col] = bitmaps
+        self._all = np.packbits(np.ones(self.n_rows, dtype=bool))
+
+    def bitmap(self, column, values=None):
+        """Bitset baris yang nilai `column`-nya ada di `values` (None = semua baris)."""
+        if values is None:
+            return self._all
+        n_values = len(self.values[column])
+        selected = np.zeros(n_values + 1, dtype=bool)    # slot terakhir = kode -1 (NaN)
+        codes = self.values[column].get_indexer(list(values))
+        selected[codes[codes >= 0]] = True
+        n_selected = selected.sum()
+        if not n_selected:
+            return np.zeros_like(self._all)
+        bitmaps = self.bitmaps.get(column)
+        if bitmaps is None:
+            return np.packbits(selected[self.codes[column]])
+        # Sebagian besar nilai terpilih: OR bitset nilai yang tidak terpilih lalu dibalik
+        if n_selected > n_values // 2:
+            excluded = np.flatnonzero(~selected[:-1])
+            if not len(excluded):
+                return self.present[column]
+            return ~np.bitwise_or.reduce(bitmaps[excluded], axis=0) & self.present[column]
+        return np.bitwise_or.reduce(bitmaps[selected[:-1]], axis=0)
+
+    def select(self, filters):
+        """Posisi baris (terurut) yang lolos semua filter {kolom: nilai terpilih / None}."""
+        bits = self._all
+        for column, values in filters.items():
+            bits = bits & self.bitmap(column, values)
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def values_in(self, column, rows):
+        """Nilai unik `column` (terurut, tanpa NaN) pada baris `rows`."""
+        codes = np.unique(self.codes[column][rows])
+        return self.values[column].take(codes[codes >= 0])
+
+
+# ==================== Agregasi pada seleksi ====================
+
+def _group_codes(index, rows, by):
+    # Kode gabungan per baris terpilih; baris dengan key NaN dibuang (seperti groupby dropna)
+    group = np.zeros(len(rows), dtype=np.int64)
+    valid = np.ones(len(rows), dtype=bool)
+    for col in by:
+        codes = index.codes[col][rows]
+        valid &= codes >= 0
+        group = group * len(index.values[col]) + codes
+    return group, valid
+
+
+def aggregate(df, index, rows, by, metrics):
+    """Setara df.iloc[rows].groupby(by, observed=True).agg(**metrics).reset_index().
+
+    Kolom `by` harus ada di index. metrics = {nama: (kolom, 'sum' | 'mean' | 'first')}.
+    Sum kolom integer eksak (int64); sum / mean float mengabaikan NaN. by = [] menghasilkan
+    satu baris total (juga saat seleksi kosong, sum = 0).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    group, valid = _group_codes(index, rows, by)
+    rows, group = rows[valid], group[valid]
+    if by:
+        keys, first, group = np.unique(group, return_index=True, return_inverse=True)
+    else:
+        keys, group, first = np.zeros(1, dtype=np.int64), np.zeros(len(rows), dtype=np.int64), np.zeros(1, dtype=np.int64)
+    n_groups = len(keys)
+
+    out = {}
+    remainder = keys
+    for col in reversed(by):
+        size = len(index.values[col])
+        out[col] = index.values[col].take(remainder % size)
+        remainder = remainder // size
+    out = {col: out[col] for col in by}
+
+    for name, (col, func) in metrics.items():
+        values = df[col].to_numpy()[rows]
+        if func == 'first':
+            out[name] = df[col].iloc[rows[first]].to_numpy() if len(rows) else df[col].iloc[:0].to_numpy()
+            continue
+        if np.issubdtype(values.dtype, np.integer):
+            totals = np.zeros(n_groups, dtype=np.int64)
+            np.add.at(totals, group, values)
+            counts = np.bincount(group, minlength=n_groups)
+        else:
+            values = values.astype(np.float64)
+            present = ~np.isnan(values)
+            totals = np.bincount(group[present], weights=values[present], minlength=n_groups)
+            counts = np.bincount(group[present], minlength=n_groups)
+        if func == 'sum':
+            out[name] = totals
+        elif func == 'mean':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[name] = np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+        else:
+            raise ValueError(f"Agregasi '{func}' tidak didukung")
+    return pd.DataFrame(out)
+
+
+def pivot_sum(df, index, rows, row_col, column_col, value_col):
+    """Grid sum value_col (baris row_col x kolom column_col) seperti pivot_table(aggfunc='sum').
+
+    Hanya nilai yang muncul di seleksi; sel tanpa baris = NaN. -> (grid, row_keys, column_keys).
+    """
+    table = aggregate(df, index, rows, [row_col, column_col], {value_col: (value_col, 'sum')})
+    row_codes, row_keys = pd.factorize(table[row_col], sort=True)
+    column_codes, column_keys = pd.factorize(table[column_col], sort=True)
+    grid = np.full((len(row_keys), len(column_keys)), np.nan)
+    grid[row_codes, column_codes] = table[value_col].to_numpy(dtype=np.float64)
+    return grid, pd.Index(row_keys), pd.Index(column_keys)
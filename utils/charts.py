@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from utils.sketches import box_stats, merge_tdigest
+
+# ==================== Dashboard template & figure factory ====================
+# Style bersama (background transparan, font putih Poppins) divalidasi sekali saat import
+# dan diregistrasi sebagai template 'dashboard'. Figure dibangun dalam satu konstruksi
+# dari dict trace + layout, tanpa rangkaian update_layout/update_xaxes yang masing-masing
+# memvalidasi ulang property. Theme Streamlit menimpa nilai di layout template, jadi style
+# bersama tetap ditulis eksplisit di layout tiap figure.
+
+WHITE = '#ffffff'
+TRANSPARENT = 'rgba(0,0,0,0)'
+GRID_COLOR = 'rgba(255,255,255,0.1)'
+BAR_OUTLINE = {'color': 'rgba(255,255,255,0.3)', 'width': 1}
+
+DASHBOARD_LAYOUT = {
+    'paper_bgcolor': TRANSPARENT,
+    'plot_bgcolor': TRANSPARENT,
+    'font': {'color': WHITE, 'family': 'Poppins'},
+}
+
+
+def _register_template():
+    # Dibangun di atas template default aktif ('streamlit' di dalam app, 'plotly' di CLI)
+    base = pio.templates[pio.templates.default] if pio.templates.default else go.layout.Template()
+    template = go.layout.Template(base)
+    template.layout.update(DASHBOARD_LAYOUT)
+    pio.templates['dashboard'] = template
+    return template.to_plotly_json()
+
+
+DASHBOARD_TEMPLATE = _register_template()
+
+
+def _merge(base, override):
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            value = _merge(merged[key], value)
+        merged[key] = value
+    return merged
+
+
+def _plain(value):
+    # Series/Index -> ndarray (sama seperti hasil validasi plotly)
+    if isinstance(value, (pd.Series, pd.Index)):
+        return value.to_numpy()
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def axis(title=None, tick_size=None, tick_color=WHITE, gridcolor=None, title_size=None, title_color=None, **kwargs):
+    """Dict axis layout; title font hanya ditulis bila size/color diberikan."""
+    ax = {}
+    if title is not None or title_size is not None:
+        ax['title'] = {} if title is None else {'text': title}
+        if title_size is not None:
+            ax['title']['font'] = {'color': title_color or tick_color, 'size': title_size}
+    ax['tickfont'] = {'color': tick_color} if tick_size is None else {'color': tick_color, 'size': tick_size}
+    if gridcolor is not None:
+        ax['gridcolor'] = gridcolor
+    ax.update(kwargs)
+    return ax
+
+
+def make_figure(data, layout):
+    """Figure dari list dict trace (dengan key 'type') + layout di atas style dashboard."""
+    layout = _merge(DASHBOARD_LAYOUT, layout)
+    layout['template'] = DASHBOARD_TEMPLATE
+    return go.Figure(data=[_plain(trace) for trace in data], layout=layout, _validate=False)
+
+
+def figure_to_dict(fig):
+    return {'data': [trace.to_plotly_json() for trace in fig.data], 'layout': fig.layout.to_plotly_json()}
+
+
+def figure_from_dict(spec):
+    # Spec berasal dari make_figure (sudah valid), jadi tidak divalidasi ulang
+    return go.Figure(data=spec['data'], layout=spec['layout'], _validate=False)
+
+
+# ==================== Colour scale vectorized ====================
+# Channel dihitung sekaligus dengan numpy, lalu string rgba dirakit dengan np.char.
+
+def rgba_colors(r, g, b, alpha):
+    r, g, b = np.broadcast_arrays(*(np.trunc(np.asarray(c, dtype=np.float64)).astype(np.int64) for c in (r, g, b)))
+    colors = np.char.add('rgba(', r.astype(str))
+    for sep, channel in ((', ', g), (', ', b)):
+        colors = np.char.add(np.char.add(colors, sep), channel.astype(str))
+    return np.char.add(colors, f', {alpha})').tolist()
+
+
+# Ramp per posisi (t = i / n) atau per nilai ternormalisasi (Reds)
+BAR_COLOR_SCALES = {
+    'Blues': lambda t, v: (65 + 150 * (1 - t), 105 + 100 * (1 - t), 225),
+    'Greens': lambda t, v: (50, 150 + 80 * (1 - t), 80 + 80 * (1 - t)),
+    'Reds': lambda t, v: (255, 100 + 100 * (1 - v), 100 * (1 - v)),
+    'Oranges': lambda t, v: (255, 180 - 80 * t, 50),
+}
+
+
+def bar_colors(values, scale):
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if scale not in BAR_COLOR_SCALES:
+        return ['rgba(0, 212, 255, 0.8)'] * n
+    if n == 0:
+        return []
+    peak = values.max()
+    normalized = values / peak if peak > 0 else values
+    return rgba_colors(*BAR_COLOR_SCALES[scale](np.arange(n) / n, normalized), 0.9)
+
+
+# Box plot dari merge t-digest; groups = [(label, [key digest, ...]), ...]
+def create_distribution_chart(digests, groups, y_title, color, value_scale=1):
+    labels, stats = [], []
+    for label, keys in groups:
+        digest = merge_tdigest(digests, keys)
+        if digest is None or digest.count == 0:
+            continue
+        labels.append(label)
+        stats.append({k: v * value_scale for k, v in box_stats(digest).items()})
+
+    return make_figure([{
+        'type': 'box',
+        'x': labels,
+        'q1': [s['q1'] for s in stats],
+        'median': [s['median'] for s in stats],
+        'q3': [s['q3'] for s in stats],
+        'lowerfence': [s['lowerfence'] for s in stats],
+        'upperfence': [s['upperfence'] for s in stats],
+        'marker': {'color': color},
+        'line': {'color': color, 'width': 2},
+        'fillcolor': 'rgba(255,255,255,0.08)',
+        'hoverinfo': 'x+y'
+    }], {
+        'xaxis': axis(tick_size=11),
+        'yaxis': axis(y_title, tick_size=11, gridcolor=GRID_COLOR),
+        'height': 400,
+        'margin': {'l': 80, 'r': 20, 't': 20, 'b': 60},
+        'showlegend': False
+    })
+
+
+# ==================== Chart perbandingan periode ====================
+# Bar periode ini vs periode pembanding per label (tabel delta utils.comparison), warna bar
+# periode ini mengikuti arah perubahan dan teksnya Δ%.
+
+DELTA_UP = '#00f5d4'
+DELTA_DOWN = '#ff6b6b'
+PREVIOUS_COLOR = 'rgba(160,174,192,0.5)'
+
+
+def format_change(pct):
+    """'▲ 12.3%' / '▼ 4.0%' dari perubahan relatif (0.123); '–' jika tidak ada pembanding."""
+    if pct is None or not np.isfinite(pct):
+        return '–'
+    return f"{'▲' if pct >= 0 else '▼'} {abs(pct) * 100:.1f}%"
+
+
+def create_comparison_chart(labels, current, previous, pct, value_title, names=('Periode Ini', 'Pembanding'),
+                            orientation='v'):
+    pct = np.asarray(pct, dtype=np.float64)
+    colors = np.where(pct < 0, DELTA_DOWN, DELTA_UP).tolist()
+    horizontal = orientation == 'h'
+    label_ref, value_ref = ('%{y}', '%{x:,.2f}') if horizontal else ('%{x}', '%{y:,.2f}')
+
+    def bar(values, name, marker, **kwargs):
+        return {
+            'type': 'bar',
+            'x': values if horizontal else labels,
+            'y': labels if horizontal else values,
+            'name': name,
+            'orientation': orientation,
+            'marker': {'color': marker, 'line': BAR_OUTLINE},
+            'hovertemplate': f'<b>{label_ref}</b><br>{name}: {value_ref}<extra></extra>',
+            **kwargs
+        }
+
+    value_axis = axis(value_title, tick_size=11, gridcolor=GRID_COLOR)
+    label_axis = axis('', tick_size=11)
+    return make_figure([
+        bar(previous, names[1], PREVIOUS_COLOR),
+        bar(current, names[0], colors, text=[format_change(p) for p in pct], textposition='outside',
+            textfont={'color': WHITE, 'size': 11})
+    ], {
+        'barmode': 'group',
+        'xaxis': value_axis if horizontal else label_axis,
+        'yaxis': label_axis if horizontal else value_axis,
+        'legend': {
+            'orientation': 'h', 'yanchor': 'bottom', 'y': 1.02, 'xanchor': 'center', 'x': 0.5,
+            'font': {'color': WHITE, 'size': 12}, 'bgcolor': 'rgba(0,0,0,0.3)'
+        },
+        'height': max(400, len(labels) * 45) if horizontal else 450,
+        'margin': {'l': 250 if horizontal else 80, 'r': 80, 't': 60, 'b': 80}
+    })
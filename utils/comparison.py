@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from utils.bitmaps import aggregate
+
+# ==================== Perbandingan antar periode ====================
+# Tabel delta per baris (key x periode): untuk setiap measure nilai periode pembanding,
+# selisih absolut, dan persentase perubahan. Periode pembanding dicari sekali untuk seluruh
+# index periode (Period Start digeser satu periode / satu tahun, lalu lookup posisi), baris
+# pembanding diambil dengan fancy indexing grid (key x periode) -> posisi baris, tanpa join
+# atau filter kedua. Baris tabel sejajar dengan frame sumber, jadi seleksi bitmap yang sama
+# (utils.bitmaps) langsung berlaku; total seleksi dihitung dari kolom current + pembanding.
+
+COMPARE_MODES = {
+    'Periode Sebelumnya': 'previous',
+    'Periode Sama Tahun Lalu': 'year',
+}
+
+# Pergeseran Period Start per grain; Daily / Weekly YoY memakai hari yang sama dalam minggu
+LAGS = {
+    'previous': {
+        'Daily': pd.DateOffset(days=1), 'Weekly': pd.DateOffset(weeks=1), 'Monthly': pd.DateOffset(months=1),
+        'Quarterly': pd.DateOffset(months=3), 'Yearly': pd.DateOffset(years=1),
+    },
+    'year': {
+        'Daily': pd.DateOffset(days=364), 'Weekly': pd.DateOffset(weeks=52), 'Monthly': pd.DateOffset(years=1),
+        'Quarterly': pd.DateOffset(years=1), 'Yearly': pd.DateOffset(years=1),
+    },
+}
+
+PREVIOUS_SUFFIX = ' (Pembanding)'
+DELTA_SUFFIX = ' Δ'
+PCT_SUFFIX = ' Δ%'
+COMPARED_COL = 'Ada Pembanding'
+
+
+def comparison_periods(period_starts, mode, grain):
+    """Posisi periode pembanding untuk setiap periode di index (-1 = tidak ada di data)."""
+    starts = pd.DatetimeIndex(period_starts)
+    positions = starts.get_indexer(starts - LAGS[mode][grain])
+    positions[starts.isna()] = -1
+    return positions
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+def _changes(out, name, current, previous):
+    out[name + PREVIOUS_SUFFIX] = previous
+    out[name + DELTA_SUFFIX] = current - previous
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[name + PCT_SUFFIX] = np.where(previous != 0, (current - previous) / np.abs(previous), np.nan)
+
+
+def delta_table(df, keys, measures, ratios, mode, grain, period_col='Period', start_col='Period Start'):
+    """Tabel delta sejajar baris df (satu baris per key x periode, `period_col` Categorical terurut).
+
+    measures = kolom measure; ratios = {nama: (pembilang, penyebut)} dihitung ulang dari measure.
+    Per measure / ratio: <m>, <m> (Pembanding), <m> Δ, <m> Δ%. Pembanding NaN jika periode
+    pembanding tidak ada atau key tidak punya baris di periode tersebut.
+    """
+    n_rows = len(df)
+    period_codes = df[period_col].cat.codes.to_numpy()
+    period_starts = np.full(len(df[period_col].cat.categories), np.datetime64('NaT'), dtype='datetime64[ns]')
+    period_starts[period_codes] = df[start_col].to_numpy(dtype='datetime64[ns]')
+    lag = comparison_periods(period_starts, mode, grain)
+
+    key_codes = df.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+    row_at = np.full((key_codes.max() + 1 if n_rows else 0, len(period_starts)), -1, dtype=np.int64)
+    row_at[key_codes, period_codes] = np.arange(n_rows)
+    previous_period = lag[period_codes]
+    previous_row = np.where(previous_period >= 0, row_at[key_codes, np.maximum(previous_period, 0)], -1)
+    compared = previous_row >= 0
+
+    out = df[keys + [period_col, start_col]].copy()
+    out['Periode Pembanding'] = pd.Categorical.from_codes(
+        np.where(compared, previous_period, -1), dtype=df[period_col].dtype
+    )
+    out[COMPARED_COL] = compared.astype(np.int8)
+    for col in measures:
+        values = df[col].to_numpy(dtype=np.float64)
+        out[col] = df[col].to_numpy()
+        _changes(out, col, values, np.where(compared, values[previous_row], np.nan))
+    for name, (numerator, denominator) in ratios.items():
+        num = df[numerator].to_numpy(dtype=np.float64)
+        den = df[denominator].to_numpy(dtype=np.float64)
+        current = _ratio(num, den)
+        previous = np.where(compared, current[previous_row], np.nan)
+        out[name] = current
+        _changes(out, name, current, previous)
+    return out
+
+
+def summarize(table, index, rows, by, measures, ratios, mean_cols=(), shared_cols=(), extra=None,
+              period_col='Period'):
+    """Total current vs pembanding per `by` dari baris `rows` tabel delta (satu pass agregasi).
+
+    Hanya baris yang punya pembanding yang dijumlah di sisi pembanding; grup tanpa baris
+    pembanding sama sekali mendapat pembanding NaN. mean_cols = measure non-aditif (rata-rata),
+    shared_cols = measure yang berulang di setiap baris satu periode (mis. NOC level toko):
+    diambil sekali per periode lalu dijumlah antar periode, seperti SHARED_MEASURES di
+    utils.conversion. extra = metrik aggregate tambahan (mis. {'Period Start': ('Period Start', 'first')}).
+    """
+    metrics = {COMPARED_COL: (COMPARED_COL, 'sum'), **(extra or {})}
+    for col in measures:
+        if col in shared_cols:
+            continue
+        func = 'mean' if col in mean_cols else 'sum'
+        metrics[col] = (col, func)
+        metrics[col + PREVIOUS_SUFFIX] = (col + PREVIOUS_SUFFIX, func)
+    out = aggregate(table, index, rows, by, metrics)
+    compared = out.pop(COMPARED_COL).to_numpy() > 0
+    shared = [col for col in measures if col in shared_cols]
+    if shared:
+        # Satu nilai per (by x periode); pembanding satu periode per periode current
+        columns = [c for col in shared for c in (col, col + PREVIOUS_SUFFIX)]
+        level = list(dict.fromkeys(list(by) + [period_col]))
+        per_period = aggregate(table, index, rows, level, {c: (c, 'mean') for c in columns})
+        if by:
+            totals = per_period.groupby(list(by), observed=True)[columns].sum(min_count=1).reset_index()
+            out = out.merge(totals, on=list(by), how='left')
+        else:
+            totals = per_period[columns].sum(min_count=1)
+            out = out.assign(**{c: [totals[c]] * len(out) for c in columns})
+    for col in measures:
+        current = out[col].to_numpy(dtype=np.float64)
+        _changes(out, col, current, np.where(compared, out[col + PREVIOUS_SUFFIX].to_numpy(dtype=np.float64), np.nan))
+    for name, (numerator, denominator) in ratios.items():
+        current = _ratio(out[numerator].to_numpy(dtype=np.float64), out[denominator].to_numpy(dtype=np.float64))
+        previous = _ratio(out[numerator + PREVIOUS_SUFFIX].to_numpy(dtype=np.float64),
+                          out[denominator + PREVIOUS_SUFFIX].to_numpy(dtype=np.float64))
+        out[name] = current
+        _changes(out, name, current, previous)
+    return out
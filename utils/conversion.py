@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# ==================== Conversion metrics (ratio of sums) ====================
+# Conversion rate tidak pernah dirata-rata: base measure dijumlahkan per grouping, lalu
+# semua ratio dihitung sekali sebagai sum / sum dalam satu pass vectorized.
+# Measure "shared" terdefinisi pada level tertentu dan berulang di setiap baris di
+# bawahnya (NOC per periode, Net Sales per category) - di-dedupe dulu pada level itu
+# sebelum dijumlahkan, agar tidak terhitung ganda.
+
+ADDITIVE_MEASURES = ['Total Count', 'Total Claim', 'Sales Amount']
+
+SHARED_MEASURES = {
+    'NOC': ['End of Period Promotion'],
+    'Net Sales (by Category)': ['Category', 'End of Period Promotion'],
+}
+
+CONVERSION_RATIOS = {
+    'Conversion Rate (Claim/Count)': ('Total Claim', 'Total Count'),
+    'Conversion Rate (Count/NOC)': ('Total Count', 'NOC'),
+    'Contribution Sales': ('Sales Amount', 'Net Sales (by Category)'),
+}
+
+
+def _ratio(num, den):
+    num = np.asarray(num, dtype=np.float64)
+    den = np.asarray(den, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den != 0, num / den, np.nan)
+
+
+def conversion_metrics(df, dims):
+    """Agregasi base measure per `dims` dan hitung semua conversion rate sebagai sum / sum.
+
+    dims = [] menghasilkan satu baris total (untuk KPI). Urutan baris dan kolom mengikuti
+    df; kolom ratio yang base measure-nya tidak ada di df dilewati.
+    """
+    additive = [c for c in ADDITIVE_MEASURES if c in df.columns]
+    if dims:
+        out = df.groupby(dims, sort=False, observed=True)[additive].sum().reset_index()
+    else:
+        out = df[additive].sum().to_frame().T.reset_index(drop=True)
+
+    for col, level in SHARED_MEASURES.items():
+        if col not in df.columns:
+            continue
+        unique = df.drop_duplicates(list(dict.fromkeys(dims + level)))
+        if dims:
+            shared = unique.groupby(dims, sort=False, observed=True)[col].sum()
+            out[col] = shared.reindex(pd.MultiIndex.from_frame(out[dims]) if len(dims) > 1 else out[dims[0]]).to_numpy()
+        else:
+            out[col] = unique[col].sum()
+
+    for col, (num, den) in CONVERSION_RATIOS.items():
+        if num in out.columns and den in out.columns:
+            out[col] = _ratio(out[num], out[den])
+
+    return out[[c for c in df.columns if c in out.columns]]
@@ -0,0 +1,226 @@
+import functools
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from utils.charts import figure_from_dict, figure_to_dict
+from utils.parallel import completed_future, submit_figures
+from utils.singleflight import SingleFlight, file_lock
+
+# ==================== Persistent disk cache ====================
+# Cache di disk (bertahan lintas restart / deploy) untuk data hasil parse, agregat, dan
+# figure. Key = namespace + hash isi file sumber + versi kode (hash source utils/ dan
+# modul pemanggil) + argumen; file lama tidak pernah dibaca lagi setelah data/kode
+# berubah dan tersingkir lewat eviction LRU berbasis ukuran.
+# st.cache_data tetap jadi lapisan pertama (in-process); disk cache hanya diakses saat
+# st.cache_data miss, mis. setelah restart server.
+# Pengisian cache bersifat single-flight: miss konkuren untuk key yang sama (antar session
+# maupun antar proses lewat file lock) menunggu satu komputasi, lalu membaca hasilnya.
+
+CACHE_DIR = os.environ.get('DASHBOARD_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'promo_dashboard'))
+MAX_CACHE_BYTES = int(float(os.environ.get('DASHBOARD_CACHE_MAX_MB', 512)) * 1024 * 1024)
+CACHE_FORMAT = 1
+
+_UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+_hash_memo = {}
+_evict_lock = threading.Lock()
+_fill_flight = SingleFlight()
+_figure_flight = SingleFlight()
+
+
+def file_hash(path):
+    """sha1 isi file, di-memo per (path, mtime, size) agar tidak dibaca ulang tiap rerun."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _hash_memo:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def code_version(*paths):
+    """Hash source utils/*.py + file tambahan (mis. page pemanggil)."""
+    files = sorted(glob.glob(os.path.join(_UTILS_DIR, '*.py'))) + [os.path.abspath(p) for p in paths]
+    digest = hashlib.sha1(str(CACHE_FORMAT).encode())
+    for path in files:
+        digest.update(file_hash(path).encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_path(namespace, key_parts):
+    digest = hashlib.sha1(repr(key_parts).encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f'{namespace}-{digest}.pkl')
+
+
+def load(path):
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None, False
+    try:
+        os.utime(path)    # tandai baru dipakai (LRU)
+    except OSError:
+        pass
+    return value, True
+
+
+def store(path, value):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        return
+    evict()
+
+
+def evict(max_bytes=None):
+    # Hapus entry paling lama tidak dipakai sampai total ukuran <= batas
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    with _evict_lock:
+        entries = []
+        for path in glob.glob(os.path.join(CACHE_DIR, '*.pkl')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def _fill(path, compute):
+    with file_lock(path):
+        # Proses lain mungkin sudah mengisi entry selama kita menunggu lock
+        value, hit = load(path)
+        if hit:
+            return value
+        value = compute()
+        store(path, value)
+        return value
+
+
+def _fill_incremental(path, latest_path, compute):
+    # Snapshot terakhir untuk argumen yang sama (versi file lain) diberikan ke fungsi sebagai
+    # `previous`; setelah snapshot baru tersimpan, snapshot lama dihapus (sudah digantikan)
+    previous_path, hit = load(latest_path)
+    previous, previous_hit = load(previous_path) if hit and previous_path != path else (None, False)
+    value = _fill(path, lambda: compute(previous if previous_hit else None))
+    store(latest_path, path)
+    if hit and previous_path != path:
+        try:
+            os.remove(previous_path)
+        except OSError:
+            pass
+    return value
+
+
+def disk_cached(namespace, source_arg='file_path', memory_items=0, incremental=False):
+    """Decorator: simpan hasil fungsi di disk, key dari hash file `source_arg` + versi kode.
+
+    memory_items > 0: n hasil terakhir juga disimpan di memori proses (LRU), untuk pemanggil
+    di luar st.cache_data (API, fungsi lain) agar tidak unpickle ulang tiap panggilan.
+    incremental=True: saat file sumber berubah, fungsi dipanggil dengan previous=<hasil untuk
+    versi file sebelumnya> (None jika tidak ada / versi kode berbeda) agar bisa update parsial.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        module_file = inspect.getsourcefile(func)
+        memory = OrderedDict()
+        memory_lock = threading.Lock()
+
+        def arguments_of(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            if incremental:
+                arguments.pop('previous', None)
+            return arguments
+
+        def key_path(*args, **kwargs):
+            arguments = arguments_of(*args, **kwargs)
+            key_parts = (file_hash(arguments[source_arg]), code_version(module_file), sorted(arguments.items()))
+            return cache_path(namespace, key_parts)
+
+        def latest_path(*args, **kwargs):
+            # Pointer ke snapshot terakhir per argumen (path file, bukan isinya) + versi kode
+            arguments = arguments_of(*args, **kwargs)
+            return cache_path(f'{namespace}-latest', (code_version(module_file), sorted(arguments.items())))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            path = key_path(*args, **kwargs)
+            if memory_items:
+                with memory_lock:
+                    if path in memory:
+                        memory.move_to_end(path)
+                        return memory[path]
+            value, hit = load(path)
+            if not hit and incremental:
+                value = _fill_flight.do(path, lambda: _fill_incremental(
+                    path, latest_path(*args, **kwargs), lambda previous: func(*args, previous=previous, **kwargs)
+                ))
+            elif not hit:
+                value = _fill_flight.do(path, lambda: _fill(path, lambda: func(*args, **kwargs)))
+            if memory_items:
+                with memory_lock:
+                    memory[path] = value
+                    while len(memory) > memory_items:
+                        memory.popitem(last=False)
+            return value
+
+        # Snapshot untuk argumen ini sudah ada di disk (tanpa membaca / unpickle isinya)
+        wrapper.is_cached = lambda *args, **kwargs: os.path.exists(key_path(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def _submit_and_store(path, builders):
+    futures = submit_figures(builders)
+    pending = [len(futures)]
+    pending_lock = threading.Lock()
+
+    def on_done(_):
+        with pending_lock:
+            pending[0] -= 1
+            if pending[0]:
+                return
+        if all(f.exception() is None for f in futures):
+            store(path, [figure_to_dict(f.result()) for f in futures])
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    return futures
+
+
+def submit_cached_figures(namespace, source_file, module_file, state, builders, version=None):
+    """submit_figures dengan cache disk per state (filter); figure disimpan sebagai dict polos.
+
+    Hit: figure dibangun ulang tanpa validasi. Miss: builder dijalankan di worker pool dan
+    hasilnya ditulis ke disk setelah semua future selesai. Session lain yang meminta state
+    yang sama selama build berjalan menerima future yang sama (figure dibagi, read-only).
+    version: versi data yang dicakup state (mis. versi slice); default hash seluruh source_file.
+    """
+    version = file_hash(source_file) if version is None else version
+    path = cache_path(namespace, (version, code_version(module_file), state))
+    cached, hit = load(path)
+    if hit and len(cached) == len(builders):
+        return [completed_future(figure_from_dict(spec)) for spec in cached]
+    return _figure_flight.submit(path, lambda: _submit_and_store(path, builders))
@@ -0,0 +1,65 @@
+import numpy as np
+
+# ==================== Downsampling time-series ====================
+# Series panjang (mis. harian lintas tahun) di-downsample dengan LTTB
+# (Largest-Triangle-Three-Buckets) yang mempertahankan bentuk visual (puncak & lembah),
+# trace diganti WebGL (Scattergl), dan label teks hanya untuk titik ekstrem.
+
+DOWNSAMPLE_THRESHOLD = 500   # maksimum titik per series yang dikirim ke browser
+WEBGL_THRESHOLD = 300        # di atas ini pakai Scattergl
+LABEL_THRESHOLD = 40         # di atas ini label hanya untuk max / min
+
+
+def lttb_indices(y, n_out):
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    x = np.arange(n, dtype=np.float64)
+    y = np.where(np.isnan(y), 0.0, y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Titik acuan = rata-rata bucket berikutnya
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Titik dengan luas segitiga terbesar terhadap titik terpilih sebelumnya
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev]) -
+            (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def downsample_frame(df, y_cols, threshold=DOWNSAMPLE_THRESHOLD):
+    # Gabungan index LTTB semua series agar x tetap sejajar antar trace
+    if len(df) <= threshold:
+        return df
+    per_series = max(3, threshold // len(y_cols))
+    indices = np.unique(np.concatenate([lttb_indices(df[col].to_numpy(), per_series) for col in y_cols]))
+    return df.iloc[indices]
+
+
+def extreme_labels(values, labels):
+    # Semua label jika series pendek, selain itu hanya label titik max / min
+    labels = list(labels)
+    if len(labels) <= LABEL_THRESHOLD:
+        return labels
+    values = np.asarray(values, dtype=np.float64)
+    # Semua NaN (mis. ratio tanpa penyebut): tidak ada titik max / min untuk diberi label
+    if np.isnan(values).all():
+        return [''] * len(labels)
+    keep = {int(np.nanargmax(values)), int(np.nanargmin(values))}
+    return [label if i in keep else '' for i, label in enumerate(labels)]
+
+
+def scatter_type(n_points):
+    return 'scattergl' if n_points > WEBGL_THRESHOLD else 'scatter'
@@ -0,0 +1,354 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.bitmaps import BitmapIndex
+from utils.comparison import delta_table
+from utils.conversion import SHARED_MEASURES, conversion_metrics
+from utils.diskcache import disk_cached
+from utils.intervals import IntervalTree, peak_overlap
+from utils.periods import parse_period, period_label
+from utils.schema import apply_schema, count_bounds, ordered_labels
+from utils.sketches import build_tdigests
+
+# ==================== Ended Promo data ====================
+# Parse workbook Ended Promo dan agregasi conversion per view. Dipakai page Ended Promo (di
+# balik st.cache_data) dan API lokal dengan key disk cache yang sama.
+
+DATA_FILE = 'Final_Summary_Ended_Promo_Jan_2026_Last.xlsx'
+
+# Workbook yang dipilih dari home page (registry) disimpan di session state dengan key ini
+DATA_FILE_STATE = 'ended_data_file'
+
+# Compact dtype plan (lihat utils.schema)
+ENDED_SCHEMA = {
+    'Category': 'code',
+    'Promo Name': 'label',
+    'End of Period Promotion': 'period',
+    'Total Count': 'count',
+    'Total Claim': 'count',
+    'NOC': 'count',
+    'Conversion Rate (Count/NOC)': 'ratio',
+    'Conversion Rate (Claim/Count)': 'ratio',
+    'Sales Amount': 'rupiah',
+    'Net Sales (by Category)': 'rupiah',
+    'Contribution Sales': 'ratio',
+}
+
+# Blok summary per promo (baris 0-based, termasuk header) - dipakai juga oleh registry
+SALES_PROMO_ROWS = slice(6, 22)
+QTY_PROMO_ROWS = slice(6, 16)
+
+# Urutan tabel hasil load_data dan kolom filter yang di-index bitmap (lihat utils.bitmaps)
+VIEW_TABLES = [('sales', 'Per Promo'), ('sales', 'Per Category'), ('qty', 'Per Promo'), ('qty', 'Per Category')]
+INDEX_COLS = ['Category', 'Promo Name']
+
+VIEW_DIMS = {
+    'Per Promo': ['Category', 'Promo Name', 'End of Period Promotion'],
+    'Per Category': ['Category', 'End of Period Promotion'],
+}
+
+
+# Parse sheet Sales dan Qty: summary per promo / per category + digest conversion rate
+@disk_cached('ended_promo_data', memory_items=2)
+def load_data(file_path):
+    xlsx = pd.ExcelFile(file_path)
+
+    # Load raw data
+    df_sales_raw = pd.read_excel(xlsx, sheet_name='Sales', header=None)
+    df_qty_raw = pd.read_excel(xlsx, sheet_name='Qty', header=None)
+
+    # Extract Summary by Promo (Sales) - rows 6-22
+    df_sales_promo = df_sales_raw.iloc[SALES_PROMO_ROWS, :11].copy()
+    df_sales_promo.columns = ['Category', 'Promo Name', 'End of Period Promotion', 'Total Count',
+                              'Total Claim', 'NOC', 'Conversion Rate (Count/NOC)',
+                              'Conversion Rate (Claim/Count)', 'Sales Amount',
+                              'Net Sales (by Category)', 'Contribution Sales']
+    df_sales_promo = df_sales_promo.iloc[1:].reset_index(drop=True)
+
+    # Extract Summary by Category (Sales) - rows 26-33
+    df_sales_cat = df_sales_raw.iloc[26:33, :10].copy()
+    df_sales_cat.columns = ['Category', 'End of Period Promotion', 'Total Count', 'Total Claim',
+                            'NOC', 'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)',
+                            'Sales Amount', 'Net Sales (by Category)', 'Contribution Sales']
+    df_sales_cat = df_sales_cat.iloc[1:].reset_index(drop=True)
+
+    # Convert numeric columns - Sales Promo
+    numeric_cols_promo = ['Category', 'Total Count', 'Total Claim', 'NOC',
+                          'Conversion Rate (Count/NOC)', 'Conversion Rate (Claim/Count)',
+                          'Sales Amount', 'Net Sales (by Category)', 'Contribution Sales']
+    for col in numeric_cols_promo:
+        df_sales_promo[col] = pd.to_numeric(df_sales_promo[col], errors='coerce')
+
+    # Convert numeric columns - Sales Category
+    numeric_cols_cat = ['Category', 'Total Count', 'Total Claim', 'NOC',
+                        'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)',
+                        'Sales Amount', 'Net Sales (by Category)', 'Contribution Sales']
+    for col in numeric_cols_cat:
+        df_sales_cat[col] = pd.to_numeric(df_sales_cat[col], errors='coerce')
+
+    # Extract Summary by Promo (Qty) - rows 6-16
+    df_qty_promo = df_qty_raw.iloc[QTY_PROMO_ROWS, :8].copy()
+    df_qty_promo.columns = ['Category', 'Promo Name', 'End of Period Promotion', 'Total Count',
+                            'Total Claim', 'NOC', 'Conversion Rate (Claim/Count)',
+                            'Conversion Rate (Count/NOC)']
+    df_qty_promo = df_qty_promo.iloc[1:].reset_index(drop=True)
+
+    # Extract Summary by Category (Qty) - rows 20-25
+    df_qty_cat = df_qty_raw.iloc[20:25, :7].copy()
+    df_qty_cat.columns = ['Category', 'End of Period Promotion', 'Total Count', 'Total Claim',
+                          'NOC', 'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)']
+    df_qty_cat = df_qty_cat.iloc[1:].reset_index(drop=True)
+
+    # Convert numeric columns - Qty
+    numeric_cols_qty_promo = ['Category', 'Total Count', 'Total Claim', 'NOC',
+                              'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)']
+    for col in numeric_cols_qty_promo:
+        df_qty_promo[col] = pd.to_numeric(df_qty_promo[col], errors='coerce')
+
+    numeric_cols_qty_cat = ['Category', 'Total Count', 'Total Claim', 'NOC',
+                            'Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)']
+    for col in numeric_cols_qty_cat:
+        df_qty_cat[col] = pd.to_numeric(df_qty_cat[col], errors='coerce')
+
+    # Baris kosong di blok summary (tanpa Category) dibuang, lalu dtype compact; lebar
+    # integer count dari total terbesar di keempat tabel
+    frames = [df.dropna(subset=['Category']).reset_index(drop=True)
+              for df in (df_sales_promo, df_sales_cat, df_qty_promo, df_qty_cat)]
+    bounds = count_bounds(frames, ENDED_SCHEMA)
+    df_sales_promo, df_sales_cat, df_qty_promo, df_qty_cat = (apply_schema(df, ENDED_SCHEMA, bounds) for df in frames)
+
+    # Digest conversion rate per promo (Category x Promo Name), di-merge sesuai filter
+    conversion_cols = ['Conversion Rate (Claim/Count)', 'Conversion Rate (Count/NOC)']
+    digests = {
+        'sales': build_tdigests(df_sales_promo.dropna(subset=['Category']), conversion_cols, ['Category', 'Promo Name']),
+        'qty': build_tdigests(df_qty_promo.dropna(subset=['Category']), conversion_cols, ['Category', 'Promo Name'])
+    }
+
+    return df_sales_promo, df_sales_cat, df_qty_promo, df_qty_cat, digests
+
+
+# Bitmap index Category / Promo Name per tabel, dibangun sekali per versi data
+@disk_cached('ended_promo_index', memory_items=2)
+def load_indexes(file_path):
+    frames = load_data(file_path)
+    return {
+        key: BitmapIndex(df, [c for c in INDEX_COLS if c in df.columns])
+        for key, df in zip(VIEW_TABLES, frames)
+    }
+
+
+def select_view(indexes, table, view_option, categories=None, promos=None):
+    """Posisi baris tabel ('sales' / 'qty') x view yang lolos filter category / promo (None = semua)."""
+    filters = {'Category': categories}
+    if view_option == 'Per Promo':
+        filters['Promo Name'] = promos
+    return indexes[(table, view_option)].select(filters)
+
+
+def promo_options(indexes, table, categories):
+    """Nama promo (terurut) pada category terpilih, untuk pilihan filter promo."""
+    index = indexes[(table, 'Per Promo')]
+    return index.values_in('Promo Name', index.select({'Category': categories})).tolist()
+
+
+def view_rows(frames, indexes, table, view_option, categories=None, promos=None):
+    """Baris sumber untuk satu tabel ('sales' / 'qty') dan view, difilter category / promo.
+
+    frames / indexes = hasil load_data / load_indexes. None = tanpa filter. Kembalikan (rows, dims).
+    """
+    rows = frames[VIEW_TABLES.index((table, view_option))]
+    return rows.iloc[select_view(indexes, table, view_option, categories, promos)], VIEW_DIMS[view_option]
+
+
+# Agregasi per view untuk kedua tab (hasil dibagi antar session: read-only)
+def aggregate_view(sales_rows, qty_rows, dims, view_option):
+    df_sales = conversion_metrics(sales_rows, dims)
+    df_qty = conversion_metrics(qty_rows, dims)
+    sales_total = conversion_metrics(sales_rows, []).iloc[0]
+    qty_total = conversion_metrics(qty_rows, []).iloc[0]
+
+    if view_option == 'Per Promo':
+        df_sales['Label'] = df_sales['Promo Name'].apply(lambda x: x[:35] + '...' if len(str(x)) > 35 else x)
+        df_qty['Label'] = df_qty['Promo Name'].apply(lambda x: x[:35] + '...' if len(str(x)) > 35 else x)
+    else:
+        df_sales['Label'] = 'Category ' + df_sales['Category'].astype(int).astype(str)
+        df_qty['Label'] = 'Category ' + df_qty['Category'].astype(int).astype(str)
+
+    return df_sales, df_qty, sales_total, qty_total
+
+
+# ==================== Timeline promo ====================
+# Workbook hanya memuat End of Period Promotion (bulan, atau tanggal berakhir), tanpa tanggal
+# mulai: promo dianggap aktif dari awal bulan periode tersebut sampai akhir periode (label
+# bulan) atau tanggal berakhirnya. Rentang per promo dihitung saat workbook di-parse (disk
+# cache per versi file); timeline lintas workbook arsip di-index dengan IntervalTree per hari.
+
+TIMELINE_COLS = ['Category', 'Promo Name', 'Table', 'Start', 'End', 'Total Count', 'Total Claim']
+
+
+def promo_intervals(df_sales_promo, df_qty_promo):
+    """Satu baris per promo (tabel Sales dan Qty) dengan rentang aktif [Start, End] inklusif."""
+    rows = pd.concat([
+        df.assign(Table=table, **{'Promo Name': df['Promo Name'].astype(str).str.strip()})
+        for table, df in (('Sales', df_sales_promo), ('Qty', df_qty_promo))
+    ], ignore_index=True)
+    labels = rows['End of Period Promotion'].astype(str)
+    ends = pd.Series(parse_period(labels), index=rows.index)
+    is_month = pd.to_datetime(labels, format='%B %Y', errors='coerce').notna()
+    rows['Start'] = ends.dt.to_period('M').dt.start_time
+    rows['End'] = ends.where(~is_month, ends + pd.offsets.MonthEnd(0)).dt.normalize()
+    return rows.loc[ends.notna(), TIMELINE_COLS].reset_index(drop=True)
+
+
+@disk_cached('ended_promo_intervals', memory_items=16)
+def load_intervals(file_path):
+    df_sales_promo, _, df_qty_promo, _, _ = load_data(file_path)
+    return promo_intervals(df_sales_promo, df_qty_promo)
+
+
+def _days(dates):
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def build_timeline(paths):
+    """(rentang promo semua workbook + kolom Workbook, IntervalTree per hari) untuk arsip."""
+    timeline = pd.concat(
+        [load_intervals(path).assign(Workbook=path) for path in paths], ignore_index=True
+    )
+    return timeline, IntervalTree(_days(timeline['Start']), _days(timeline['End']) + 1)
+
+
+def active_promos(timeline, tree, start, end):
+    """Promo yang aktif pada rentang tanggal [start, end] (inklusif), rentang dipotong ke window."""
+    first, last = _days([start])[0], _days([end])[0]
+    active = timeline.iloc[tree.overlapping(first, last + 1)].copy()
+    active['Active Start'] = active['Start'].clip(lower=pd.Timestamp(start))
+    active['Active End'] = active['End'].clip(upper=pd.Timestamp(end))
+    active['Active Days'] = (active['Active End'] - active['Active Start']).dt.days + 1
+    return active.reset_index(drop=True)
+
+
+def timeline_summary(active):
+    """KPI timeline: promo aktif, category, puncak promo berjalan bersamaan, total promo-hari."""
+    return {
+        'promos': len(active),
+        'categories': active['Category'].nunique(),
+        'peak': peak_overlap(_days(active['Active Start']), _days(active['Active End']) + 1),
+        'promo_days': int(active['Active Days'].sum()),
+    }
+
+
+def category_overlap(active):
+    """Per category: promo aktif, puncak promo berjalan bersamaan, dan total promo-hari."""
+    rows = []
+    for category, group in active.groupby('Category', sort=True):
+        rows.append({
+            'Category': category,
+            'Promo Aktif': len(group),
+            'Puncak Bersamaan': peak_overlap(_days(group['Active Start']), _days(group['Active End']) + 1),
+            'Promo-Hari': int(group['Active Days'].sum()),
+        })
+    return pd.DataFrame(rows, columns=['Category', 'Promo Aktif', 'Puncak Bersamaan', 'Promo-Hari'])
+
+
+# ==================== Drill-down dari Promo Dashboard ====================
+# Index category -> promo -> periode berakhir dari tabel Per Promo, dibangun sekali per versi
+# workbook. Promo Dashboard memakainya untuk menandai category yang punya promo berakhir dan
+# mengisi filter page Ended Promo saat category diklik; page Ended Promo membaca ringkasan
+# drill-down dari index yang sama, tanpa memfilter ulang tabel.
+
+# Category hasil klik di Promo Dashboard, dibaca (lalu dihapus) oleh page Ended Promo
+DRILLDOWN_STATE = 'ended_drilldown'
+
+
+@disk_cached('ended_promo_drilldown', memory_items=2)
+def load_drilldown(file_path):
+    """{category: {'sales' / 'qty': {promo: [periode berakhir, ...]}}, promo & periode terurut."""
+    frames = load_data(file_path)
+    drilldown = {}
+    for table in ('sales', 'qty'):
+        df = frames[VIEW_TABLES.index((table, 'Per Promo'))]
+        keys = df[VIEW_DIMS['Per Promo']].dropna().drop_duplicates().sort_values(VIEW_DIMS['Per Promo'])
+        for category, promo, period in keys.itertuples(index=False):
+            promos = drilldown.setdefault(int(category), {'sales': {}, 'qty': {}})[table]
+            promos.setdefault(promo, []).append(str(period))
+    return drilldown
+
+
+def drilldown_filters(drilldown, category):
+    """Session state filter page Ended Promo (view Per Promo) untuk satu category dari index."""
+    entry = drilldown.get(category, {'sales': {}, 'qty': {}})
+    return {
+        'ended_view': 'Per Promo',
+        'cat_sales_promo': [category] if entry['sales'] else [],
+        'promo_sales': list(entry['sales']),
+        'cat_qty_promo': [category] if entry['qty'] else [],
+        'promo_qty': list(entry['qty']),
+    }
+
+
+# ==================== Perbandingan antar bulan ====================
+# Satu workbook biasanya hanya memuat satu bulan berakhir, jadi periode pembanding berasal
+# dari workbook arsip bulan lain: tiap workbook diringkas per key x bulan berakhir (disk cache
+# per versi file), lalu tabel delta (utils.comparison) dibangun sekali per kumpulan versi
+# arsip x mode dan di-index bitmap seperti tabel view.
+
+COMPARISON_MEASURES = {
+    'sales': ['Total Count', 'Total Claim', 'NOC', 'Sales Amount'],
+    'qty': ['Total Count', 'Total Claim', 'NOC'],
+}
+COMPARISON_RATIOS = {
+    'Conversion Rate (Claim/Count)': ('Total Claim', 'Total Count'),
+    'Conversion Rate (Count/NOC)': ('Total Count', 'NOC'),
+}
+# NOC level toko, berulang di setiap baris satu bulan berakhir: tidak dijumlah antar baris
+COMPARISON_SHARED = [col for col in SHARED_MEASURES if col in COMPARISON_MEASURES['sales']]
+
+
+def monthly_rollup(df, table, view):
+    """Measure satu tabel view per key x bulan berakhir (Period Start = awal bulan)."""
+    keys = VIEW_DIMS[view][:-1]
+    ends = pd.Series(parse_period(df['End of Period Promotion'].astype(str)), index=df.index)
+    df = df.assign(**{'Period Start': ends.dt.to_period('M').dt.start_time}).dropna(subset=['Period Start'])
+    return df.groupby(keys + ['Period Start'], observed=True).agg(**{
+        col: (col, 'max' if col in COMPARISON_SHARED else 'sum') for col in COMPARISON_MEASURES[table]
+    }).reset_index()
+
+
+@disk_cached('ended_promo_monthly', memory_items=16)
+def load_monthly(file_path):
+    """{(table, view): monthly_rollup} untuk satu workbook."""
+    return {
+        (table, view): monthly_rollup(df, table, view)
+        for (table, view), df in zip(VIEW_TABLES, load_data(file_path))
+    }
+
+
+def comparison_table(monthly_frames, table, view, mode):
+    """(tabel delta, BitmapIndex Category / Promo Name / Period) dari monthly_rollup beberapa workbook.
+
+    Key x bulan yang muncul lebih dari sekali diambil dari frame terakhir.
+    """
+    keys = VIEW_DIMS[view][:-1]
+    monthly = pd.concat(monthly_frames, ignore_index=True)
+    monthly = monthly.drop_duplicates(keys + ['Period Start'], keep='last')
+    if 'Promo Name' in keys:
+        monthly['Promo Name'] = monthly['Promo Name'].astype(str).astype('category')
+    monthly = monthly.sort_values(keys + ['Period Start']).reset_index(drop=True)
+    monthly.insert(len(keys), 'Period', ordered_labels(period_label(monthly['Period Start'], 'Monthly')))
+    comparison = delta_table(monthly, keys, COMPARISON_MEASURES[table], COMPARISON_RATIOS, mode, 'Monthly')
+    return comparison, BitmapIndex(comparison, keys + ['Period'])
+
+
+def build_comparison(paths, mode):
+    """{(table, view): comparison_table} lintas workbook arsip.
+
+    Key x bulan yang ada di beberapa workbook diambil dari workbook yang terakhir diubah.
+    """
+    paths = sorted(paths, key=os.path.getmtime)
+    return {
+        (table, view): comparison_table([load_monthly(path)[(table, view)] for path in paths], table, view, mode)
+        for table, view in VIEW_TABLES
+    }
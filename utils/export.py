@@ -0,0 +1,143 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from utils.singleflight import single_flight
+
+# ==================== Export data terfilter ====================
+# File hanya dibuat saat user menekan tombol, ditulis per chunk ke disk (tanpa membangun
+# satu bytes object besar di memori), dan di-cache per filter state: rerun / user lain
+# dengan filter yang sama langsung memakai file yang sudah ada.
+# st.download_button menyimpan isi file di memori server (media file manager) selama session
+# aktif, jadi file di atas MAX_DOWNLOAD_BYTES tidak ditawarkan untuk download.
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'promo_dashboard_exports')
+EXPORT_CHUNK_ROWS = 50_000
+MAX_EXPORT_FILES = 50
+MAX_DOWNLOAD_BYTES = int(float(os.environ.get('DASHBOARD_EXPORT_MAX_MB', 100)) * 1024 * 1024)
+
+
+def _chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield start, df.iloc[start:start + chunk_rows]
+
+
+def write_csv(df, path):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for start, chunk in _chunks(df):
+            chunk.to_csv(f, index=False, header=start == 0)
+
+
+def write_parquet(df, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    writer = None
+    try:
+        for _, chunk in _chunks(df):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_xlsx(df, path):
+    from openpyxl import Workbook
+    
+    # write_only: baris langsung di-flush ke file, tidak disimpan sebagai cell object
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Data')
+    ws.append([str(c) for c in df.columns])
+    for _, chunk in _chunks(df):
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            ws.append([str(v) if isinstance(v, pd.Period) else v for v in row])
+    wb.save(path)
+
+
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv', write_csv),
+    'Excel (xlsx)': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', write_xlsx),
+    'Parquet': ('parquet', 'application/octet-stream', write_parquet)
+}
+
+
+def export_path(file_stem, state, fmt):
+    ext = EXPORT_FORMATS[fmt][0]
+    digest = hashlib.sha1(repr(state).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(EXPORT_DIR, f'{file_stem}_{digest}.{ext}')
+
+
+def _write_export(df, path, fmt):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    # Session = thread dalam satu proses: nama temp per proses + thread
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    EXPORT_FORMATS[fmt][2](df() if callable(df) else df, tmp_path)
+    os.replace(tmp_path, path)
+    _evict_old_exports()
+    return path
+
+
+def build_export(df, path, fmt):
+    # Session dengan filter state yang sama menunggu satu build file yang sama
+    return single_flight(('export', path), lambda: _write_export(df, path, fmt))
+
+
+def _mtime(path):
+    # File bisa dihapus eviction session lain di antara listdir dan stat
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+def _evict_old_exports():
+    files = [os.path.join(EXPORT_DIR, f) for f in os.listdir(EXPORT_DIR) if not f.endswith('.tmp')]
+    files.sort(key=_mtime, reverse=True)
+    for old in files[MAX_EXPORT_FILES:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+def render_export(df, file_stem, state, key):
+    # state = tuple hashable yang mewakili filter + versi data; df boleh berupa fungsi tanpa
+    # argumen (mis. materialisasi seleksi bitmap) yang baru dipanggil saat file dibuat
+    col_fmt, col_btn = st.columns([1, 2])
+    with col_fmt:
+        fmt = st.selectbox("📄 Format", options=list(EXPORT_FORMATS.keys()), key=f'{key}_format',
+                           label_visibility='collapsed')
+    
+    ext, mime, _ = EXPORT_FORMATS[fmt]
+    path = export_path(file_stem, state, fmt)
+    with col_btn:
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            # Belum dibuat, atau baru saja dihapus eviction session lain
+            if not st.button(f"⚙️ Siapkan Download ({ext.upper()})", key=f'{key}_prepare'):
+                return
+            with st.spinner("Menyiapkan file..."):
+                build_export(df, path, fmt)
+            f = open(path, 'rb')
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size > MAX_DOWNLOAD_BYTES:
+                st.warning(f"⚠️ File {ext.upper()} {size / 1024 / 1024:,.1f} MB melebihi batas download "
+                           f"{MAX_DOWNLOAD_BYTES / 1024 / 1024:,.1f} MB. Persempit filter atau pilih Parquet.")
+                return
+            st.download_button(
+                label=f"📥 Download Data ({ext.upper()})",
+                data=f,
+                file_name=f'{file_stem}.{ext}',
+                mime=mime,
+                key=f'{key}_download'
+            )
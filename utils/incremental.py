@@ -0,0 +1,62 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# ==================== Incremental maintenance ====================
+# Workbook yang dipublish ulang biasanya hanya mengoreksi / menambah satu bulan. Setiap
+# slice (mis. Category x Month) diberi hash isi baris; slice yang hash-nya berubah saja yang
+# dihitung ulang, sisanya diambil dari snapshot sebelumnya. Key cache turunan (agregat, figure)
+# memakai versi slice yang dicakup filter, bukan hash seluruh file, sehingga filter state yang
+# tidak menyentuh slice berubah tetap hit setelah update.
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def row_hashes(df, key_cols):
+    """{key tuple: hash} dari isi semua baris per key; urutan baris tidak berpengaruh."""
+    if df.empty:
+        return {}
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    out = {}
+    for key, idx in df.groupby(key_cols, sort=False, observed=True).indices.items():
+        key = key if isinstance(key, tuple) else (key,)
+        out[tuple(_plain(k) for k in key)] = hashlib.sha1(np.sort(hashes[idx]).tobytes()).hexdigest()[:16]
+    return out
+
+
+def combine_hashes(*hash_maps):
+    """Gabungkan beberapa hash map (mis. satu per sheet) menjadi satu hash per key."""
+    keys = set().union(*hash_maps)
+    return {
+        key: hashlib.sha1('|'.join(h.get(key, '') for h in hash_maps).encode()).hexdigest()[:16]
+        for key in keys
+    }
+
+
+def changed_keys(old, new):
+    """Key yang ditambah, dihapus, atau isinya berubah."""
+    return {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
+
+def slice_version(hashes, keys):
+    """Versi sekumpulan slice: berubah hanya jika salah satu slice di `keys` berubah."""
+    digest = hashlib.sha1()
+    for key in sorted({tuple(_plain(k) for k in key) for key in keys}, key=repr):
+        digest.update(repr((key, hashes.get(key))).encode())
+    return digest.hexdigest()[:16]
+
+
+def key_mask(df, key_cols, keys):
+    """Mask baris df yang key-nya ada di `keys`."""
+    keys = set(keys)
+    return np.fromiter((key in keys for key in zip(*(df[c] for c in key_cols))), dtype=bool, count=len(df))
+
+
+def rebuild_changed(previous, fresh, changed):
+    """{key: value} dari previous untuk key yang tidak berubah, ditimpa hasil rebuild `fresh`."""
+    merged = {key: value for key, value in previous.items() if key not in changed}
+    merged.update(fresh)
+    return merged
@@ -0,0 +1,96 @@
+import numpy as np
+
+# ==================== Interval index ====================
+# Index interval statis (implicit augmented interval tree, seperti cgranges): interval
+# diurutkan menurut start dan disimpan dalam array; node di posisi i berada pada level k =
+# jumlah bit 1 di ujung i, anaknya i -/+ 2^(k-1), dan setiap node menyimpan max end subtree.
+# Query titik / rentang O(log n + jumlah hasil) tanpa scan seluruh interval; jumlah interval
+# aktif pada satu titik O(log n) dari array start / end terurut. Interval half-open
+# [start, end) dalam integer (mis. nomor hari).
+
+SCAN_LEVEL = 8    # subtree level <= ini (<= 511 interval) di-scan vectorized, lebih cepat dari traversal
+
+
+def _max_ends(ends):
+    # max end per node, dibangun bottom-up per level (vectorized per level)
+    n = len(ends)
+    max_end = ends.copy()
+    if n == 0:
+        return max_end, -1
+    last_i = (n - 1) & ~1    # leaf paling kanan
+    last = max_end[last_i]
+    k = 1
+    while (1 << k) <= n:
+        x = 1 << (k - 1)
+        nodes = np.arange((x << 1) - 1, n, x << 2)
+        right = nodes + x
+        right_max = np.where(right < n, max_end[np.minimum(right, n - 1)], last)
+        max_end[nodes] = np.maximum.reduce([max_end[nodes], max_end[nodes - x], right_max])
+        last_i = last_i - x if (last_i >> k) & 1 else last_i + x
+        if last_i < n and max_end[last_i] > last:
+            last = max_end[last_i]
+        k += 1
+    return max_end, k - 1
+
+
+class IntervalTree:
+    def __init__(self, starts, ends):
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        self.order = np.lexsort((ends, starts))    # posisi interval asli per node
+        self.starts = starts[self.order]
+        self.ends = ends[self.order]
+        self.sorted_ends = np.sort(ends)
+        self.max_end, self.root_level = _max_ends(self.ends)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, start, end):
+        """Posisi (urutan input) interval yang beririsan dengan [start, end), urut menurut start."""
+        n = len(self.starts)
+        found = []
+        if n == 0 or start >= end:
+            return np.array(found, dtype=np.int64)
+        starts, ends, max_end = self.starts, self.ends, self.max_end
+        stack = [(self.root_level, (1 << self.root_level) - 1, False)]
+        while stack:
+            level, node, left_done = stack.pop()
+            if level <= SCAN_LEVEL:
+                first = node >> level << level
+                last = min(first + (1 << (level + 1)) - 1, n)
+                stop = first + np.searchsorted(starts[first:last], end)
+                hits = first + np.flatnonzero(ends[first:stop] > start)
+                found.extend(hits.tolist())
+            elif not left_done:
+                stack.append((level, node, True))
+                child = node - (1 << (level - 1))
+                if child >= n or max_end[child] > start:
+                    stack.append((level - 1, child, False))
+            elif node < n and starts[node] < end:
+                if start < ends[node]:
+                    found.append(node)
+                stack.append((level - 1, node + (1 << (level - 1)), False))
+        return self.order[np.array(found, dtype=np.int64)]
+
+    def at(self, point):
+        """Posisi interval yang aktif pada `point` (start <= point < end)."""
+        return self.overlapping(point, point + 1)
+
+    def count_at(self, points):
+        """Jumlah interval aktif per titik: #(start <= p) - #(end <= p), O(log n) per titik."""
+        points = np.asarray(points, dtype=np.int64)
+        return (np.searchsorted(self.starts, points, side='right')
+                - np.searchsorted(self.sorted_ends, points, side='right'))
+
+
+def peak_overlap(starts, ends):
+    """Jumlah maksimum interval [start, end) yang aktif bersamaan (sweep event terurut)."""
+    starts = np.asarray(starts, dtype=np.int64)
+    if not len(starts):
+        return 0
+    points = np.concatenate([starts, np.asarray(ends, dtype=np.int64)])
+    deltas = np.concatenate([np.ones(len(starts), dtype=np.int64), -np.ones(len(starts), dtype=np.int64)])
+    # Pada titik yang sama end (-1) diproses sebelum start (+1): interval bersebelahan tidak overlap
+    order = np.lexsort((deltas, points))
+    return int(np.cumsum(deltas[order]).max())
@@ -0,0 +1,67 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# ==================== Parallel figure build ====================
+# Figure yang saling independen dibangun di worker pool (dibagi semua session), lalu
+# diambil lewat future sesuai urutan halaman - chart pertama bisa tampil selagi sisanya
+# masih dibangun. Builder tidak boleh memanggil st.*: elemen Streamlit hanya boleh dibuat
+# dari thread script. Tanpa pool (1 worker) builder ditunda sampai result() pertama, jadi
+# chart tetap dibangun dan tampil satu per satu sesuai urutan halaman.
+
+FIGURE_WORKERS = int(os.environ.get('DASHBOARD_FIGURE_WORKERS', min(4, os.cpu_count() or 1)))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FIGURE_WORKERS, thread_name_prefix='figure')
+    return _executor
+
+
+def completed_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+class DeferredFuture(Future):
+    """Future yang builder-nya dijalankan di thread pemanggil result() / exception() pertama."""
+
+    def __init__(self, builder):
+        super().__init__()
+        self._builder = builder
+        self._run_lock = threading.Lock()
+
+    def _run(self):
+        # Callback done dijalankan di dalam set_result (lock masih dipegang) dan boleh
+        # memanggil result() lagi: future yang sudah selesai tidak mengambil lock
+        if self.done():
+            return
+        with self._run_lock:
+            if self.done():
+                return
+            try:
+                self.set_result(self._builder())
+            except Exception as exc:
+                self.set_exception(exc)
+
+    def result(self, timeout=None):
+        self._run()
+        return super().result(timeout)
+
+    def exception(self, timeout=None):
+        self._run()
+        return super().exception(timeout)
+
+
+def submit_figures(builders):
+    """Jalankan builder (callable tanpa argumen) dan kembalikan future sesuai urutan input."""
+    if FIGURE_WORKERS <= 1 or len(builders) < 2:
+        return [DeferredFuture(builder) for builder in builders]
+    executor = _get_executor()
+    return [executor.submit(builder) for builder in builders]
@@ -0,0 +1,46 @@
+import pandas as pd
+
+# ==================== Additive partitions ====================
+# Dataset disimpan sebagai partisi aditif (mis. Non Cigarette + Cigarette). Total
+# dihitung dari jumlah partisi; ratio (Kontribusi) dihitung ulang sebagai sum / sum.
+# shared_cols = atribut per key yang sama di semua partisi (mis. Visit Customer),
+# tidak dijumlahkan.
+
+
+def _keep_dtype(values, dtype):
+    if pd.api.types.is_integer_dtype(dtype):
+        return values.astype(dtype)
+    return values
+
+
+def subtract_partition(total_df, base_df, keys, measures, shared_cols=()):
+    # Partisi delta = total - base; hanya baris yang berbeda yang disimpan
+    shared_cols = list(shared_cols)
+    merged = total_df[keys + shared_cols + measures].merge(
+        base_df[keys + measures], on=keys, how='outer', suffixes=('', '_base')
+    )
+    delta = merged[keys + shared_cols].copy()
+    for col in measures:
+        delta[col] = _keep_dtype(merged[col].fillna(0) - merged[col + '_base'].fillna(0), total_df[col].dtype)
+    changed = (delta[measures] != 0).any(axis=1)
+    delta = delta[[c for c in total_df.columns if c in delta.columns]]
+    return delta[changed].reset_index(drop=True)
+
+
+def add_partitions(base_df, delta_df, keys, measures, shared_cols=(), ratio_cols=None, columns=None):
+    # base + delta (outer join pada keys)
+    shared_cols = list(shared_cols)
+    merged = base_df.merge(
+        delta_df[keys + shared_cols + measures], on=keys, how='outer', suffixes=('', '_delta')
+    )
+    for col in measures:
+        merged[col] = _keep_dtype(merged[col].fillna(0) + merged[col + '_delta'].fillna(0), base_df[col].dtype)
+    for col in shared_cols:
+        values = merged[col].combine_first(merged[col + '_delta'])
+        merged[col] = values if values.isna().any() else _keep_dtype(values, base_df[col].dtype)
+    for col, (num, den) in (ratio_cols or {}).items():
+        merged[col] = merged[num] / merged[den]
+    merged = merged.drop(columns=[c + '_delta' for c in shared_cols + measures])
+    if columns is not None:
+        merged = merged[[c for c in columns if c in merged.columns]]
+    return merged.sort_values(keys).reset_index(drop=True)
@@ -0,0 +1,145 @@
+import pandas as pd
+
+# ==================== Period dimension ====================
+# Dimensi waktu lintas tahun: setiap tanggal / bulan di-map ke periode Daily, Weekly
+# (ISO week), Monthly, Quarterly dan Yearly. Rollup per grain dihitung sekali saat load
+# sehingga ganti granularity cukup lookup tabel, tanpa groupby ulang.
+
+GRAINS = ['Daily', 'Weekly', 'Monthly', 'Quarterly', 'Yearly']
+
+GRAIN_TITLES = {
+    'Daily': 'Tanggal',
+    'Weekly': 'Minggu',
+    'Monthly': 'Bulan',
+    'Quarterly': 'Kuartal',
+    'Yearly': 'Tahun'
+}
+
+GRAIN_UNITS = {
+    'Daily': 'hari',
+    'Weekly': 'minggu',
+    'Monthly': 'bulan',
+    'Quarterly': 'kuartal',
+    'Yearly': 'tahun'
+}
+
+
+def parse_period(values):
+    # 'January 2025', '2025-01', datetime, dll -> Timestamp
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.to_datetime(values)
+    parsed = pd.to_datetime(values, format='%B %Y', errors='coerce')
+    missing = parsed.isna() & pd.Series(values).notna().to_numpy()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(pd.Series(values)[missing], errors='coerce').to_numpy()
+    return parsed
+
+
+def detect_grain(dates):
+    dates = pd.Series(pd.to_datetime(dates)).dropna()
+    if dates.empty or (dates.dt.day == 1).all():
+        return 'Monthly'
+    return 'Daily'
+
+
+def available_grains(source_grain):
+    return GRAINS[GRAINS.index(source_grain):]
+
+
+def period_start(dates, grain):
+    dates = pd.Series(pd.to_datetime(dates)).dt.normalize()
+    if grain == 'Daily':
+        return dates
+    if grain == 'Weekly':
+        return dates - pd.to_timedelta(dates.dt.weekday, unit='D')
+    freq = {'Monthly': 'M', 'Quarterly': 'Q', 'Yearly': 'Y'}[grain]
+    return dates.dt.to_period(freq).dt.start_time
+
+
+def period_label(starts, grain, short=False, compact=False):
+    # short = tanpa tahun, compact = nama bulan disingkat (Jan, Feb, ...)
+    starts = pd.Series(pd.to_datetime(starts))
+    if grain == 'Daily':
+        return starts.dt.strftime('%d %b' if short else '%d %b %Y')
+    if grain == 'Weekly':
+        iso = starts.dt.isocalendar()
+        week = 'W' + iso['week'].astype(str).str.zfill(2)
+        return week if short else iso['year'].astype(str) + '-' + week
+    if grain == 'Monthly':
+        month = '%b' if compact else '%B'
+        return starts.dt.strftime(month if short else month + ' %Y')
+    if grain == 'Quarterly':
+        quarter = 'Q' + starts.dt.quarter.astype(str)
+        return quarter if short else quarter + ' ' + starts.dt.year.astype(str)
+    return starts.dt.year.astype(str)
+
+
+def axis_labels(starts, grain, compact=False):
+    # Label sumbu chart: tahun dihilangkan jika seluruh periode berada di tahun yang sama
+    starts = pd.Series(pd.to_datetime(starts))
+    short = grain != 'Yearly' and starts.dt.year.nunique() == 1
+    return period_label(starts, grain, short=short, compact=compact).tolist()
+
+
+def ordered_periods(labels, starts):
+    # Categorical label periode yang terurut kronologis
+    labels = pd.Series(labels).astype(str).reset_index(drop=True)
+    order = pd.unique(labels.iloc[pd.Series(starts).reset_index(drop=True).argsort(kind='stable')])
+    return pd.Categorical(labels, categories=order, ordered=True)
+
+
+def build_calendar(source_periods, source_grain):
+    # Satu baris per periode sumber -> label setiap grain (untuk mapping filter ke sketch key)
+    source = pd.Series(pd.unique(pd.Series(source_periods).dropna()))
+    starts = parse_period(source)
+    calendar = pd.DataFrame({'Source': source.to_numpy(), 'Date': starts})
+    for grain in available_grains(source_grain):
+        calendar[grain] = period_label(period_start(starts, grain), grain).to_numpy()
+    return calendar.sort_values('Date').reset_index(drop=True)
+
+
+def _rollup(df, starts, grain, dims, sum_cols, ratio_cols):
+    grouped = df[dims + sum_cols].assign(**{'Period Start': period_start(starts, grain).to_numpy()})
+    out = grouped.groupby(dims + ['Period Start'], sort=True)[sum_cols].sum(min_count=1).reset_index()
+    for col, (num, den) in ratio_cols.items():
+        out[col] = out[num] / out[den]
+    out.insert(len(dims), 'Period', period_label(out['Period Start'], grain).to_numpy())
+    return out
+
+
+def _finish_rollup(out, dims):
+    out['Period'] = ordered_periods(out['Period'], out['Period Start'])
+    return out.sort_values(dims + ['Period Start']).reset_index(drop=True)
+
+
+def build_rollups(df, period_col, dims, sum_cols, ratio_cols, source_grain):
+    # {grain: DataFrame(dims + Period + Period Start + measures)}
+    # ratio_cols = {kolom: (numerator, denominator)} dihitung ulang sebagai sum / sum
+    starts = parse_period(df[period_col])
+    return {
+        grain: _finish_rollup(_rollup(df, starts, grain, dims, sum_cols, ratio_cols), dims)
+        for grain in available_grains(source_grain)
+    }
+
+
+def update_rollups(previous, df, period_col, dims, sum_cols, ratio_cols, source_grain, changed_periods):
+    # Rollup inkremental: per grain hanya periode yang memuat periode sumber berubah
+    # (koreksi, tambah, hapus) yang di-groupby ulang; grain yang tidak ada di previous dibangun penuh
+    starts = parse_period(df[period_col])
+    changed_starts = parse_period(pd.Series(sorted(changed_periods), dtype=object))
+    rollups = {}
+    for grain in available_grains(source_grain):
+        if grain not in previous:
+            rollups[grain] = _finish_rollup(_rollup(df, starts, grain, dims, sum_cols, ratio_cols), dims)
+            continue
+        if not changed_periods:
+            rollups[grain] = previous[grain]
+            continue
+        affected = period_start(changed_starts, grain)
+        mask = period_start(starts, grain).isin(affected).to_numpy()
+        keep = previous[grain][~previous[grain]['Period Start'].isin(affected)]
+        parts = [keep.assign(Period=keep['Period'].astype(str))]
+        if mask.any():
+            parts.append(_rollup(df[mask], starts[mask], grain, dims, sum_cols, ratio_cols))
+        rollups[grain] = _finish_rollup(pd.concat(parts, ignore_index=True), dims)
+    return rollups
@@ -0,0 +1,381 @@
+import numpy as np
+import pandas as pd
+
+from utils.bitmaps import BitmapIndex, aggregate
+from utils.comparison import delta_table
+from utils.diskcache import disk_cached
+from utils.downsample import downsample_frame
+from utils.incremental import changed_keys, combine_hashes, key_mask, rebuild_changed, row_hashes, slice_version
+from utils.partitions import add_partitions, subtract_partition
+from utils.periods import (
+    GRAIN_TITLES, axis_labels, build_calendar, build_rollups, detect_grain, ordered_periods, parse_period,
+    update_rollups
+)
+from utils.schema import apply_schema, count_bounds
+from utils.sketches import build_hll_sketches, build_tdigests, merge_hll
+
+# ==================== Promo Dashboard data ====================
+# Parse all_summary.xlsx, rollup per dataset x grain, dan agregasi per filter state. Dipakai
+# page Promo Dashboard (di balik st.cache_data) dan API lokal dengan key disk cache yang
+# sama, jadi keduanya berbagi satu parse + satu rollup per versi data.
+
+DATA_FILE = 'all_summary.xlsx'
+
+# Workbook yang dipilih dari home page (registry) disimpan di session state dengan key ini
+DATA_FILE_STATE = 'promo_data_file'
+
+# Sheet opsional berisi customer id per transaksi promo (Category, Month, Customer ID,
+# opsional Is Cigarette) untuk sketch unique customer
+CUSTOMER_SHEET = 'Customer Detail'
+
+# Measure aditif antar partisi; Visit Customer sama untuk semua partisi (level toko)
+PARTITION_MEASURES = ['Qty Promo', 'NOC', 'Sales Amount', 'Net Sales (by Group Category)']
+SHARED_COLS = ['Visit Customer']
+PARTITIONS = ['non_cig', 'cig']
+# Partisi 'cig' = selisih All - Non Cigarette (terutama Net Sales rokok), bukan data promo
+# rokok: Sales / NOC promo rokok ada di sheet 'Summary Cigarette Only (Month)' per promo dan
+# tidak termasuk total All, jadi partisi ini tidak ditampilkan sebagai dataset sendiri
+DATASET_PARTITIONS = {'all': ['non_cig', 'cig'], 'non_cig': ['non_cig']}
+DATASET_OPTIONS = {
+    'Summary All': 'all',
+    'Summary Non Cigarette': 'non_cig'
+}
+
+# Compact dtype plan (lihat utils.schema)
+PROMO_SCHEMA = {
+    'Category': 'code',
+    'Month': 'period',
+    'Qty Promo': 'count',
+    'NOC': 'count',
+    'Visit Customer': 'count',
+    'Sales Amount': 'rupiah',
+    'Net Sales (by Group Category)': 'rupiah',
+    'Kontribusi Sales': 'ratio',
+    'Kontribusi Promo pada Net Sales': 'ratio',
+}
+CUSTOMER_SCHEMA = {
+    'Category': 'code',
+    'Month': 'period',
+    'Customer ID': 'label',
+    'Basket Size': 'rupiah',
+}
+
+# Kolom filter rollup yang di-index bitmap (lihat utils.bitmaps)
+ROLLUP_INDEX_COLS = ['Category', 'Period']
+
+# Measure dan ratio tabel perbandingan antar periode (lihat utils.comparison); Visit Customer
+# level toko, jadi dirata-rata (bukan dijumlah) saat digabung antar category
+COMPARISON_MEASURES = ['Sales Amount', 'NOC', 'Visit Customer', 'Qty Promo', 'Net Sales (by Group Category)']
+COMPARISON_MEAN_COLS = ['Visit Customer']
+COMPARISON_RATIOS = {
+    'Kontribusi': ('Sales Amount', 'Net Sales (by Group Category)'),
+    'Conversion Rate': ('NOC', 'Visit Customer'),
+}
+
+
+def _sheet_hashes(df, keys):
+    df = df.assign(Month=df['Month'].astype(str)) if 'Month' in keys else df
+    return row_hashes(df, keys)
+
+
+# Parse workbook: partisi, rollup per grain, sketch dan digest. previous = snapshot workbook
+# yang sama sebelum dipublish ulang (dari disk cache): hanya slice Category x Month yang
+# berubah yang dihitung ulang.
+@disk_cached('promo_data', memory_items=2, incremental=True)
+def load_data(file_path, previous=None):
+    xlsx = pd.ExcelFile(file_path)
+
+    # Keempat sheet tetap dibaca: partisi cig = All - Non Cigarette butuh sheet All
+    # (workbook tidak punya sheet rokok yang aditif), partisi hanya menghemat memori / rollup
+    all_year = pd.read_excel(xlsx, sheet_name='Summary All (Year)')
+    all_month = pd.read_excel(xlsx, sheet_name='Summary All (Month)')
+    non_cig_year = pd.read_excel(xlsx, sheet_name='Summary Non Cigarette (Year)')
+    non_cig_month = pd.read_excel(xlsx, sheet_name='Summary Non Cigarette (Month)')
+
+    if 'Jumlah Promo' in all_year.columns:
+        all_year = all_year.rename(columns={'Jumlah Promo': 'Qty Promo'})
+    if 'Jumlah Promo' in non_cig_year.columns:
+        non_cig_year = non_cig_year.rename(columns={'Jumlah Promo': 'Qty Promo'})
+
+    # Lebar integer count dari total terbesar di semua sheet, sama untuk semua frame
+    sheets = [all_year, all_month, non_cig_year, non_cig_month]
+    bounds = count_bounds(sheets, PROMO_SCHEMA)
+    all_year, all_month, non_cig_year, non_cig_month = (apply_schema(df, PROMO_SCHEMA, bounds) for df in sheets)
+
+    # Hanya partisi aditif yang disimpan: Non Cigarette (apa adanya) dan Cigarette
+    # (All - Non Cigarette, hanya baris yang berbeda). All dihitung dari jumlah keduanya.
+    data = {
+        'non_cig_year': non_cig_year,
+        'non_cig_month': non_cig_month,
+        'cig_year': subtract_partition(all_year, non_cig_year, ['Category'], PARTITION_MEASURES, SHARED_COLS),
+        'cig_month': subtract_partition(all_month, non_cig_month, ['Category', 'Month'], PARTITION_MEASURES, SHARED_COLS),
+        'all_columns': {'year': all_year.columns.tolist(), 'month': all_month.columns.tolist()}
+    }
+
+    # Urutan bulan dari tanggal sebenarnya (lintas tahun), bukan list bulan hard-coded
+    all_months = pd.concat([non_cig_month['Month'], data['cig_month']['Month']]).astype(str)
+    month_order = pd.unique(all_months.iloc[parse_period(all_months).argsort(kind='stable')])
+    for key in ['non_cig_month', 'cig_month']:
+        data[key]['Month'] = pd.Categorical(data[key]['Month'].astype(str), categories=month_order, ordered=True)
+        data[key] = data[key].sort_values(['Category', 'Month']).reset_index(drop=True)
+
+    customers = None
+    if CUSTOMER_SHEET in xlsx.sheet_names:
+        customers = apply_schema(pd.read_excel(xlsx, sheet_name=CUSTOMER_SHEET), CUSTOMER_SCHEMA)
+
+    # Row hash per Category x Month (semua sheet bulanan + Customer Detail) dan per Category
+    # (sheet Year); struktur kolom ikut dibandingkan agar perubahan layout memicu build penuh
+    month_sheets = [all_month, non_cig_month] + ([customers] if customers is not None else [])
+    data['row_hashes'] = {
+        'month': combine_hashes(*(_sheet_hashes(df, ['Category', 'Month']) for df in month_sheets)),
+        'year': combine_hashes(*(_sheet_hashes(df, ['Category']) for df in (all_year, non_cig_year))),
+        'columns': repr([df.columns.tolist() for df in month_sheets + [all_year, non_cig_year]]),
+    }
+
+    # Rollup per grain (Daily/Weekly hanya jika data sumber harian)
+    source_grain = detect_grain(parse_period(pd.Series(month_order)))
+    data['calendar'] = build_calendar(pd.Series(month_order), source_grain)
+
+    # Update inkremental hanya jika snapshot sebelumnya punya layout dan grain yang sama
+    changed = None
+    if (previous is not None and previous['row_hashes']['columns'] == data['row_hashes']['columns']
+            and previous['calendar'].columns.equals(data['calendar'].columns)):
+        changed = changed_keys(previous['row_hashes']['month'], data['row_hashes']['month'])
+    changed_months = {month for _, month in changed} if changed is not None else None
+    if changed == set() and previous['row_hashes']['year'] == data['row_hashes']['year']:
+        # Isi workbook sama (mis. hanya disimpan ulang): snapshot lama dipakai apa adanya
+        return previous
+
+    data['rollups'] = {}
+    for key in PARTITIONS:
+        month_df = data[f'{key}_month'].assign(Month=data[f'{key}_month']['Month'].astype(str))
+        sum_cols = [c for c in month_df.select_dtypes('number').columns if c not in ('Category', 'Kontribusi Sales')]
+        ratio_cols = {'Kontribusi Sales': ('Sales Amount', 'Net Sales (by Group Category)')}
+        if changed is None:
+            rollups = build_rollups(month_df, 'Month', ['Category'], sum_cols, ratio_cols, source_grain)
+        else:
+            # Yearly dari sheet (Year) bukan hasil groupby, jadi tidak ikut di-update inkremental
+            previous_rollups = dict(previous['rollups'][key])
+            if previous['calendar']['Yearly'].nunique() == 1:
+                previous_rollups.pop('Yearly', None)
+            rollups = update_rollups(
+                previous_rollups, month_df, 'Month', ['Category'], sum_cols, ratio_cols, source_grain, changed_months
+            )
+
+        # Sheet (Year) berisi nilai tahunan penuh (Net Sales, Visit Customer distinct),
+        # dipakai sebagai rollup Yearly selama data hanya mencakup satu tahun
+        years = data['calendar']['Yearly'].unique()
+        if len(years) == 1:
+            year_df = data[f'{key}_year'].copy()
+            kontribusi_col = 'Kontribusi Promo pada Net Sales'
+            if kontribusi_col not in year_df.columns:
+                year_df[kontribusi_col] = year_df['Sales Amount'] / year_df['Net Sales (by Group Category)']
+            year_df.insert(1, 'Period', pd.Categorical([years[0]] * len(year_df), categories=years, ordered=True))
+            year_df.insert(2, 'Period Start', parse_period(pd.Series([years[0]] * len(year_df))))
+            rollups['Yearly'] = year_df.sort_values('Category').reset_index(drop=True)
+
+        data['rollups'][key] = rollups
+
+    def changed_rows(df):
+        # Inkremental: hanya baris slice yang berubah yang dibangun ulang
+        return df if changed is None else df[key_mask(df, ['Category', 'Month'], changed)]
+
+    def merge_previous(fresh, previous_value):
+        return fresh if changed is None else rebuild_changed(previous_value, fresh, changed)
+
+    # Sketch NOC per Category x Month per partisi (dibuat saat ingest, di-merge sesuai filter)
+    data['noc_sketches'] = None
+    if customers is not None:
+        is_cig = pd.Series(False, index=customers.index)
+        if 'Is Cigarette' in customers.columns:
+            is_cig = customers['Is Cigarette'].fillna(False).astype(bool)
+        partition_customers = {'non_cig': customers[~is_cig], 'cig': customers[is_cig]}
+        data['noc_sketches'] = {
+            key: merge_previous(
+                build_hll_sketches(changed_rows(partition_customers[key]), 'Customer ID', ['Category', 'Month']),
+                previous['noc_sketches'][key] if changed is not None else None
+            )
+            for key in PARTITIONS
+        }
+
+    # Digest distribusi Kontribusi dan Basket Size (Sales Amount / NOC) per Category x Month.
+    # Ratio tidak aditif antar partisi, jadi digest All dibangun dari data All hasil penjumlahan.
+    month_frames = {
+        'all': add_partitions(
+            data['non_cig_month'], data['cig_month'], ['Category', 'Month'], PARTITION_MEASURES, SHARED_COLS,
+            {'Kontribusi Sales': ('Sales Amount', 'Net Sales (by Group Category)')}
+        ),
+        'non_cig': data['non_cig_month']
+    }
+    digests = {}
+    for key, month_df in month_frames.items():
+        month_df = changed_rows(month_df)
+        month_df = month_df.assign(**{'Basket Size': month_df['Sales Amount'] / month_df['NOC'].replace(0, np.nan)})
+        digests[key] = build_tdigests(month_df, ['Kontribusi Sales', 'Basket Size'], ['Category', 'Month'])
+
+    # Basket size per transaksi (jika tersedia) lebih akurat dibanding rata-rata per baris summary
+    if customers is not None and 'Basket Size' in customers.columns:
+        digests['all'].update(build_tdigests(changed_rows(customers), ['Basket Size'], ['Category', 'Month']))
+        digests['non_cig'].update(build_tdigests(changed_rows(partition_customers['non_cig']), ['Basket Size'], ['Category', 'Month']))
+
+    data['digests'] = {
+        key: {col: merge_previous(values, previous['digests'][key][col] if changed is not None else None)
+              for col, values in digests[key].items()}
+        for key in digests
+    }
+    return data
+
+
+def data_version(data, view_option, categories, sources):
+    """Versi slice data yang dicakup filter (Category x periode sumber, + sheet Year untuk Yearly).
+
+    Dipakai sebagai key cache agregat / figure: tetap sama setelah workbook dipublish ulang
+    selama slice yang dicakup filter tidak berubah.
+    """
+    version = slice_version(data['row_hashes']['month'], [(c, m) for c in categories for m in sources])
+    if view_option == 'Yearly':
+        version += slice_version(data['row_hashes']['year'], [(c,) for c in categories])
+    return version
+
+
+# Rollup satu dataset x grain; All = Non Cigarette + Cigarette dihitung saat dipilih
+@disk_cached('promo_rollup', memory_items=16)
+def load_rollup(file_path, dataset_key, grain):
+    data = load_data(file_path)
+    if dataset_key in PARTITIONS:
+        return data['rollups'][dataset_key][grain]
+
+    base = data['rollups']['non_cig'][grain]
+    delta = data['rollups']['cig'][grain]
+    kontribusi_col = 'Kontribusi Promo pada Net Sales' if 'Kontribusi Promo pada Net Sales' in base.columns else 'Kontribusi Sales'
+    columns = ['Category', 'Period', 'Period Start'] + [
+        c for c in data['all_columns']['year' if kontribusi_col in data['all_columns']['year'] else 'month']
+        if c not in ('Category', 'Month')
+    ]
+    rollup = add_partitions(
+        base, delta, ['Category', 'Period Start'], PARTITION_MEASURES, SHARED_COLS + ['Period'],
+        {kontribusi_col: ('Sales Amount', 'Net Sales (by Group Category)')}, columns
+    )
+    rollup['Period'] = ordered_periods(rollup['Period'], rollup['Period Start'])
+    return rollup
+
+
+# Bitmap index Category / Period per rollup, dibangun sekali per versi data
+@disk_cached('promo_rollup_index', memory_items=16)
+def load_rollup_index(file_path, dataset_key, grain):
+    return BitmapIndex(load_rollup(file_path, dataset_key, grain), ROLLUP_INDEX_COLS)
+
+
+# Tabel delta per rollup x mode perbandingan, sejajar baris rollup (index bitmap rollup berlaku)
+@disk_cached('promo_comparison', memory_items=16)
+def load_comparison(file_path, dataset_key, grain, mode):
+    rollup = load_rollup(file_path, dataset_key, grain)
+    return delta_table(rollup, ['Category'], COMPARISON_MEASURES, COMPARISON_RATIOS, mode, grain)
+
+
+def kontribusi_column(df):
+    return 'Kontribusi Promo pada Net Sales' if 'Kontribusi Promo pada Net Sales' in df.columns else 'Kontribusi Sales'
+
+
+def select_rows(index, categories, periods):
+    """Posisi baris rollup untuk satu filter state (OR / AND bitset, tanpa scan rollup)."""
+    return index.select({'Category': categories, 'Period': periods})
+
+
+def source_periods(data, grain, periods):
+    """Periode sumber (bulan) yang tercakup filter, untuk key sketch / digest."""
+    calendar = data['calendar']
+    return calendar.loc[calendar[grain].isin(periods), 'Source'].tolist()
+
+
+def promo_kpis(data, rollup, index, rows, dataset_key, categories, sources):
+    """KPI card Promo Dashboard untuk satu filter state (baris `rows` dari select_rows)."""
+    kontribusi_col = kontribusi_column(rollup)
+    # Satu baris total; diambil per kolom agar count tetap integer
+    totals = aggregate(rollup, index, rows, [], {
+        'total_sales': ('Sales Amount', 'sum'),
+        'total_noc': ('NOC', 'sum'),
+        'total_qty_promo': ('Qty Promo', 'sum'),
+        'avg_kontribusi': (kontribusi_col, 'mean'),
+        'total_net_sales': ('Net Sales (by Group Category)', 'sum'),
+    })
+    totals = {col: values.iloc[0] for col, values in totals.items()}
+    kpis = {
+        'total_sales': totals['total_sales'],
+        'total_noc': totals['total_noc'],
+        'noc_relative_error': None,
+        'total_qty_promo': totals['total_qty_promo'],
+        'avg_kontribusi': totals['avg_kontribusi'] * 100,
+        'total_net_sales': totals['total_net_sales'],
+    }
+
+    # Unique customer dari merge sketch (NOC yang dijumlah akan double count
+    # customer yang belanja di beberapa bulan / kategori)
+    if data['noc_sketches'] is not None:
+        sketch_keys = [(c, m) for c in categories for m in sources]
+        noc_sketch = merge_hll(
+            [data['noc_sketches'][key] for key in DATASET_PARTITIONS[dataset_key]], sketch_keys
+        )
+        if noc_sketch is not None:
+            kpis['total_noc'] = noc_sketch.estimate()
+            kpis['noc_relative_error'] = noc_sketch.relative_error
+    return kpis
+
+
+# Agregasi per filter state untuk chart utama, langsung pada baris terpilih rollup (hasil
+# dibagi antar session: read-only)
+def aggregate_charts(rollup, index, rows, view_option, kontribusi_col):
+    is_time_view = view_option != 'Yearly'
+    if is_time_view:
+        chart1_data = aggregate(rollup, index, rows, ['Period'], {
+            'Period Start': ('Period Start', 'first'),
+            'Sales Amount': ('Sales Amount', 'sum'),
+            kontribusi_col: (kontribusi_col, 'mean')
+        })
+        chart1_data['X_Label'] = axis_labels(chart1_data['Period Start'], view_option)
+        x_title = GRAIN_TITLES[view_option]
+    else:
+        chart1_data = aggregate(rollup, index, rows, ['Category'], {
+            'Sales Amount': ('Sales Amount', 'sum'),
+            kontribusi_col: (kontribusi_col, 'mean')
+        })
+        chart1_data['X_Label'] = 'Cat ' + chart1_data['Category'].astype(str)
+        x_title = 'Category'
+
+    chart1_data['Kontribusi_Pct'] = chart1_data[kontribusi_col] * 100
+
+    # Series panjang: downsample LTTB + trace WebGL, label hanya untuk titik ekstrem
+    plot1_data = downsample_frame(chart1_data, ['Sales Amount', 'Kontribusi_Pct'])
+
+    if is_time_view:
+        chart2_data = aggregate(rollup, index, rows, ['Period'], {
+            'Period Start': ('Period Start', 'first'),
+            'NOC': ('NOC', 'sum'),
+            'Visit Customer': ('Visit Customer', 'mean')
+        })
+        chart2_data['X_Label'] = axis_labels(chart2_data['Period Start'], view_option)
+    else:
+        chart2_data = aggregate(rollup, index, rows, ['Category'], {
+            'NOC': ('NOC', 'sum'),
+            'Visit Customer': ('Visit Customer', 'mean')
+        })
+        chart2_data['X_Label'] = 'Cat ' + chart2_data['Category'].astype(str)
+
+    chart2_data['Conversion_Rate'] = (chart2_data['NOC'] / chart2_data['Visit Customer'] * 100)
+
+    plot2_data = downsample_frame(chart2_data, ['NOC', 'Visit Customer', 'Conversion_Rate'])
+    avg_conversion = chart2_data['Conversion_Rate'].mean()
+
+    category_totals = aggregate(rollup, index, rows, ['Category'], {
+        'Sales Amount': ('Sales Amount', 'sum'),
+        'Qty Promo': ('Qty Promo', 'sum')
+    })
+
+    pie_data = category_totals[['Category', 'Sales Amount']].copy()
+    pie_data['Category_Label'] = 'Category ' + pie_data['Category'].astype(str)
+    pie_data['Percentage'] = (pie_data['Sales Amount'] / pie_data['Sales Amount'].sum() * 100).round(2)
+
+    promo_data = category_totals[['Category', 'Qty Promo']].sort_values('Qty Promo', ascending=True)
+    promo_data['Category_Label'] = 'Category ' + promo_data['Category'].astype(str)
+
+    return chart1_data, plot1_data, x_title, chart2_data, plot2_data, avg_conversion, pie_data, promo_data
@@ -0,0 +1,258 @@
+"""Registry workbook di direktori data untuk home page.
+
+    python -m utils.registry          # scan dan tampilkan index
+
+Setiap workbook .xlsx di-index tanpa full parse: nama sheet menentukan jenis dashboard,
+lalu hanya kolom kunci (Category, periode, nama promo) yang dibaca lewat openpyxl read-only
+(~15 ms per file). Index disimpan di DASHBOARD_CACHE_DIR/registry.json dan hanya file yang
+mtime / ukurannya berubah yang di-index ulang. Scan berjalan di thread background; home page
+membaca index terakhir sehingga card tampil tanpa menunggu scan atau parse.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from utils import ended_data, promo_data
+from utils.diskcache import CACHE_DIR
+from utils.periods import parse_period
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DATA_DIR = os.environ.get('DASHBOARD_DATA_DIR', ROOT)
+INDEX_FILE = os.path.join(CACHE_DIR, 'registry.json')
+SCAN_INTERVAL = 30    # detik; scan ulang saat home page dibuka setelah interval ini
+
+PROMO_SHEETS = {'Summary All (Year)', 'Summary All (Month)', 'Summary Non Cigarette (Year)',
+                'Summary Non Cigarette (Month)'}
+ENDED_SHEETS = {'Sales', 'Qty'}
+
+KINDS = {
+    'promo': {
+        'title': 'Promo Performance', 'icon': '📊', 'page': 'pages/1_Promo_Dashboard.py',
+        'state_key': promo_data.DATA_FILE_STATE, 'loader': promo_data.load_data,
+    },
+    'ended_promo': {
+        'title': 'Ended Promo', 'icon': '📈', 'page': 'pages/2_Ended_Promo.py',
+        'state_key': ended_data.DATA_FILE_STATE, 'loader': ended_data.load_data,
+    },
+}
+
+
+# ==================== Index per workbook ====================
+
+def _category(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _period_range(labels):
+    labels = pd.Series([str(v) for v in labels if v is not None])
+    if labels.empty:
+        return None, None
+    order = parse_period(labels).argsort(kind='stable')
+    return labels.iloc[order.iloc[0]], labels.iloc[order.iloc[-1]]
+
+
+def _sheet_rows(ws, rows, max_col):
+    # rows = slice 0-based termasuk header (seperti iloc di load_data), header dilewati
+    return [r for r in ws.iter_rows(min_row=rows.start + 2, max_row=rows.stop, max_col=max_col, values_only=True)
+            if any(v is not None for v in r)]
+
+
+def _index_promo(wb):
+    month_rows = list(wb['Summary All (Month)'].iter_rows(values_only=True))
+    header, rows = month_rows[0], month_rows[1:]
+    category_idx, month_idx = header.index('Category'), header.index('Month')
+    year_rows = list(wb['Summary All (Year)'].iter_rows(values_only=True))
+    qty_col = 'Qty Promo' if 'Qty Promo' in year_rows[0] else 'Jumlah Promo'
+    qty_idx = year_rows[0].index(qty_col)
+    start, end = _period_range(r[month_idx] for r in rows)
+    return {
+        'period_start': start, 'period_end': end,
+        'categories': len({_category(r[category_idx]) for r in rows} - {None}),
+        'promos': int(sum(r[qty_idx] or 0 for r in year_rows[1:])),
+    }
+
+
+def _index_ended(wb):
+    rows = (_sheet_rows(wb['Sales'], ended_data.SALES_PROMO_ROWS, 3)
+            + _sheet_rows(wb['Qty'], ended_data.QTY_PROMO_ROWS, 3))
+    start, end = _period_range(r[2] for r in rows)
+    return {
+        'period_start': start, 'period_end': end,
+        'categories': len({_category(r[0]) for r in rows} - {None}),
+        'promos': len({str(r[1]).strip() for r in rows if r[1] is not None}),
+    }
+
+
+def index_workbook(path):
+    """Metadata satu workbook (jenis, rentang periode, jumlah category / promo) tanpa full parse."""
+    import openpyxl
+    stat = os.stat(path)
+    entry = {
+        'path': path, 'name': os.path.basename(path), 'kind': None,
+        'mtime': stat.st_mtime, 'size': stat.st_size, 'error': None,
+    }
+    try:
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheets = set(wb.sheetnames)
+            if PROMO_SHEETS <= sheets:
+                entry.update(kind='promo', **_index_promo(wb))
+            elif ENDED_SHEETS <= sheets:
+                entry.update(kind='ended_promo', **_index_ended(wb))
+        finally:
+            wb.close()
+    except Exception as exc:    # workbook rusak / format lain: tetap tercatat, tidak menghentikan scan
+        entry['error'] = f'{type(exc).__name__}: {exc}'
+    return entry
+
+
+def _data_path(path):
+    # Path relatif ke root repo bila memungkinkan: argumen load_data ikut key disk cache,
+    # jadi harus sama dengan DATA_FILE default yang dipakai page / API / report
+    path = os.path.abspath(path)
+    return os.path.relpath(path, ROOT) if path.startswith(ROOT + os.sep) else path
+
+
+def _sort_key(entry):
+    # Urutan jenis mengikuti KINDS, lalu workbook terbaru dulu
+    kind_order = list(KINDS).index(entry['kind']) if entry['kind'] in KINDS else len(KINDS)
+    return kind_order, -entry['mtime'], entry['name']
+
+
+# ==================== Registry ====================
+
+class Registry:
+    def __init__(self, data_dir=DATA_DIR, index_file=INDEX_FILE):
+        self.data_dir = data_dir
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._scan_thread = None
+        self._scanned_at = 0.0
+        self._entries = self._read_index()
+        self._warm_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='registry-warm')
+        self._warming = {}
+
+    def _read_index(self):
+        try:
+            with open(self.index_file, encoding='utf-8') as f:
+                return {entry['path']: entry for entry in json.load(f)}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def _write_index(self, entries):
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        # Scan background dan scan() sinkron session lain bisa menulis bersamaan: temp per thread
+        tmp_path = f'{self.index_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(entries.values()), f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_file)
+
+    def scan(self):
+        """Scan direktori data; hanya workbook baru / berubah (mtime, ukuran) yang di-index."""
+        paths = sorted(
+            _data_path(os.path.join(self.data_dir, name)) for name in os.listdir(self.data_dir)
+            if name.lower().endswith('.xlsx') and not name.startswith('~$')
+        )
+        with self._lock:
+            previous = dict(self._entries)
+        entries = {}
+        for path in paths:
+            stat = os.stat(path)
+            entry = previous.get(path)
+            if entry is None or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                entry = index_workbook(path)
+            entries[path] = entry
+        with self._lock:
+            changed = entries != self._entries
+            self._entries = entries
+            self._scanned_at = time.time()
+        if changed:
+            self._write_index(entries)
+        return list(entries.values())
+
+    def _scan_background(self):
+        try:
+            self.scan()
+        finally:
+            with self._lock:
+                self._scan_thread = None
+
+    def entries(self, max_age=SCAN_INTERVAL):
+        """Entry terakhir yang diketahui; scan ulang di background jika index lebih tua dari max_age.
+
+        Hanya scan pertama tanpa index tersimpan yang ditunggu (metadata saja, cepat).
+        """
+        with self._lock:
+            fresh = time.time() - self._scanned_at < max_age
+            known = bool(self._entries)
+            if not fresh and known and self._scan_thread is None:
+                self._scan_thread = threading.Thread(target=self._scan_background, daemon=True)
+                self._scan_thread.start()
+        if not fresh and not known:
+            self.scan()
+        with self._lock:
+            return sorted(self._entries.values(), key=_sort_key)
+
+    def status(self, entry):
+        """'ready' (snapshot parse ada di disk cache), 'warming', 'cold', atau 'error'."""
+        with self._lock:
+            return self._status(entry)
+
+    def _status(self, entry):
+        # Dipanggil dengan self._lock dipegang
+        if entry['error'] or entry['kind'] is None:
+            return 'error'
+        future = self._warming.get(entry['path'])
+        if future is not None and not future.done():
+            return 'warming'
+        try:
+            return 'ready' if KINDS[entry['kind']]['loader'].is_cached(entry['path']) else 'cold'
+        except OSError:
+            return 'error'
+
+    def warm(self, entry):
+        """Isi disk cache page untuk workbook ini di background (no-op jika sudah / sedang)."""
+        # Cek dan daftar dalam satu lock: dua session yang melihat 'cold' tidak submit dua kali
+        with self._lock:
+            if self._status(entry) != 'cold':
+                return self._warming.get(entry['path'])
+            loader = KINDS[entry['kind']]['loader']
+            future = self._warming[entry['path']] = self._warm_pool.submit(loader, entry['path'])
+            return future
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Registry bersama satu proses server (bertahan lintas rerun dan session)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = Registry()
+        return _registry
+
+
+def main():
+    os.chdir(ROOT)
+    start = time.perf_counter()
+    entries = Registry().scan()
+    elapsed = time.perf_counter() - start
+    for entry in entries:
+        print(json.dumps(entry, ensure_ascii=False))
+    print(f"{len(entries)} workbook di-index dalam {elapsed * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Batch report per category dan per promo dari halaman dashboard.
+
+    python -m utils.reports --out reports --workers 4
+
+Pengganti screenshot manual ke sheet "Visualisasi Sales"/"Visualisasi Qty": untuk setiap
+category ditulis satu report berisi Promo Dashboard dan Ended Promo yang difilter ke
+category tersebut, dan untuk setiap promo satu report Ended Promo yang difilter ke promo
+itu (Promo Dashboard tidak punya dimensi promo). Render memakai mesin yang sama dengan
+bundle statis (utils.static_bundle); report dibagi ke process pool, dan tiap worker memakai
+ulang data hasil parse + agregat dari st.cache_data in-process dan disk cache bersama,
+jadi workbook hanya di-parse sekali.
+"""
+import argparse
+import html
+import os
+import sys
+import time
+
+from utils.static_bundle import (
+    DEFAULT_WORKERS, PAGES, HtmlRenderer, app_test, html_document, run_app, run_pool,
+    render_page, sidebar_widget, slugify, write_assets
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROMO_CATEGORY = '🏷️ Filter Category'
+ENDED_VIEW = ('radio', '📊 Pilih Tampilan', 'Per Promo')
+ENDED_FILTERS = {
+    'category': {'sales': '🏷️ Filter Category (Sales)', 'qty': '🏷️ Filter Category (Qty)'},
+    'promo': {'sales': '📝 Filter Nama Promo (Sales)', 'qty': '📝 Filter Nama Promo (Qty)'},
+}
+
+
+def _plain(value):
+    # np.int64 -> int agar task bisa di-pickle ke worker dan dipakai di nama file
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _widget_values(at, label):
+    widget = sidebar_widget(at, 'multiselect', label)
+    return [] if widget is None else [_plain(v) for v in widget.value]
+
+
+def report_targets():
+    """Category dan promo yang tersedia, dibaca dari default filter kedua halaman.
+
+    Run default ini sekaligus mengisi disk cache sebelum worker start.
+    """
+    promo_page = app_test(PAGES['promo']['script'])
+    run_app(promo_page, 'promo')
+    ended_page = app_test(PAGES['ended_promo']['script'])
+    run_app(ended_page, 'ended_promo')
+
+    available = {'promo': _widget_values(promo_page, PROMO_CATEGORY)}
+    for kind, labels in ENDED_FILTERS.items():
+        for table, label in labels.items():
+            available[f'{kind}_{table}'] = _widget_values(ended_page, label)
+    return available
+
+
+def report_tasks(available):
+    categories = sorted(set(available['promo']) | set(available['category_sales']) | set(available['category_qty']))
+    promos = sorted(set(available['promo_sales']) | set(available['promo_qty']))
+    tasks = []
+    for category in categories:
+        tasks.append({
+            'kind': 'category', 'value': category, 'title': f'Category {int(category)}',
+            'path': f'category/category-{int(category)}.html',
+            'promo_page': category in available['promo'],
+            'sales': category in available['category_sales'],
+            'qty': category in available['category_qty'],
+        })
+    for promo in promos:
+        tasks.append({
+            'kind': 'promo', 'value': promo, 'title': promo,
+            'path': f'promo/{slugify(promo)}.html',
+            'promo_page': False,
+            'sales': promo in available['promo_sales'],
+            'qty': promo in available['promo_qty'],
+        })
+    return tasks
+
+
+def _ended_stage(task):
+    # Tabel yang tidak memuat category/promo ini dikosongkan -> tab menampilkan warning
+    labels = ENDED_FILTERS[task['kind']]
+    return [(
+        'multiselect', labels[table], [task['value']] if task[table] else []
+    ) for table in ('sales', 'qty')]
+
+
+def render_report(task, out_dir):
+    """Render satu report (semua section) ke HTML; dipanggil di worker process."""
+    os.chdir(ROOT)
+    renderer = HtmlRenderer()    # satu renderer: id chart unik di seluruh dokumen
+    sections = []
+    if task['promo_page']:
+        rendered = render_page(PAGES['promo']['script'], [[('multiselect', PROMO_CATEGORY, [task['value']])]],
+                               task['path'], renderer)
+        if rendered is not None:
+            sections.append(rendered[0])
+    rendered = render_page(PAGES['ended_promo']['script'], [[ENDED_VIEW], _ended_stage(task)],
+                           task['path'], renderer)
+    if rendered is not None:
+        sections.append(rendered[0])
+    if not sections:
+        return None
+
+    heading = f'{"Category" if task["kind"] == "category" else "Promo"}: {task["title"]}'
+    nav = (f'<nav class="filters"><a href="../index.html">← Semua report</a>'
+           f'<span>{html.escape(heading)}</span></nav>')
+    body = ''.join(f'<section class="report-section">{section}</section>' for section in sections)
+    path = os.path.join(out_dir, task['path'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html_document(f'Report {heading}', body, '../', nav))
+    return {'kind': task['kind'], 'title': task['title'], 'path': task['path']}
+
+
+def _write_index(out_dir, results, generated_at):
+    sections = []
+    for kind, title in (('category', '🏷️ Per Category'), ('promo', '📝 Per Promo')):
+        links = ''.join(f'<li><a href="{html.escape(r["path"])}">{html.escape(r["title"])}</a></li>'
+                        for r in results if r['kind'] == kind)
+        if links:
+            sections.append(f'<h2>{title}</h2><ul>{links}</ul>')
+    body = f'<h1>📑 Report Promo</h1><p class="caption">Dibuat {generated_at}</p>' + ''.join(sections)
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(html_document('Report Promo', body, ''))
+
+
+def build_reports(out_dir, kinds=('category', 'promo'), workers=DEFAULT_WORKERS):
+    """Tulis report semua category/promo ke out_dir; kembalikan (hasil, daftar (path, error))."""
+    out_dir = os.path.abspath(out_dir)
+    os.chdir(ROOT)
+    tasks = [task for task in report_tasks(report_targets()) if task['kind'] in kinds]
+    write_assets(out_dir)
+    results, failures = run_pool(render_report, tasks, out_dir, workers)
+    _write_index(out_dir, results, time.strftime('%Y-%m-%d %H:%M:%S'))
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default='reports', help='Direktori output (default: reports)')
+    parser.add_argument('--kinds', nargs='+', choices=['category', 'promo'], default=['category', 'promo'],
+                        help='Jenis report (default: category dan promo)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Jumlah worker process')
+    args = parser.parse_args(argv)
+
+    out_dir = os.path.abspath(args.out)
+    start = time.perf_counter()
+    results, failures = build_reports(out_dir, args.kinds, args.workers)
+    print(f"{len(results)} report ditulis ke {out_dir} dalam {time.perf_counter() - start:.1f} s")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Compact dtype plan untuk frame hasil parse kedua workbook."""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from utils.periods import parse_period
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ==================== Compact dtype ====================
+# Schema per workbook {kolom: jenis}: code (integer terkecil), label (Categorical), period
+# (Categorical kronologis), count (integer terkecil yang memuat total kolom seluruh workbook,
+# jadi sum subset mana pun tidak overflow), rupiah (64-bit), ratio (float32, hanya nilai per
+# baris; ratio agregat dihitung ulang sum / sum).
+# Perbandingan memori: python -m utils.schema --scale 100
+
+INT_TYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def narrow_int(low, high):
+    """Integer signed terkecil yang memuat [low, high]."""
+    for dtype in INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _is_whole(values):
+    return values.notna().all() and np.array_equal(values, np.floor(values))
+
+
+def count_bounds(frames, schema):
+    """{kolom count: total absolut terbesar} di semua frame - dasar lebar integer count."""
+    bounds = {}
+    for df in frames:
+        for col, kind in schema.items():
+            if kind == 'count' and col in df.columns:
+                total = pd.to_numeric(df[col], errors='coerce').abs().sum()
+                bounds[col] = max(bounds.get(col, 0), total)
+    return bounds
+
+
+def ordered_labels(values):
+    """Categorical terurut kronologis dari label periode (NaN tetap NaN)."""
+    labels = pd.Series(values).astype(object).map(lambda v: v if pd.isna(v) else str(v))
+    unique = pd.Series(labels.dropna().unique())
+    categories = unique.iloc[parse_period(unique).argsort(kind='stable')]
+    return pd.Categorical(labels, categories=categories, ordered=True)
+
+
+def apply_schema(df, schema, bounds=None):
+    """Salinan df dengan dtype compact sesuai schema; kolom di luar schema tidak diubah.
+
+    Kolom numerik yang berisi NaN tetap float64 (kecuali ratio -> float32).
+    """
+    bounds = bounds or {}
+    out = df.copy()
+    for col, kind in schema.items():
+        if col not in out.columns:
+            continue
+        values = out[col]
+        if kind == 'label':
+            out[col] = values.astype('category')
+        elif kind == 'period':
+            out[col] = ordered_labels(values)
+        elif kind == 'ratio':
+            out[col] = pd.to_numeric(values, errors='coerce').astype(np.float32)
+        else:
+            values = pd.to_numeric(values, errors='coerce')
+            if values.isna().sum() > out[col].isna().sum():
+                continue    # ada nilai non-numerik: kolom dibiarkan apa adanya
+            if not _is_whole(values):
+                out[col] = values.astype(np.float64)
+            elif kind == 'code':
+                out[col] = values.astype(narrow_int(values.min(), values.max()))
+            elif kind == 'count':
+                bound = bounds.get(col, values.abs().sum())
+                out[col] = values.astype(narrow_int(-bound, bound))
+            else:
+                out[col] = values.astype(np.int64)
+    return out
+
+
+# ==================== Perbandingan memori ====================
+
+def default_dtypes(df):
+    """df dengan dtype default pandas (int64 / float64 / object), sebagai baseline."""
+    out = df.copy()
+    for col in out.columns:
+        dtype = out[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = out[col].astype(object)
+            out[col] = pd.to_numeric(values) if pd.api.types.is_numeric_dtype(dtype.categories) else values
+        elif pd.api.types.is_integer_dtype(dtype):
+            out[col] = out[col].astype(np.int64)
+        elif pd.api.types.is_float_dtype(dtype):
+            out[col] = out[col].astype(np.float64)
+        elif pd.api.types.is_string_dtype(dtype):
+            out[col] = out[col].astype(object)
+    return out
+
+
+def scale_frame(df, schema, scale):
+    """df (dtype default) diulang `scale` kali; nilai kolom label diberi suffix per salinan
+    sehingga kardinalitas dimensi teks ikut naik (kasus terburuk dictionary encoding)."""
+    copies = []
+    for copy in range(scale):
+        part = df.copy()
+        for col, kind in schema.items():
+            if kind == 'label' and col in part.columns:
+                part[col] = part[col].where(part[col].isna(), part[col].astype(str) + f' #{copy}')
+        copies.append(part)
+    return pd.concat(copies, ignore_index=True)
+
+
+def memory_report(frames, scale=100):
+    """Baris dan MB (deep) per frame pada `scale`x data: dtype default pandas vs schema compact.
+
+    frames = {nama: (df, schema)}; schema diterapkan ulang pada data yang sudah diperbesar,
+    jadi lebar integer count mengikuti total pada skala tersebut.
+    """
+    rows = []
+    for name, (df, schema) in frames.items():
+        default = scale_frame(default_dtypes(df), schema, scale)
+        compact = apply_schema(default, schema, count_bounds([default], schema))
+        rows.append({
+            'frame': name, 'rows': len(default),
+            'default_mb': default.memory_usage(deep=True).sum() / 2**20,
+            'compact_mb': compact.memory_usage(deep=True).sum() / 2**20,
+        })
+    report = pd.DataFrame(rows)
+    total = report[['rows', 'default_mb', 'compact_mb']].sum()
+    report = pd.concat([report, pd.DataFrame([{'frame': 'TOTAL', **total.to_dict()}])], ignore_index=True)
+    report['rows'] = report['rows'].astype(np.int64)
+    report['ratio'] = report['compact_mb'] / report['default_mb']
+    return report
+
+
+def loaded_frames():
+    """{nama: (frame, schema)} untuk frame per baris yang disimpan kedua loader."""
+    from utils import ended_data, promo_data
+    data = promo_data.load_data(promo_data.DATA_FILE)
+    frames = {
+        f'promo/{key}': (data[key], promo_data.PROMO_SCHEMA)
+        for key in ['non_cig_year', 'non_cig_month', 'cig_year', 'cig_month']
+    }
+    names = ['sales_promo', 'sales_cat', 'qty_promo', 'qty_cat']
+    frames.update({
+        f'ended/{name}': (df, ended_data.ENDED_SCHEMA)
+        for name, df in zip(names, ended_data.load_data(ended_data.DATA_FILE))
+    })
+    return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=100, help='Faktor pengali jumlah baris (default: 100)')
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    report = memory_report(loaded_frames(), args.scale)
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 120):
+        print(report.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
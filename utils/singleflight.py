@@ -0,0 +1,108 @@
+import os
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:    # Windows: lock antar proses dilewati, single-flight in-process tetap jalan
+    fcntl = None
+
+# ==================== Single-flight ====================
+# Saat cache dingin (setelah deploy / workbook baru) banyak session meminta key yang sama
+# bersamaan. Pemanggilan konkuren dengan key sama digabung: satu session (leader) menghitung,
+# sisanya menunggu dan memakai hasil yang sama. Key dilepas begitu komputasi selesai - ini
+# bukan cache; hasil yang perlu bertahan tetap disimpan st.cache_data / disk cache.
+# Hasil dibagi antar session, jadi pemanggil tidak boleh memodifikasinya in-place.
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _join(self, key):
+        # (future, leader?) - leader mendaftarkan future baru untuk key
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key, fn):
+        """Jalankan fn() sekali untuk semua pemanggil konkuren dengan `key`."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._forget(key, future)
+
+    def submit(self, key, start):
+        """Seperti do() untuk komputasi asinkron: start() mengembalikan list future.
+
+        Key tetap terdaftar sampai semua future selesai, jadi session yang datang selama
+        build berlangsung menerima future yang sama.
+        """
+        holder, leader = self._join(key)
+        if not leader:
+            return holder.result()
+        try:
+            futures = start()
+        except BaseException as exc:
+            holder.set_exception(exc)
+            self._forget(key, holder)
+            raise
+        holder.set_result(futures)
+
+        pending = [len(futures)]
+        pending_lock = threading.Lock()
+
+        def on_done(_):
+            with pending_lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            self._forget(key, holder)
+
+        if not futures:
+            self._forget(key, holder)
+        for future in futures:
+            future.add_done_callback(on_done)
+        return futures
+
+
+_default = SingleFlight()
+
+
+def single_flight(key, fn):
+    """SingleFlight.do pada group bersama (dipakai semua page dalam satu proses server)."""
+    return _default.do(key, fn)
+
+
+@contextmanager
+def file_lock(path):
+    """Lock eksklusif antar proses (mis. beberapa server / worker report) lewat `path`.lock."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f'{path}.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
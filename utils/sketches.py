@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+# ==================== HyperLogLog (distinct count) ====================
+# Register per bucket = posisi bit 1 pertama dari hash 64-bit. Sketch bisa
+# di-merge (max per register), jadi unique customer untuk kombinasi filter apa pun
+# cukup di-estimasi dari gabungan sketch per Category x Month.
+#
+# Error bound: standard error relatif = 1.04 / sqrt(m), m = 2**precision.
+# Precision 12 -> 4096 register (4 KB per sketch), error ~1.63%
+# (~95% estimasi berada dalam +/- 3.25% dari nilai sebenarnya).
+
+HLL_PRECISION = 12
+
+_POWERS_OF_TWO = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+
+
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is None:
+            registers = np.zeros(self.m, dtype=np.uint8)
+        self.registers = registers
+
+    @property
+    def relative_error(self):
+        return 1.04 / np.sqrt(self.m)
+
+    def add_many(self, values):
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return self
+        hashes = pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+        p = np.uint64(self.precision)
+        idx = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = hashes & ((np.uint64(1) << (np.uint64(64) - p)) - np.uint64(1))
+        # rank = jumlah leading zero pada (64 - p) bit sisa + 1
+        bit_length = np.searchsorted(_POWERS_OF_TWO, rest, side='right')
+        rank = (64 - self.precision - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Tidak bisa merge HyperLogLog dengan precision berbeda")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Small range correction (linear counting)
+        if raw <= 2.5 * m and zeros > 0:
+            return m * np.log(m / zeros)
+        return float(raw)
+
+    def to_bytes(self):
+        return bytes([self.precision]) + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob):
+        precision = blob[0]
+        registers = np.frombuffer(blob, dtype=np.uint8, offset=1).copy()
+        return cls(precision, registers)
+
+
+def build_hll_sketches(df, id_col, key_cols, precision=HLL_PRECISION):
+    # Satu sketch per kombinasi key (mis. Category x Month), disimpan sebagai bytes
+    sketches = {}
+    for key, group in df.groupby(key_cols, observed=True, sort=False):
+        sketches[key] = HyperLogLog(precision).add_many(group[id_col]).to_bytes()
+    return sketches
+
+
+def merge_hll(sketches, keys):
+    # Gabungkan sketch untuk key yang dipilih; None jika tidak ada sketch sama sekali.
+    # sketches boleh berupa list dict (satu per partisi data) yang di-union.
+    if isinstance(sketches, dict):
+        sketches = [sketches]
+    blobs = [part[k] for part in sketches for k in keys if k in part]
+    if not blobs:
+        return None
+    precision = blobs[0][0]
+    registers = np.frombuffer(blobs[0], dtype=np.uint8, offset=1).copy()
+    for blob in blobs[1:]:
+        np.maximum(registers, np.frombuffer(blob, dtype=np.uint8, offset=1), out=registers)
+    return HyperLogLog(precision, registers)
+
+
+# ==================== t-digest (quantile) ====================
+# Distribusi disimpan sebagai centroid (mean, weight). Centroid di ekor distribusi
+# dibuat kecil (scale function k1), sehingga persentil ekstrem tetap akurat.
+# Merge = gabung centroid lalu compress ulang, jadi persentil untuk seleksi apa pun
+# dihitung dari sketch per Category x Month / per promo tanpa membaca ulang data mentah.
+
+TDIGEST_COMPRESSION = 200
+
+
+class TDigest:
+    def __init__(self, compression=TDIGEST_COMPRESSION, means=None, weights=None,
+                 min_value=np.inf, max_value=-np.inf):
+        self.compression = compression
+        self.means = np.empty(0) if means is None else np.asarray(means, dtype=np.float64)
+        self.weights = np.empty(0) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.min = min_value
+        self.max = max_value
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def add_many(self, values):
+        values = pd.to_numeric(pd.Series(values), errors='coerce').dropna().to_numpy(dtype=np.float64)
+        if values.size == 0:
+            return self
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.means = np.concatenate([self.means, values])
+        self.weights = np.concatenate([self.weights, np.ones(values.size)])
+        return self._compress()
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.means = np.concatenate([self.means, other.means])
+        self.weights = np.concatenate([self.weights, other.weights])
+        return self._compress()
+
+    def _compress(self):
+        if self.means.size <= 1:
+            return self
+        order = np.argsort(self.means, kind='stable')
+        means, weights = self.means[order], self.weights[order]
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        # k1(q) = delta / (2*pi) * asin(2q - 1); satu centroid per unit k
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        bins = np.floor(k - k.min()).astype(np.int64)
+        _, bins = np.unique(bins, return_inverse=True)
+        new_weights = np.bincount(bins, weights=weights)
+        self.means = np.bincount(bins, weights=means * weights) / new_weights
+        self.weights = new_weights
+        return self
+
+    def quantile(self, q):
+        q = np.asarray(q, dtype=np.float64)
+        if self.means.size == 0:
+            return np.full(q.shape, np.nan)
+        total = self.count
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xp = np.concatenate([[0.0], centers, [total]])
+        fp = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q * total, xp, fp)
+
+    def to_bytes(self):
+        header = np.array([self.compression, self.min, self.max], dtype=np.float64)
+        return np.concatenate([header, self.means, self.weights]).tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob):
+        arr = np.frombuffer(blob, dtype=np.float64)
+        n = (arr.size - 3) // 2
+        return cls(arr[0], arr[3:3 + n].copy(), arr[3 + n:].copy(), arr[1], arr[2])
+
+
+def build_tdigests(df, value_cols, key_cols, compression=TDIGEST_COMPRESSION):
+    # {value_col: {key: bytes}} - satu digest per kolom nilai per kombinasi key
+    digests = {col: {} for col in value_cols}
+    for key, group in df.groupby(key_cols, observed=True, sort=False):
+        for col in value_cols:
+            digests[col][key] = TDigest(compression).add_many(group[col]).to_bytes()
+    return digests
+
+
+def merge_tdigest(digests, keys):
+    blobs = [digests[k] for k in keys if k in digests]
+    if not blobs:
+        return None
+    merged = TDigest.from_bytes(blobs[0])
+    for blob in blobs[1:]:
+        merged.merge(TDigest.from_bytes(blob))
+    return merged
+
+
+def box_stats(digest):
+    # Statistik box plot (P5 / P25 / P50 / P75 / P95) dari digest
+    p5, q1, median, q3, p95 = digest.quantile([0.05, 0.25, 0.5, 0.75, 0.95])
+    return {'lowerfence': p5, 'q1': q1, 'median': median, 'q3': q3, 'upperfence': p95}
@@ -0,0 +1,385 @@
+"""Render halaman dashboard ke bundle HTML statis per kombinasi filter umum.
+
+    python -m utils.static_bundle --out static_bundles --workers 4
+
+Tiap kombinasi (dataset x view x periode) dijalankan lewat streamlit AppTest - script
+halaman yang sama dengan app live, dengan nilai widget sidebar diisi - lalu tree elemennya
+ditulis ulang ke HTML: markdown/CSS apa adanya, chart sebagai spec Plotly, tabel sebagai
+<table>. Widget (tombol, pagination, export) tidak ikut dirender. Kombinasi dibagi ke
+process pool; plotly.js disalin sekali ke assets/ sehingga bundle bisa disajikan dari disk
+tanpa akses jaringan.
+"""
+import argparse
+import html
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.charts import DASHBOARD_LAYOUT
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ==================== Kombinasi filter ====================
+# dims: label widget radio di sidebar yang dikombinasikan (urutan = urutan render).
+# period: label multiselect periode; 'all' = default halaman, 'latest' = periode terakhir saja.
+
+PAGES = {
+    'promo': {
+        'script': 'pages/1_Promo_Dashboard.py',
+        'title': 'Promo Performance Dashboard',
+        'dims': {'dataset': '📁 Pilih Dataset', 'view': '📅 Pilih Granularity'},
+        'period': '📆 Filter Periode',
+    },
+    'ended_promo': {
+        'script': 'pages/2_Ended_Promo.py',
+        'title': 'Ended Promo Dashboard',
+        'dims': {'view': '📊 Pilih Tampilan'},
+        'period': None,
+    },
+}
+
+PERIOD_MODES = ['all', 'latest']
+RUN_TIMEOUT = 300
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', str(text).lower()).strip('-') or 'x'
+
+
+def sidebar_widget(at, kind, label):
+    for widget in getattr(at.sidebar, kind):
+        if widget.label == label:
+            return widget
+    return None
+
+
+def app_test(script):
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(os.path.join(ROOT, script), default_timeout=RUN_TIMEOUT)
+
+
+def run_app(at, context):
+    # AppTest mengganti sys.modules['__main__'] dengan script halaman; dikembalikan agar
+    # worker spawn tetap mengimpor modul ini, bukan menjalankan script halaman
+    main_module = sys.modules['__main__']
+    try:
+        at.run()
+    finally:
+        sys.modules['__main__'] = main_module
+    if at.exception:
+        raise RuntimeError(f"{context}: {at.exception[0].message}")
+
+
+def combinations(pages=None):
+    """Daftar kombinasi per halaman, dibaca dari opsi widget pada run default.
+
+    Run default ini sekaligus mengisi disk cache (parse Excel, rollup) sebelum worker start.
+    """
+    combos = []
+    for page in pages or list(PAGES):
+        spec = PAGES[page]
+        at = app_test(spec['script'])
+        run_app(at, page)
+        options = [sidebar_widget(at, 'radio', label).options for label in spec['dims'].values()]
+        modes = PERIOD_MODES if spec['period'] else PERIOD_MODES[:1]
+        for values in itertools.product(*options):
+            filters = dict(zip(spec['dims'], values))
+            for mode in modes:
+                name = '_'.join([slugify(v) for v in values] + [mode])
+                combos.append({'page': page, 'filters': filters, 'period': mode,
+                               'path': f'{page}/{name}.html'})
+    return combos
+
+
+# ==================== Element tree -> HTML ====================
+
+def _inline_markdown(text):
+    text = html.escape(text, quote=False)
+    text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
+    return re.sub(r'(?<!\*)\*(?!\*)(.+?)\*', r'<em>\1</em>', text)
+
+
+def _markdown_html(text):
+    # Subset markdown yang dipakai halaman (heading, garis, bold/italic, paragraf)
+    blocks = []
+    for block in re.split(r'\n\s*\n', text.strip()):
+        stripped = block.strip()
+        heading = re.match(r'^(#{1,6})\s+(.*)$', stripped)
+        if stripped in ('---', '***'):
+            blocks.append('<hr>')
+        elif heading:
+            level = len(heading.group(1))
+            blocks.append(f'<h{level}>{_inline_markdown(heading.group(2))}</h{level}>')
+        elif stripped:
+            blocks.append(f'<p>{_inline_markdown(stripped).replace(chr(10), "<br>")}</p>')
+    return '\n'.join(blocks)
+
+
+def _display_values(node):
+    # Nilai tampilan Styler (format kolom utils.tables.style_formats); proto dataframe versi
+    # lama menyimpan styler langsung, versi baru di dalam arrow_data
+    from streamlit.dataframe_util import convert_arrow_bytes_to_pandas_df
+    arrow = getattr(node.proto, 'arrow_data', node.proto)
+    if not arrow.HasField('styler') or not arrow.styler.display_values:
+        return None
+    return convert_arrow_bytes_to_pandas_df(arrow.styler.display_values)
+
+
+def _table_html(node):
+    df = node.value
+    display = _display_values(node)
+    if display is not None and display.shape == df.shape:
+        df = display
+    head = ''.join(f'<th>{html.escape(str(col))}</th>' for col in df.columns)
+    rows = []
+    for values in df.itertuples(index=False, name=None):
+        cells = ''.join(f'<td>{html.escape(str(v))}</td>' for v in values)
+        rows.append(f'<tr>{cells}</tr>')
+    return f'<div class="table-wrap"><table><thead><tr>{head}</tr></thead><tbody>{"".join(rows)}</tbody></table></div>'
+
+
+def _static_template():
+    import plotly.io as pio
+    template = pio.templates['plotly_dark'].to_plotly_json()
+    template['layout'].update(DASHBOARD_LAYOUT)
+    return template
+
+
+class HtmlRenderer:
+    def __init__(self):
+        self.charts = 0
+        self.template = _static_template()
+
+    def chart(self, node):
+        # Template di spec masih berisi placeholder warna theme Streamlit - diganti template statis
+        spec = json.loads(node.proto.spec)
+        spec.setdefault('layout', {})['template'] = self.template
+        self.charts += 1
+        div_id = f'chart-{self.charts}'
+        payload = json.dumps(spec, separators=(',', ':')).replace('</', '<\\/')
+        return (f'<div id="{div_id}" class="chart"></div>\n<script>(function(){{var s={payload};'
+                f'Plotly.newPlot("{div_id}",s.data,s.layout,{{responsive:true,displaylogo:false}});}})();</script>')
+
+    def element(self, node):
+        kind = node.type
+        if kind == 'markdown':
+            body = node.proto.body
+            if node.proto.allow_html:
+                return body
+            if type(node).__name__ == 'Caption':
+                return f'<p class="caption">{_inline_markdown(body)}</p>'
+            return _markdown_html(body)
+        if kind in ('info', 'warning', 'error', 'success'):
+            return f'<div class="alert alert-{kind}">{_markdown_html(node.value)}</div>'
+        if kind == 'plotly_chart':
+            return self.chart(node)
+        if kind == 'dataframe':
+            return _table_html(node)
+        return ''    # widget: tidak dirender di bundle statis
+
+    def children(self, node):
+        return '\n'.join(filter(None, (self.node(child) for child in node.children.values())))
+
+    def node(self, node):
+        children = getattr(node, 'children', None)
+        if not isinstance(children, dict):
+            return self.element(node)
+        inner = self.children(node)
+        if not inner.strip():
+            return ''
+        kind = node.type
+        if kind == 'flex_container' and all(getattr(c, 'type', '') == 'column' for c in children.values()):
+            return f'<div class="columns">{inner}</div>'
+        if kind == 'column':
+            return f'<div class="column" style="flex:{node.proto.weight}">{inner}</div>'
+        if kind == 'expander':
+            return f'<details><summary>{html.escape(node.label)}</summary>{inner}</details>'
+        if kind == 'tab':
+            return f'<section class="tab"><h2 class="tab-label">{html.escape(node.label)}</h2>{inner}</section>'
+        return inner
+
+
+BASE_CSS = """
+body { margin: 0; font-family: 'Poppins', sans-serif; color: #ffffff;
+       background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%); min-height: 100vh; }
+main { max-width: 1400px; margin: 0 auto; padding: 1.5rem 2rem 3rem; }
+a { color: #00d4ff; }
+.filters { color: #a0aec0; font-size: 0.9rem; display: flex; gap: 1.5rem; flex-wrap: wrap; }
+.columns { display: flex; gap: 1rem; align-items: flex-start; }
+.column { min-width: 0; }
+.chart { width: 100%; }
+.caption { color: #a0aec0; font-size: 0.85rem; }
+.alert { border-radius: 8px; padding: 0.5rem 1rem; margin: 0.5rem 0; background: rgba(0,212,255,0.12); }
+.alert-warning { background: rgba(255,193,7,0.15); }
+.alert-error { background: rgba(255,107,107,0.15); }
+.report-section + .report-section { border-top: 2px solid rgba(255,255,255,0.2); margin-top: 3rem; }
+.tab-label { border-bottom: 2px solid #00d4ff; padding-bottom: 0.4rem; margin-top: 2rem; }
+details { border: 1px solid rgba(255,255,255,0.15); border-radius: 8px; padding: 0.5rem 1rem; margin: 0.5rem 0; }
+summary { cursor: pointer; }
+.table-wrap { overflow-x: auto; max-height: 480px; }
+table { border-collapse: collapse; font-size: 0.85rem; width: 100%; }
+th, td { padding: 0.3rem 0.6rem; border-bottom: 1px solid rgba(255,255,255,0.1); text-align: right; white-space: nowrap; }
+th { position: sticky; top: 0; background: #16213e; }
+"""
+
+
+def html_document(title, body, asset_prefix, filters_html=''):
+    return f"""<!DOCTYPE html>
+<html lang="id">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)}</title>
+<script src="{asset_prefix}assets/plotly.min.js"></script>
+<style>{BASE_CSS}</style>
+</head>
+<body>
+<main>
+{filters_html}
+{body}
+</main>
+</body>
+</html>
+"""
+
+
+def _filters_label(combo):
+    parts = [f'{key.title()}: {value}' for key, value in combo['filters'].items()]
+    if PAGES[combo['page']]['period']:
+        parts.append('Periode: ' + ('semua' if combo['period'] == 'all' else combo['period_value']))
+    return parts
+
+
+def render_page(script, stages, context, renderer=None):
+    """Jalankan script halaman, isi widget sidebar per stage, dan render main area ke HTML.
+
+    stages: list stage, tiap stage list (kind, label, value); value boleh callable(widget)
+    (mis. pilih opsi terakhir). Script dijalankan ulang setelah tiap stage karena opsi widget
+    bisa bergantung pada stage sebelumnya; stage tanpa perubahan nilai tidak memicu rerun.
+    Kembalikan (html, AppTest), atau None bila ada widget yang tidak muncul.
+    """
+    at = app_test(script)
+    run_app(at, context)
+    for stage in stages:
+        changed = False
+        for kind, label, value in stage:
+            widget = sidebar_widget(at, kind, label)
+            if widget is None:
+                return None
+            value = value(widget) if callable(value) else value
+            if widget.value != value:
+                widget.set_value(value)
+                changed = True
+        if changed:    # nilai sudah sama dengan default: tidak perlu rerun
+            run_app(at, context)
+    return (renderer or HtmlRenderer()).node(at.main), at
+
+
+def _latest_period(widget):
+    return [widget.options[-1]]
+
+
+def render_combination(combo, out_dir):
+    """Jalankan satu kombinasi filter dan tulis HTML-nya; dipanggil di worker process."""
+    os.chdir(ROOT)
+    spec = PAGES[combo['page']]
+    stages = [[('radio', label, combo['filters'][key]) for key, label in spec['dims'].items()]]
+    if combo['period'] == 'latest':
+        stages.append([('multiselect', spec['period'], _latest_period)])
+    rendered = render_page(spec['script'], stages, combo['path'])
+    if rendered is None:    # hanya satu periode: sama dengan 'all'
+        return None
+    body, at = rendered
+
+    period_value = sidebar_widget(at, 'multiselect', spec['period']).value[0] if combo['period'] == 'latest' else None
+    filters = _filters_label(dict(combo, period_value=period_value))
+    filters_html = ('<nav class="filters"><a href="../index.html">← Semua bundle</a>'
+                    + ''.join(f'<span>{html.escape(part)}</span>' for part in filters) + '</nav>')
+    path = os.path.join(out_dir, combo['path'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html_document(f"{spec['title']} - {' · '.join(filters)}", body, '../', filters_html))
+    return {'page': combo['page'], 'path': combo['path'], 'filters': filters}
+
+
+def _write_index(out_dir, results, generated_at):
+    sections = []
+    for page, spec in PAGES.items():
+        items = [r for r in results if r['page'] == page]
+        if not items:
+            continue
+        links = ''.join(f'<li><a href="{html.escape(r["path"])}">{html.escape(" · ".join(r["filters"]))}</a></li>'
+                        for r in items)
+        sections.append(f'<h2>{html.escape(spec["title"])}</h2><ul>{links}</ul>')
+    body = f'<h1>📊 Dashboard Bundles</h1><p class="caption">Dibuat {generated_at}</p>' + ''.join(sections)
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(html_document('Dashboard Bundles', body, ''))
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': generated_at, 'bundles': results}, f, ensure_ascii=False, indent=2)
+
+
+def write_assets(out_dir):
+    from plotly.offline import get_plotlyjs
+    os.makedirs(os.path.join(out_dir, 'assets'), exist_ok=True)
+    with open(os.path.join(out_dir, 'assets', 'plotly.min.js'), 'w', encoding='utf-8') as f:
+        f.write(get_plotlyjs())
+
+
+def run_pool(func, tasks, out_dir, workers):
+    """Jalankan func(task, out_dir) per task di process pool; hasil None dilewati.
+
+    Kembalikan (hasil sesuai urutan tasks, daftar (path, error)).
+    """
+    results, failures = {}, []
+    # spawn: worker tidak mewarisi thread runtime Streamlit dari run AppTest di parent
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=context) as executor:
+        futures = {executor.submit(func, task, out_dir): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                failures.append((task['path'], str(exc)))
+                print(f"  GAGAL {task['path']}: {exc}", file=sys.stderr)
+                continue
+            if result is not None:
+                results[task['path']] = result
+                print(f"  {task['path']}")
+    return [results[t['path']] for t in tasks if t['path'] in results], failures
+
+
+def build_bundles(out_dir, pages=None, workers=DEFAULT_WORKERS):
+    """Render semua kombinasi ke out_dir; kembalikan (hasil, daftar (path, error))."""
+    out_dir = os.path.abspath(out_dir)
+    os.chdir(ROOT)
+    combos = combinations(pages)
+    write_assets(out_dir)
+    results, failures = run_pool(render_combination, combos, out_dir, workers)
+    _write_index(out_dir, results, time.strftime('%Y-%m-%d %H:%M:%S'))
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default='static_bundles', help='Direktori output (default: static_bundles)')
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), help='Halaman yang dirender (default: semua)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Jumlah worker process')
+    args = parser.parse_args(argv)
+
+    out_dir = os.path.abspath(args.out)
+    start = time.perf_counter()
+    results, failures = build_bundles(out_dir, args.pages, args.workers)
+    print(f"{len(results)} bundle ditulis ke {out_dir} "
+          f"dalam {time.perf_counter() - start:.1f} s")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import math
+
+import streamlit as st
+
+# ==================== Data table terpaginasi ====================
+# Tabel dirender langsung dari frame numerik: format tampilan dideklarasikan per kolom dan
+# diterapkan lewat Styler hanya pada slice halaman aktif (nilai tetap numerik, sort di browser
+# tetap numerik), tanpa kolom string hasil .apply di frame sumber. Untuk seleksi bitmap
+# (posisi baris) hanya baris halaman aktif yang diambil dari frame sumber.
+
+TABLE_PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_PAGE_SIZE = 50
+
+# Format per jenis kolom, dengan pemisah ribuan seperti format_rupiah / format_number
+COLUMN_FORMATS = {
+    'rupiah': 'Rp {:,.0f}',
+    'number': '{:,.0f}',
+    'percent': '{:.2%}',
+    'percent_detail': '{:.4%}',
+}
+
+
+def style_formats(view, formats):
+    """Styler view dengan format tampilan dari mapping {kolom: jenis format}."""
+    return view.style.format({col: COLUMN_FORMATS[kind] for col, kind in formats.items()}, na_rep='')
+
+
+def page_slice(df, page, page_size, rows=None):
+    """Ambil baris halaman `page` (mulai 1) tanpa menyalin frame penuh.
+
+    rows = posisi baris terpilih di df (mis. hasil BitmapIndex.select); None = semua baris.
+    """
+    start = (page - 1) * page_size
+    if rows is not None:
+        return df.iloc[rows[start:start + page_size]]
+    return df.iloc[start:start + page_size]
+
+
+def render_table(df, key, formats=None, height=400, rows=None, columns=None):
+    """Tampilkan df (atau baris `rows` dari df) per halaman dengan format kolom dari `formats`.
+
+    Kolom berjenis 'percent*' berisi rasio (0-1). columns = subset kolom yang ditampilkan
+    (diambil dari slice halaman saja).
+    """
+    columns = list(df.columns if columns is None else columns)
+    formats = {col: kind for col, kind in (formats or {}).items() if col in columns}
+    n_rows = len(df) if rows is None else len(rows)
+
+    page_size = DEFAULT_PAGE_SIZE
+    page = 1
+    if n_rows > DEFAULT_PAGE_SIZE:
+        col_size, col_page, col_info = st.columns([1, 1, 2])
+        with col_size:
+            page_size = st.selectbox("Baris per halaman", TABLE_PAGE_SIZES,
+                                     index=TABLE_PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key=f"{key}_page_size")
+        n_pages = max(1, math.ceil(n_rows / page_size))
+        # Filter / ukuran halaman berubah: halaman tersimpan bisa melewati batas baru
+        if st.session_state.get(f"{key}_page", 1) > n_pages:
+            st.session_state[f"{key}_page"] = n_pages
+        with col_page:
+            page = int(st.number_input("Halaman", min_value=1, max_value=n_pages, step=1, key=f"{key}_page"))
+        with col_info:
+            start = (page - 1) * page_size
+            st.caption(f"Menampilkan baris {start + 1:,}–{min(start + page_size, n_rows):,} dari {n_rows:,} "
+                       f"(halaman {page}/{n_pages})")
+
+    view = page_slice(df, page, page_size, rows)
+    if len(columns) < len(df.columns):
+        view = view[columns]
+    st.dataframe(style_formats(view, formats), use_container_width=True, height=height)
@@ -0,0 +1,63 @@
+import numpy as np
+
+# ==================== Heatmap tile pyramid ====================
+# Grid Category x Periode disimpan sebagai pyramid multi-resolusi: level 0 = grain asli,
+# setiap level berikutnya menggabungkan 2 kolom periode (sum). Tiap level dipotong menjadi
+# tile berisi TILE_SIZE kolom. Untuk sebuah viewport (rentang periode) dipilih level
+# paling detail yang masih muat di MAX_HEATMAP_COLS kolom, lalu hanya tile yang beririsan
+# yang dirakit - tidak ada agregasi ulang saat zoom berubah.
+
+TILE_SIZE = 64
+MAX_HEATMAP_COLS = 60        # kolom maksimum yang dikirim ke browser
+MAX_ANNOTATED_CELLS = 400    # teks per sel hanya pada zoom kasar / grid kecil
+
+
+def _pool_columns(grid):
+    # Gabung pasangan kolom; sel yang seluruhnya NaN tetap NaN
+    rows, cols = grid.shape
+    if cols % 2:
+        grid = np.hstack([grid, np.full((rows, 1), np.nan)])
+    pairs = grid.reshape(rows, -1, 2)
+    pooled = np.nansum(pairs, axis=2)
+    pooled[np.isnan(pairs).all(axis=2)] = np.nan
+    return pooled
+
+
+class TilePyramid:
+    def __init__(self, grid, row_keys, tile_size=TILE_SIZE):
+        grid = np.asarray(grid, dtype=np.float64)
+        self.row_keys = list(row_keys)
+        self.row_index = {key: i for i, key in enumerate(self.row_keys)}
+        self.n_cols = grid.shape[1]
+        self.tile_size = tile_size
+        # levels[level] = list tile (array rows x <=tile_size)
+        self.levels = []
+        level_grid = grid
+        while True:
+            self.levels.append([
+                level_grid[:, start:start + tile_size]
+                for start in range(0, max(level_grid.shape[1], 1), tile_size)
+            ])
+            if level_grid.shape[1] <= 1:
+                break
+            level_grid = _pool_columns(level_grid)
+
+    def level_for(self, col_start, col_end, max_cols=MAX_HEATMAP_COLS):
+        span = col_end - col_start
+        level = 0
+        while level < len(self.levels) - 1 and -(-span // (1 << level)) > max_cols:
+            level += 1
+        return level
+
+    def window(self, col_start, col_end, rows=None, max_cols=MAX_HEATMAP_COLS):
+        # -> (level, z, base_col_edges) untuk kolom asli [col_start, col_end)
+        level = self.level_for(col_start, col_end, max_cols)
+        factor = 1 << level
+        first, last = col_start // factor, -(-col_end // factor)
+        tiles = self.levels[level][first // self.tile_size:(last - 1) // self.tile_size + 1]
+        offset = (first // self.tile_size) * self.tile_size
+        z = np.hstack(tiles)[:, first - offset:last - offset]
+        if rows is not None:
+            z = z[[self.row_index[r] for r in rows if r in self.row_index]]
+        edges = np.minimum(np.arange(first, last + 1) * factor, self.n_cols)
+        return level, z, edges
@@ -0,0 +1,31 @@
+import numpy as np
+
+# ==================== Top-K engine ====================
+# Tabel ranking (semua metrik dalam satu aggregation pass, utils.bitmaps.aggregate) diambil
+# top K per metrik dengan partial selection (argpartition, O(n)) - hanya K baris terpilih
+# yang di-sort. Tie diputus menurut urutan baris tabel, juga di batas K.
+
+
+def top_k(table, metric, k, ascending=False):
+    values = table[metric].to_numpy(dtype=np.float64)
+    key = values if ascending else -values
+    key = np.where(np.isnan(key), np.inf, key)
+    
+    n = len(key)
+    if k < n:
+        candidates = np.argpartition(key, k - 1)[:k]
+        # argpartition tidak menentukan baris mana yang terpilih saat nilai batas (ke-K) juga
+        # dimiliki baris di luar kandidat: ambil ulang dengan baris terdepan lebih dulu
+        boundary = key[candidates].max()
+        if np.count_nonzero(key == boundary) > np.count_nonzero(key[candidates] == boundary):
+            better = np.flatnonzero(key < boundary)
+            candidates = np.concatenate([better, np.flatnonzero(key == boundary)[:k - len(better)]])
+    else:
+        candidates = np.arange(n)
+    # Tie-break berdasarkan urutan baris agar hasil deterministik
+    order = candidates[np.lexsort((candidates, key[candidates]))]
+    return table.iloc[order].reset_index(drop=True)
+
+
+def top_k_all(table, metrics, k, ascending=False):
+    return {metric: top_k(table, metric, k, ascending) for metric in metrics}